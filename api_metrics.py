@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+n8n API 請求指標
+每個經由共用客戶端發送的請求都會記錄端點模板、方法、狀態碼、延遲、請求/回應位元組數與重試次數，
+結束時可輸出為 JSON (每次執行的效能紀錄) 或 Prometheus 文字格式 (node_exporter textfile collector)
+
+Usage:
+    python3 n8n_deploy_pipeline.py --metrics-file metrics/backup.json backup
+    N8N_METRICS_FILE=/var/lib/node_exporter/n8n.prom python3 n8n_deploy_pipeline.py batch-deploy ./workflows
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple, Union
+
+# 延遲直方圖的上界 (秒)，最後一個為 +Inf
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 這些集合後面的路徑段是資源 ID，彙總時以 {id} 代替
+ID_COLLECTIONS = frozenset(['workflows', 'executions', 'credentials', 'tags', 'users',
+                            'projects', 'variables'])
+
+Status = Union[int, str]
+
+
+def endpoint_template(endpoint: str) -> str:
+    """將具體端點轉為模板，例如 /workflows/abc123/activate -> /workflows/{id}/activate"""
+    segments = endpoint.split('?', 1)[0].strip('/').split('/')
+    for index in range(1, len(segments)):
+        if segments[index - 1] in ID_COLLECTIONS and segments[index]:
+            segments[index] = '{id}'
+    return '/' + '/'.join(segments)
+
+
+class _Series:
+    """單一 (方法, 端點模板, 狀態碼) 組合的累計值"""
+
+    __slots__ = ('count', 'latency_sum', 'latency_max', 'buckets', 'request_bytes',
+                 'response_bytes', 'retries')
+
+    def __init__(self):
+        self.count = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str, str], _Series] = {}
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+
+    def record(self, method: str, endpoint: str, status: Status, latency: float,
+               request_bytes: int = 0, response_bytes: int = 0, retries: int = 0) -> None:
+        """記錄一個已完成 (或失敗) 的請求；連線失敗時 status 為 'error'"""
+        key = (method.upper(), endpoint_template(endpoint), str(status))
+        bucket = len(LATENCY_BUCKETS)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                bucket = index
+                break
+
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.count += 1
+            series.latency_sum += latency
+            series.latency_max = max(series.latency_max, latency)
+            series.buckets[bucket] += 1
+            series.request_bytes += request_bytes
+            series.response_bytes += response_bytes
+            series.retries += retries
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self.started_at = datetime.now()
+            self._started = time.perf_counter()
+
+    def to_dict(self) -> Dict:
+        """JSON 格式的效能紀錄"""
+        with self._lock:
+            items = sorted(self._series.items())
+        series = []
+        totals = {'requests': 0, 'errors': 0, 'latency_sum': 0.0, 'request_bytes': 0,
+                  'response_bytes': 0, 'retries': 0}
+        for (method, endpoint, status), s in items:
+            series.append({
+                'method': method,
+                'endpoint': endpoint,
+                'status': status,
+                'count': s.count,
+                'latency_sum': round(s.latency_sum, 6),
+                'latency_avg': round(s.latency_sum / s.count, 6) if s.count else 0.0,
+                'latency_max': round(s.latency_max, 6),
+                'latency_buckets': {str(bound): n for bound, n in
+                                    zip(LATENCY_BUCKETS + ('+Inf',), s.buckets)},
+                'request_bytes': s.request_bytes,
+                'response_bytes': s.response_bytes,
+                'retries': s.retries,
+            })
+            totals['requests'] += s.count
+            totals['latency_sum'] += s.latency_sum
+            totals['request_bytes'] += s.request_bytes
+            totals['response_bytes'] += s.response_bytes
+            totals['retries'] += s.retries
+            if not status.isdigit() or int(status) >= 400:
+                totals['errors'] += s.count
+        totals['latency_sum'] = round(totals['latency_sum'], 6)
+
+        return {
+            'command': sys.argv[1:],
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'elapsed': round(time.perf_counter() - self._started, 3),
+            'totals': totals,
+            'series': series,
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文字格式"""
+        with self._lock:
+            items = sorted(self._series.items())
+
+        def labels(method: str, endpoint: str, status: str, **extra) -> str:
+            pairs = {'method': method, 'endpoint': endpoint, 'status': status, **extra}
+            return ','.join(f'{k}="{v}"' for k, v in pairs.items())
+
+        lines = [
+            '# HELP n8n_api_request_duration_seconds n8n API request latency',
+            '# TYPE n8n_api_request_duration_seconds histogram',
+        ]
+        for (method, endpoint, status), s in items:
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS + ('+Inf',), s.buckets):
+                cumulative += n
+                lines.append(f'n8n_api_request_duration_seconds_bucket'
+                             f'{{{labels(method, endpoint, status, le=bound)}}} {cumulative}')
+            lines.append(f'n8n_api_request_duration_seconds_sum{{{labels(method, endpoint, status)}}} '
+                         f'{s.latency_sum:.6f}')
+            lines.append(f'n8n_api_request_duration_seconds_count{{{labels(method, endpoint, status)}}} '
+                         f'{s.count}')
+
+        for name, attribute, help_text in (
+                ('n8n_api_request_bytes_total', 'request_bytes', 'Bytes sent in n8n API request bodies'),
+                ('n8n_api_response_bytes_total', 'response_bytes', 'Bytes received in n8n API responses'),
+                ('n8n_api_retries_total', 'retries', 'Retries performed for n8n API requests')):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (method, endpoint, status), s in items:
+                lines.append(f'{name}{{{labels(method, endpoint, status)}}} {getattr(s, attribute)}')
+
+        lines.append('# HELP n8n_tool_run_duration_seconds Wall time of the CLI run')
+        lines.append('# TYPE n8n_tool_run_duration_seconds gauge')
+        lines.append(f'n8n_tool_run_duration_seconds {time.perf_counter() - self._started:.3f}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        """寫入指標文件；副檔名為 .prom 時使用 Prometheus 格式，其餘為 JSON"""
+        if path.endswith('.prom'):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), indent=2, ensure_ascii=False) + '\n'
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # 先寫入暫存檔再取代，避免 collector 讀到寫到一半的文件
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+# 程序內共用的指標登錄 (所有客戶端都寫入這裡)
+registry = MetricsRegistry()
+
+
+def dump_at_exit(path: Optional[str]) -> None:
+    """程序結束時 (包含 sys.exit) 將指標寫入 path；path 為空時不做任何事"""
+    if not path:
+        return
+
+    def _dump() -> None:
+        try:
+            registry.write(path)
+        except OSError as e:
+            print(f"⚠️  無法寫入指標文件 {path}: {e}", file=sys.stderr)
+
+    atexit.register(_dump)
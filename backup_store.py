@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+內容定址的工作流備份倉庫
+正規化後的工作流 JSON 以 SHA-256 命名並以 gzip 壓縮保存，相同內容只保存一次
+
+目錄結構:
+    <root>/objects/ab/abcdef....json.gz   壓縮後的工作流內容
+    <root>/index.jsonl                    每行一筆: 工作流 ID、名稱、versionId、雜湊、備份時間
+
+列出歷史與查找版本只讀取索引，還原時只解壓縮需要的那一個物件
+"""
+
+import os
+import gzip
+import hashlib
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import json_backend
+from workflow_hash import canonical_json, deploy_hash, version_key
+
+INDEX_FILE = 'index.jsonl'
+OBJECTS_DIR = 'objects'
+
+
+def safe_filename(name: str) -> str:
+    """清理工作流名稱中的特殊字符，用於備份文件名"""
+    safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    return safe_name.replace(' ', '_')
+
+
+class BackupStore:
+    def __init__(self, root: str, compress_level: int = 6):
+        self.root = root
+        self.compress_level = compress_level
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self.objects_path = os.path.join(root, OBJECTS_DIR)
+        os.makedirs(self.objects_path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._latest: Optional[Dict[str, Dict]] = None
+
+    def _blob_path(self, blob_hash: str) -> str:
+        return os.path.join(self.objects_path, blob_hash[:2], f"{blob_hash}.json.gz")
+
+    def has_blob(self, blob_hash: str) -> bool:
+        """檢查物件是否已存在"""
+        return os.path.exists(self._blob_path(blob_hash))
+
+    def put_blob(self, workflow_data: Dict) -> Tuple[str, bool, int]:
+        """
+        保存工作流內容
+
+        Returns:
+            (雜湊, 是否為新物件, 壓縮後大小)
+        """
+        payload = canonical_json(workflow_data).encode('utf-8')
+        blob_hash = hashlib.sha256(payload).hexdigest()
+        path = self._blob_path(blob_hash)
+        if os.path.exists(path):
+            return blob_hash, False, os.path.getsize(path)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # mtime=0 讓相同內容得到位元組完全相同的壓縮檔
+        compressed = gzip.compress(payload, compresslevel=self.compress_level, mtime=0)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        return blob_hash, True, len(compressed)
+
+    def get_blob(self, blob_hash: str) -> Dict:
+        """讀取並解壓縮單個物件"""
+        with gzip.open(self._blob_path(blob_hash), 'rb') as f:
+            return json_backend.loads(f.read())
+
+    def iter_index(self) -> Iterator[Dict]:
+        """逐行讀取索引 (不解壓縮任何物件)"""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json_backend.loads(line)
+
+    def latest(self) -> Dict[str, Dict]:
+        """每個工作流最新的索引項目"""
+        with self._lock:
+            if self._latest is None:
+                latest = {}
+                for entry in self.iter_index():
+                    latest[entry['id']] = entry
+                self._latest = latest
+            return dict(self._latest)
+
+    def put(self, workflow_data: Dict, backed_up_at: str) -> Tuple[Dict, bool]:
+        """
+        備份一個工作流版本
+
+        內容與該工作流最新版本相同時不新增索引項目
+
+        Returns:
+            (索引項目, 是否新增了索引項目)
+        """
+        blob_hash, _, size = self.put_blob(workflow_data)
+        workflow_id = workflow_data.get('id')
+        entry = {
+            'id': workflow_id,
+            'name': workflow_data.get('name'),
+            'versionId': version_key(workflow_data),
+            'hash': blob_hash,
+            'deployHash': deploy_hash(workflow_data),
+            'size': size,
+            'backedUpAt': backed_up_at,
+        }
+
+        self.latest()
+        with self._lock:
+            previous = self._latest.get(workflow_id)
+            if previous and previous['hash'] == blob_hash:
+                return previous, False
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json_backend.dumps(entry) + '\n')
+            self._latest[workflow_id] = entry
+        return entry, True
+
+    def history(self, workflow_id: str) -> List[Dict]:
+        """列出工作流的所有備份版本 (由舊到新)"""
+        return [entry for entry in self.iter_index() if entry['id'] == workflow_id]
+
+    def find(self, workflow_id: str, at: Optional[str] = None) -> Optional[Dict]:
+        """找出指定時間 (含) 之前最新的備份版本；at 為 None 時返回最新版本"""
+        found = None
+        for entry in self.iter_index():
+            if entry['id'] != workflow_id:
+                continue
+            if at is not None and entry['backedUpAt'] > at:
+                continue
+            found = entry
+        return found
+
+    def restore(self, workflow_id: str, at: Optional[str] = None) -> Optional[Dict]:
+        """還原工作流內容"""
+        entry = self.find(workflow_id, at)
+        if entry is None:
+            return None
+        return self.get_blob(entry['hash'])
+
+    def stats(self) -> Dict[str, int]:
+        """統計索引項目數、物件數與物件總大小"""
+        blob_count = 0
+        blob_bytes = 0
+        for dirpath, _, filenames in os.walk(self.objects_path):
+            for filename in filenames:
+                if filename.endswith('.json.gz'):
+                    blob_count += 1
+                    blob_bytes += os.path.getsize(os.path.join(dirpath, filename))
+        return {
+            'entries': sum(1 for _ in self.iter_index()),
+            'blobs': blob_count,
+            'bytes': blob_bytes,
+        }
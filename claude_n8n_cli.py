@@ -5,41 +5,77 @@ Claude n8n Advanced CLI Tool
 
 Usage:
     python3 claude_n8n_cli.py test
-    python3 claude_n8n_cli.py list [--active]
+    python3 claude_n8n_cli.py list [--active] [--instances NAMES]
     python3 claude_n8n_cli.py activate <WORKFLOW_ID> [--disable]
-    python3 claude_n8n_cli.py executions --workflow-id <ID> --limit 10
+    python3 claude_n8n_cli.py executions --workflow-id <ID> --limit 10 [--instances NAMES]
+    python3 claude_n8n_cli.py executions stats [--workflow-id <ID>] [--limit N] [--bucket hour|day] [--json]
+    python3 claude_n8n_cli.py executions sync [--db FILE]
+    python3 claude_n8n_cli.py executions [list|stats] --db FILE [--status STATUS] [--since ISO_TIME]
+    python3 claude_n8n_cli.py profile <WORKFLOW_ID> [--limit 50] [--status success] [--json]
     python3 claude_n8n_cli.py webhook <WORKFLOW_ID>
     python3 claude_n8n_cli.py update <ID> --name "New Name"
-    python3 claude_n8n_cli.py deploy <JSON_FILE> [--activate]
+    python3 claude_n8n_cli.py deploy <JSON_FILE>... [--activate] [--async] [--concurrency N] [--force]
 """
 
 import os
 import sys
 import json
-import requests
 import argparse
-from typing import Dict, List, Optional, Any
+import json_backend
+from n8n_client import DEFAULT_CONCURRENCY, get_client, import_requests, iter_items
+from api_metrics import dump_at_exit
+from workflow_index import WorkflowIndex
+from workflow_deploy import deploy_steps, run_deploy, run_deploy_async
+from execution_stats import ExecutionStats, PERCENTILES, format_seconds
+from execution_store import ExecutionStore, DEFAULT_DB_FILE
+from execution_profile import NodeProfiler, PROFILE_PERCENTILES
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple
 from datetime import datetime
 import urllib.parse
 
-# 嘗試載入環境變數
-try:
-    from env_loader import load_env_file
-    load_env_file()
-except ImportError:
-    # 如果 env_loader 不存在，嘗試手動載入 .env
-    if os.path.exists('.env'):
-        with open('.env', 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
+if TYPE_CHECKING:
+    # asyncio 與非同步客戶端 (aiohttp) 只在 deploy --async 時載入
+    import asyncio
+    from n8n_async_client import AsyncN8nClient
+
+_env_loaded = False
+
+def load_env() -> None:
+    """載入環境變數 (只在需要連線設定時呼叫一次，--help 與本地命令不讀取 .env)"""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from env_loader import load_env_file
+        load_env_file()
+    except ImportError:
+        # 如果 env_loader 不存在，嘗試手動載入 .env
+        if os.path.exists('.env'):
+            with open('.env', 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#') and '=' in line:
+                        key, value = line.split('=', 1)
+                        os.environ[key.strip()] = value.strip()
 
 class ClaudeN8nCLI:
-    def __init__(self):
-        self.host_url = os.getenv('N8N_HOST_URL')
-        self.api_key = os.getenv('N8N_API_KEY')
+    def __init__(self, host_url: Optional[str] = None, api_key: Optional[str] = None,
+                 offline: bool = False):
+        """
+        未指定 host_url/api_key 時使用 N8N_HOST_URL/N8N_API_KEY (多實例時由設定檔傳入)
+
+        offline=True 時不需要連線設定，只能使用本地資料 (executions --db)
+        """
+        # 工作流名稱/ID 索引 (首次部署時才建立)
+        self.workflow_index = None
+        if offline:
+            self.host_url = self.api_key = self.client = None
+            return
+        if not host_url or not api_key:
+            load_env()
+        self.host_url = host_url or os.getenv('N8N_HOST_URL')
+        self.api_key = api_key or os.getenv('N8N_API_KEY')
 
         if not self.host_url or not self.api_key:
             print("錯誤: 請設定必要的環境變數")
@@ -49,36 +85,18 @@ class ClaudeN8nCLI:
             print("   export N8N_API_KEY='your_actual_api_key_here'")
             sys.exit(1)
         
-        self.headers = {
-            'X-N8N-API-KEY': self.api_key,
-            'Content-Type': 'application/json'
-        }
-        
         # 移除 URL 末尾的斜線
         self.host_url = self.host_url.rstrip('/')
+
+        # 共用連線池客戶端
+        self.client = get_client(self.host_url, self.api_key)
     
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> Dict:
         """發送 HTTP 請求到 n8n API"""
-        url = f"{self.host_url}/api/v1{endpoint}"
-        
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=self.headers, params=params)
-            elif method.upper() == 'POST':
-                response = requests.post(url, headers=self.headers, json=data, params=params)
-            elif method.upper() == 'PUT':
-                response = requests.put(url, headers=self.headers, json=data, params=params)
-            elif method.upper() == 'PATCH':
-                response = requests.patch(url, headers=self.headers, json=data, params=params)
-            elif method.upper() == 'DELETE':
-                response = requests.delete(url, headers=self.headers, params=params)
-            else:
-                raise ValueError(f"不支援的 HTTP 方法: {method}")
+            return self.client.request(method, endpoint, data, params)
             
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.RequestException as e:
+        except import_requests().exceptions.RequestException as e:
             print(f"API 請求失敗: {e}")
             if hasattr(e, 'response') and e.response is not None:
                 try:
@@ -110,6 +128,7 @@ class ClaudeN8nCLI:
             except:
                 print("⚠️  無法訪問執行記錄 (可能需要額外權限)")
             
+            print(f"📡 連線統計: {self.client.format_stats()}")
             print("🎉 連接測試完成!")
             
         except Exception as e:
@@ -119,32 +138,41 @@ class ClaudeN8nCLI:
     def list_workflows(self, active_only: bool = False) -> None:
         """列出工作流 (可選擇只顯示啟用的)"""
         print("正在獲取工作流列表...")
-        result = self._make_request('GET', '/workflows')
-        
-        workflows = result.get('data', [])
+        params = {}
         if active_only:
-            workflows = [w for w in workflows if w.get('active', False)]
+            # 由伺服器端篩選，避免下載停用的工作流
+            params['active'] = 'true'
             print(f"顯示啟用的工作流:")
         else:
             print(f"顯示所有工作流:")
         
-        if not workflows:
+        # 逐頁串流輸出，不在記憶體中保留完整列表
+        count = 0
+        for workflow in iter_items(self._make_request, '/workflows', params):
+            if active_only and not workflow.get('active', False):
+                continue
+            if count == 0:
+                print("-" * 90)
+                print(f"{'ID':<20} {'名稱':<35} {'狀態':<8} {'節點':<6} {'標籤':<15}")
+                print("-" * 90)
+            count += 1
+            print(self._format_workflow_row(workflow))
+        
+        if count == 0:
             print("沒有找到符合條件的工作流")
             return
         
-        print(f"\n找到 {len(workflows)} 個工作流:")
-        print("-" * 90)
-        print(f"{'ID':<20} {'名稱':<35} {'狀態':<8} {'節點':<6} {'標籤':<15}")
-        print("-" * 90)
-        
-        for workflow in workflows:
-            workflow_id = workflow.get('id', 'N/A')
-            name = workflow.get('name', 'N/A')[:34]
-            active = '🟢啟用' if workflow.get('active', False) else '🔴停用'
-            node_count = len(workflow.get('nodes', []))
-            tags = ', '.join(workflow.get('tags', []))[:14]
-            
-            print(f"{workflow_id:<20} {name:<35} {active:<8} {node_count:<6} {tags:<15}")
+        print(f"\n找到 {count} 個工作流")
+    
+    @staticmethod
+    def _format_workflow_row(workflow: Dict) -> str:
+        """工作流列表的一行 (ID、名稱、狀態、節點數、標籤)"""
+        workflow_id = workflow.get('id', 'N/A')
+        name = workflow.get('name', 'N/A')[:34]
+        active = '🟢啟用' if workflow.get('active', False) else '🔴停用'
+        node_count = len(workflow.get('nodes', []))
+        tags = ', '.join(workflow.get('tags', []))[:14]
+        return f"{workflow_id:<20} {name:<35} {active:<8} {node_count:<6} {tags:<15}"
     
     def activate_workflow(self, workflow_id: str, disable: bool = False) -> None:
         """啟用或停用工作流"""
@@ -159,62 +187,215 @@ class ClaudeN8nCLI:
         print(f"✅ 工作流狀態已更新為: {new_status}")
         print(f"工作流名稱: {workflow.get('name', 'N/A')}")
     
-    def get_executions(self, workflow_id: Optional[str] = None, limit: int = 10) -> None:
-        """獲取執行歷史"""
-        params = {'limit': limit}
+    def _iter_executions(self, workflow_id: Optional[str] = None, limit: Optional[int] = None,
+                         status: Optional[str] = None, since: Optional[str] = None,
+                         db: Optional[str] = None):
+        """執行紀錄來源：指定 db 時離線查詢本地儲存，否則依 nextCursor 逐頁讀取 API"""
+        if db:
+            store = ExecutionStore(db)
+            try:
+                yield from store.query(workflow_id, status, since, limit)
+            finally:
+                store.close()
+            return
+        
+        params = {}
         if workflow_id:
             params['workflowId'] = workflow_id
-            print(f"正在獲取工作流 {workflow_id} 的執行歷史 (最近 {limit} 次)...")
+        if status:
+            params['status'] = status
+        for execution in iter_items(self._make_request, '/executions', params, limit=limit):
+            if since and (execution.get('startedAt') or '') < since:
+                return  # API 由新到舊返回，之後的紀錄都更早
+            yield execution
+    
+    def sync_executions(self, db: str = DEFAULT_DB_FILE) -> None:
+        """將執行紀錄增量同步到本地 SQLite"""
+        store = ExecutionStore(db)
+        try:
+            before = store.count()
+            print(f"正在同步執行紀錄到 {db} (本地 {before} 筆, 已同步到 ID {store.synced_id()})...")
+            
+            # 列表端點不含工作流名稱，以索引補上 (只在遇到新紀錄時才列出工作流)
+            index = WorkflowIndex(self._make_request, self.host_url)
+            
+            def name_lookup(workflow_id: str) -> Optional[str]:
+                entry = index.get(workflow_id)
+                return entry.get('name') if entry else None
+            
+            result = store.sync(self.client.request, name_lookup)
+            print(f"✅ 新增 {result['added']} 筆, 更新狀態 {result['refreshed']} 筆 "
+                  f"(讀取 {result['pages']} 頁), 本地共 {store.count()} 筆")
+            print(f"📡 連線統計: {self.client.format_stats()}")
+        finally:
+            store.close()
+    
+    def get_executions(self, workflow_id: Optional[str] = None, limit: int = 10,
+                       status: Optional[str] = None, since: Optional[str] = None,
+                       db: Optional[str] = None) -> None:
+        """獲取執行歷史"""
+        source = f" (本地 {db})" if db else ""
+        if workflow_id:
+            print(f"正在獲取工作流 {workflow_id} 的執行歷史 (最近 {limit} 次){source}...")
         else:
-            print(f"正在獲取所有工作流的執行歷史 (最近 {limit} 次)...")
+            print(f"正在獲取所有工作流的執行歷史 (最近 {limit} 次){source}...")
         
-        result = self._make_request('GET', '/executions', params=params)
-        executions = result.get('data', [])
+        # 依 nextCursor 逐頁讀取，limit 可超過單頁上限
+        count = 0
+        for execution in self._iter_executions(workflow_id, limit, status, since, db):
+            if count == 0:
+                print("-" * 100)
+                print(f"{'執行ID':<20} {'工作流名稱':<25} {'狀態':<12} {'開始時間':<20} {'持續時間':<10}")
+                print("-" * 100)
+            count += 1
+            print(self._format_execution_row(execution))
         
-        if not executions:
+        if count == 0:
             print("沒有找到執行記錄")
             return
         
-        print(f"\n找到 {len(executions)} 個執行記錄:")
-        print("-" * 100)
-        print(f"{'執行ID':<20} {'工作流名稱':<25} {'狀態':<12} {'開始時間':<20} {'持續時間':<10}")
-        print("-" * 100)
+        print(f"\n找到 {count} 個執行記錄")
+    
+    @staticmethod
+    def _format_execution_row(execution: Dict) -> str:
+        """執行記錄列表的一行 (執行ID、工作流名稱、狀態、開始時間、持續時間)"""
+        exec_id = execution.get('id', 'N/A')
+        workflow_name = execution.get('workflowData', {}).get('name', 'N/A')[:24]
+        status = execution.get('status', 'N/A')
         
-        for execution in executions:
-            exec_id = execution.get('id', 'N/A')
-            workflow_name = execution.get('workflowData', {}).get('name', 'N/A')[:24]
-            status = execution.get('status', 'N/A')
-            
-            # 格式化狀態顯示
-            status_display = {
-                'success': '🟢 成功',
-                'error': '🔴 錯誤', 
-                'running': '🟡 執行中',
-                'waiting': '🟠 等待中'
-            }.get(status, f'❓ {status}')
-            
-            start_time = execution.get('startedAt', '')
-            if start_time:
-                try:
-                    dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-                    start_display = dt.strftime('%Y-%m-%d %H:%M:%S')
-                except:
-                    start_display = start_time[:19]
-            else:
-                start_display = 'N/A'
-            
-            # 計算持續時間
-            duration = 'N/A'
-            if execution.get('startedAt') and execution.get('stoppedAt'):
-                try:
-                    start = datetime.fromisoformat(execution['startedAt'].replace('Z', '+00:00'))
-                    stop = datetime.fromisoformat(execution['stoppedAt'].replace('Z', '+00:00'))
-                    duration_sec = (stop - start).total_seconds()
-                    duration = f"{duration_sec:.1f}s"
-                except:
-                    pass
-            
-            print(f"{exec_id:<20} {workflow_name:<25} {status_display:<12} {start_display:<20} {duration:<10}")
+        # 格式化狀態顯示
+        status_display = {
+            'success': '🟢 成功',
+            'error': '🔴 錯誤', 
+            'running': '🟡 執行中',
+            'waiting': '🟠 等待中'
+        }.get(status, f'❓ {status}')
+        
+        start_time = execution.get('startedAt', '')
+        if start_time:
+            try:
+                dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+                start_display = dt.strftime('%Y-%m-%d %H:%M:%S')
+            except:
+                start_display = start_time[:19]
+        else:
+            start_display = 'N/A'
+        
+        # 計算持續時間
+        duration = 'N/A'
+        if execution.get('startedAt') and execution.get('stoppedAt'):
+            try:
+                start = datetime.fromisoformat(execution['startedAt'].replace('Z', '+00:00'))
+                stop = datetime.fromisoformat(execution['stoppedAt'].replace('Z', '+00:00'))
+                duration_sec = (stop - start).total_seconds()
+                duration = f"{duration_sec:.1f}s"
+            except:
+                pass
+        
+        return f"{exec_id:<20} {workflow_name:<25} {status_display:<12} {start_display:<20} {duration:<10}"
+    
+    def execution_stats(self, workflow_id: Optional[str] = None, limit: Optional[int] = None,
+                        bucket: str = 'hour', as_json: bool = False, status: Optional[str] = None,
+                        since: Optional[str] = None, db: Optional[str] = None) -> None:
+        """統計執行次數、錯誤率與持續時間百分位數 (依工作流與時間區間)"""
+        stats = ExecutionStats()
+        out = sys.stderr if as_json else sys.stdout
+        scope = f"工作流 {workflow_id} " if workflow_id else "所有工作流"
+        amount = f"最近 {limit} 次" if limit else "全部"
+        source = f", 本地 {db}" if db else ""
+        print(f"正在統計{scope}的執行紀錄 ({amount}{source})...", file=out)
+
+        # 逐頁串流讀取，記憶體中只保留數值陣列
+        stats.add_many(self._iter_executions(workflow_id, limit, status, since, db))
+        if not len(stats):
+            print("沒有找到執行記錄", file=out)
+            if as_json:
+                print(json.dumps({'total': 0, 'bucket': bucket, 'workflows': [], 'buckets': []},
+                                 indent=2, ensure_ascii=False))
+            return
+
+        # 列表端點不含工作流名稱，以一次工作流列表補上 (離線時使用同步時記錄的名稱)
+        if self.client is not None and any(wid not in stats.workflow_names for wid in stats.workflow_ids):
+            index = WorkflowIndex(self._make_request, self.host_url)
+            for wid in stats.workflow_ids:
+                entry = index.get(wid)
+                if entry:
+                    stats.workflow_names.setdefault(wid, entry.get('name', ''))
+
+        by_workflow = stats.by_workflow()
+        by_bucket = stats.by_bucket(bucket)
+        if as_json:
+            print(json.dumps({'total': len(stats), 'bucket': bucket, 'workflows': by_workflow,
+                              'buckets': by_bucket}, indent=2, ensure_ascii=False))
+            return
+
+        columns = ''.join(f"{f'p{q}':<9}" for q in PERCENTILES)
+        header = f"{'次數':<8} {'錯誤率':<8} {columns}{'max':<9}"
+
+        def timing(row: Dict) -> str:
+            values = ''.join(f"{format_seconds(row[f'p{q}']):<9}" for q in PERCENTILES)
+            error_rate = f"{row['error_rate'] * 100:.1f}%"
+            return f"{row['count']:<8} {error_rate:<8} {values}{format_seconds(row['max']):<9}"
+
+        print("\n📊 依工作流:")
+        print("-" * 110)
+        print(f"{'工作流ID':<20} {'名稱':<25} {header}")
+        print("-" * 110)
+        for row in by_workflow:
+            print(f"{row['workflowId']:<20} {(row['name'] or 'N/A')[:24]:<25} {timing(row)}")
+
+        print(f"\n🕒 依時間 ({bucket}, UTC):")
+        print("-" * 110)
+        print(f"{'時間區間':<20} {header}")
+        print("-" * 110)
+        for row in by_bucket:
+            print(f"{row['bucket']:<20} {timing(row)}")
+
+        print(f"\n共統計 {len(stats)} 個執行記錄")
+    
+    def profile_workflow(self, workflow_id: str, limit: int = 50, status: Optional[str] = None,
+                         as_json: bool = False) -> None:
+        """分析工作流最近多次執行中各節點的耗時"""
+        out = sys.stderr if as_json else sys.stdout
+        workflow = self._make_request('GET', f'/workflows/{workflow_id}').get('data', {})
+        print(f"正在分析工作流 {workflow.get('name', workflow_id)} 最近 {limit} 次執行的節點耗時...", file=out)
+
+        params = {'workflowId': workflow_id, 'includeData': 'true'}
+        if status:
+            params['status'] = status
+        profiler = NodeProfiler(workflow)
+        # 含執行資料的頁面很大，以小頁面串流讀取，逐筆彙總後即丟棄
+        profiler.add_many(iter_items(self._make_request, '/executions', params,
+                                     page_size=min(limit, 20), limit=limit))
+        if not profiler.executions:
+            print("沒有找到含節點執行資料的執行記錄", file=out)
+            if as_json:
+                print(json.dumps({'workflowId': workflow_id, 'name': workflow.get('name'),
+                                  'executions': 0, 'wall_time': 0, 'nodes': []},
+                                 indent=2, ensure_ascii=False))
+            return
+
+        rows = profiler.report()
+        if as_json:
+            print(json.dumps({'workflowId': workflow_id, 'name': workflow.get('name'),
+                              'executions': profiler.executions, 'wall_time': profiler.wall_time,
+                              'nodes': rows}, indent=2, ensure_ascii=False))
+            return
+
+        columns = ''.join(f"{f'p{q}':<9}" for q in PROFILE_PERCENTILES)
+        print("-" * 130)
+        print(f"{'節點':<32} {'呼叫/次':<8} {'自身耗時':<10} {'佔比':<8} {columns}{'max':<9} {'總耗時':<10}")
+        print("-" * 130)
+        for row in rows:
+            name = row['node'] if not row['parent'] else f"  └ {row['node']}"
+            values = ''.join(f"{format_seconds(row[f'p{q}']):<9}" for q in PROFILE_PERCENTILES)
+            share = f"{row['self_share'] * 100:.1f}%"
+            print(f"{name[:31]:<32} {row['calls_per_execution']:<8.1f} {format_seconds(row['self_time']):<10} "
+                  f"{share:<8} {values}{format_seconds(row['max']):<9} {format_seconds(row['total_time']):<10}")
+
+        print(f"\n共分析 {profiler.executions} 次執行, 平均執行時間 "
+              f"{format_seconds(profiler.wall_time / profiler.executions)}")
+        print("💡 自身耗時已扣除子節點 (└) 的耗時；p50/p90/p99/max 為單次呼叫的自身耗時")
     
     def generate_webhook_url(self, workflow_id: str) -> None:
         """生成 webhook 測試 URL"""
@@ -287,61 +468,131 @@ class ClaudeN8nCLI:
         print(f"工作流名稱: {workflow.get('name', 'N/A')}")
         print(f"狀態: {'啟用' if workflow.get('active', False) else '停用'}")
 
-    def deploy_workflow(self, json_file: str, activate: bool = False) -> None:
-        """部署工作流從 JSON 文件"""
-        print(f"正在部署工作流從文件: {json_file}")
-
-        # 讀取 JSON 文件
+    @staticmethod
+    def _read_workflow_file(json_file: str, emit=print) -> Optional[Dict]:
+        """讀取待部署的工作流文件，失敗時輸出原因並返回 None"""
         try:
             with open(json_file, 'r', encoding='utf-8') as f:
-                workflow_data = json.load(f)
+                workflow_data = json_backend.load(f)
         except FileNotFoundError:
-            print(f"❌ 文件不存在: {json_file}")
-            return
+            emit(f"❌ 文件不存在: {json_file}")
+            return None
         except json.JSONDecodeError as e:
-            print(f"❌ JSON 格式錯誤: {e}")
-            return
-
-        workflow_name = workflow_data.get('name', '未命名工作流')
-        print(f"工作流名稱: {workflow_name}")
+            emit(f"❌ JSON 格式錯誤: {e}")
+            return None
+        emit(f"工作流名稱: {workflow_data.get('name', '未命名工作流')}")
+        return workflow_data
 
-        # 檢查是否已存在同名工作流
-        existing_workflows = self._make_request('GET', '/workflows')
-        existing_workflow = None
-
-        for wf in existing_workflows.get('data', []):
-            if wf.get('name') == workflow_name:
-                existing_workflow = wf
-                break
-
-        if existing_workflow:
-            workflow_id = existing_workflow['id']
-            print(f"🔄 發現同名工作流，正在更新 (ID: {workflow_id})")
-
-            # 更新現有工作流
-            result = self._make_request('PUT', f'/workflows/{workflow_id}', workflow_data)
-        else:
-            print("🆕 創建新工作流")
-
-            # 創建新工作流
-            result = self._make_request('POST', '/workflows', workflow_data)
-
-        deployed_workflow = result.get('data', {})
-        workflow_id = deployed_workflow.get('id')
-
-        print("✅ 工作流部署成功!")
-        print(f"工作流ID: {workflow_id}")
-        print(f"工作流名稱: {deployed_workflow.get('name', 'N/A')}")
-
-        # 如果需要啟用工作流
-        if activate and not deployed_workflow.get('active', False):
-            print("🔄 正在啟用工作流...")
-            self.activate_workflow(workflow_id, disable=False)
+    def deploy_workflow(self, json_file: str, activate: bool = False, force: bool = False) -> bool:
+        """部署工作流從 JSON 文件 (與部署管道共用 workflow_deploy 的流程)"""
+        print(f"正在部署工作流從文件: {json_file}")
+        workflow_data = self._read_workflow_file(json_file)
+        if workflow_data is None:
+            return False
+
+        if self.workflow_index is None:
+            self.workflow_index = WorkflowIndex(self._make_request, self.host_url).load()
+        run_deploy(deploy_steps(workflow_data, self.workflow_index, activate=activate, force=force),
+                   self._make_request)
+        return True
+
+    async def _deploy_one_async(self, client: 'AsyncN8nClient', json_file: str, activate: bool,
+                                force: bool, name_locks: Dict[str, 'asyncio.Lock']) -> Tuple[bool, List[str]]:
+        """以非同步客戶端部署單個文件，回傳結果與輸出 (所有文件完成後依序顯示)"""
+        import asyncio
+        lines = [f"\n📁 {json_file}"]
+        workflow_data = self._read_workflow_file(json_file, emit=lines.append)
+        if workflow_data is None:
+            return False, lines
 
-        print(f"狀態: {'啟用' if deployed_workflow.get('active', False) else '停用'}")
+        try:
+            async with name_locks.setdefault(workflow_data.get('name', '未命名工作流'), asyncio.Lock()):
+                await run_deploy_async(deploy_steps(workflow_data, self.workflow_index, activate=activate,
+                                                    force=force, emit=lines.append), client.request)
+            return True, lines
+        except Exception as e:
+            lines.append(f"❌ 部署失敗: {e}")
+            return False, lines
+
+    async def _deploy_workflows_async(self, json_files: List[str], activate: bool, force: bool,
+                                      concurrency: int) -> Tuple[List[Tuple[bool, List[str]]], str]:
+        import asyncio
+        from n8n_async_client import AsyncN8nClient
+        async with AsyncN8nClient(self.host_url, self.api_key, concurrency=concurrency) as client:
+            self.workflow_index = WorkflowIndex(self._make_request, self.host_url)
+            await self.workflow_index.load_async(client.list_workflows)
+            name_locks: Dict[str, 'asyncio.Lock'] = {}
+            results = await asyncio.gather(*(
+                self._deploy_one_async(client, json_file, activate, force, name_locks)
+                for json_file in json_files
+            ))
+            return results, client.format_stats()
+
+    def deploy_workflows_async(self, json_files: List[str], activate: bool = False, force: bool = False,
+                               concurrency: int = DEFAULT_CONCURRENCY) -> None:
+        """在單一事件迴圈中同時部署多個工作流文件"""
+        import asyncio
+        print(f"正在非同步部署 {len(json_files)} 個文件 (最多 {concurrency} 個同時請求)...")
+        results, stats = asyncio.run(self._deploy_workflows_async(json_files, activate, force, concurrency))
+        for _, lines in results:
+            for line in lines:
+                print(line)
+        failed = sum(1 for success, _ in results if not success)
+        print(f"\n完成: 成功 {len(results) - failed} 個, 失敗 {failed} 個")
+        print(f"📡 {stats}")
+
+def list_workflows_on_instances(instances: List[Tuple[str, Dict[str, str]]], active_only: bool = False) -> bool:
+    """同時列出多個實例的工作流，合併為一個以實例標記的表格"""
+    from instance_fanout import any_failed, print_instance_output, print_instance_summary, run_on_instances
+    params = {'active': 'true'} if active_only else {}
+    
+    def task(name: str, host_url: str, api_key: str) -> Dict:
+        cli = ClaudeN8nCLI(host_url, api_key)
+        rows = [cli._format_workflow_row(workflow)
+                for workflow in iter_items(cli._make_request, '/workflows', params)
+                if not active_only or workflow.get('active', False)]
+        return {'rows': rows, 'count': len(rows)}
+    
+    outcomes = run_on_instances(instances, task)
+    print_instance_output(outcomes)
+    print("-" * 103)
+    print(f"{'實例':<12} {'ID':<20} {'名稱':<35} {'狀態':<8} {'節點':<6} {'標籤':<15}")
+    print("-" * 103)
+    for outcome in outcomes:
+        for row in (outcome['result'] or {}).get('rows', []):
+            print(f"{outcome['instance']:<12} {row}")
+    print_instance_summary(outcomes, [('工作流', 'count')])
+    return not any_failed(outcomes)
+
+def get_executions_on_instances(instances: List[Tuple[str, Dict[str, str]]], workflow_id: Optional[str] = None,
+                                limit: int = 10, status: Optional[str] = None,
+                                since: Optional[str] = None) -> bool:
+    """同時讀取多個實例的執行歷史 (各實例最近 limit 次)，依開始時間由新到舊合併"""
+    from instance_fanout import any_failed, print_instance_output, print_instance_summary, run_on_instances
+    
+    def task(name: str, host_url: str, api_key: str) -> Dict:
+        cli = ClaudeN8nCLI(host_url, api_key)
+        rows = [(execution.get('startedAt') or '', cli._format_execution_row(execution))
+                for execution in cli._iter_executions(workflow_id, limit, status, since)]
+        return {'rows': rows, 'count': len(rows)}
+    
+    outcomes = run_on_instances(instances, task)
+    print_instance_output(outcomes)
+    merged = sorted(((started, outcome['instance'], row) for outcome in outcomes
+                     for started, row in (outcome['result'] or {}).get('rows', [])),
+                    key=lambda item: item[0], reverse=True)
+    print("-" * 113)
+    print(f"{'實例':<12} {'執行ID':<20} {'工作流名稱':<25} {'狀態':<12} {'開始時間':<20} {'持續時間':<10}")
+    print("-" * 113)
+    for _, instance, row in merged:
+        print(f"{instance:<12} {row}")
+    print_instance_summary(outcomes, [('執行記錄', 'count')])
+    return not any_failed(outcomes)
 
 def main():
     parser = argparse.ArgumentParser(description='Claude n8n 進階 CLI 工具')
+    parser.add_argument('--metrics-file', default=None,
+                        help='結束時將 API 請求指標寫入此文件 (.prom 為 Prometheus 格式，其餘為 JSON)')
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
 
     # test 命令
@@ -350,6 +601,7 @@ def main():
     # list 命令
     list_parser = subparsers.add_parser('list', help='列出工作流')
     list_parser.add_argument('--active', action='store_true', help='只顯示啟用的工作流')
+    list_parser.add_argument('--instances', help='以逗號分隔的實例設定檔 (all 為 N8N_INSTANCES 中的全部)，同時查詢並合併結果')
 
     # activate 命令
     activate_parser = subparsers.add_parser('activate', help='啟用或停用工作流')
@@ -358,8 +610,24 @@ def main():
 
     # executions 命令
     exec_parser = subparsers.add_parser('executions', help='獲取執行歷史')
+    exec_parser.add_argument('mode', nargs='?', choices=['list', 'stats', 'sync'], default='list',
+                             help='list: 列出執行紀錄; stats: 延遲與錯誤率統計; sync: 同步到本地 SQLite')
     exec_parser.add_argument('--workflow-id', help='特定工作流ID')
-    exec_parser.add_argument('--limit', type=int, default=10, help='限制結果數量')
+    exec_parser.add_argument('--limit', type=int, help='限制結果數量 (list 預設 10, stats 預設全部)')
+    exec_parser.add_argument('--bucket', choices=['minute', 'hour', 'day'], default='hour',
+                             help='stats 的時間區間大小')
+    exec_parser.add_argument('--json', action='store_true', help='stats 以 JSON 輸出')
+    exec_parser.add_argument('--status', help='只包含此狀態 (success、error、running...)')
+    exec_parser.add_argument('--since', help='只包含此時間 (ISO 8601, 例如 2025-01-01T00:00:00) 之後開始的紀錄')
+    exec_parser.add_argument('--db', help=f'使用本地 SQLite 執行紀錄 (sync 預設 {DEFAULT_DB_FILE})')
+    exec_parser.add_argument('--instances', help='以逗號分隔的實例設定檔 (all 為 N8N_INSTANCES 中的全部)，同時查詢並合併結果')
+
+    # profile 命令
+    profile_parser = subparsers.add_parser('profile', help='分析工作流各節點的執行耗時')
+    profile_parser.add_argument('workflow_id', help='工作流ID')
+    profile_parser.add_argument('--limit', type=int, default=50, help='分析最近幾次執行')
+    profile_parser.add_argument('--status', help='只分析此狀態的執行 (例如 success)')
+    profile_parser.add_argument('--json', action='store_true', help='以 JSON 輸出')
 
     # webhook 命令
     webhook_parser = subparsers.add_parser('webhook', help='生成 webhook 測試 URL')
@@ -372,8 +640,14 @@ def main():
 
     # deploy 命令
     deploy_parser = subparsers.add_parser('deploy', help='部署工作流從 JSON 文件')
-    deploy_parser.add_argument('json_file', help='工作流 JSON 文件路徑')
+    deploy_parser.add_argument('json_files', nargs='+', help='工作流 JSON 文件路徑 (可多個)')
     deploy_parser.add_argument('--activate', action='store_true', help='部署後自動啟用')
+    deploy_parser.add_argument('--async', dest='use_async', action='store_true',
+                               help='使用非同步客戶端同時部署所有文件')
+    deploy_parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                               help='非同步模式的同時請求上限')
+    deploy_parser.add_argument('--force', action='store_true',
+                               help='不比對遠端內容，一律寫入 (預設內容相同時略過更新)')
 
     args = parser.parse_args()
 
@@ -381,8 +655,32 @@ def main():
         parser.print_help()
         sys.exit(1)
 
+    # executions --db 只查詢本地 SQLite，不需要連線設定 (不讀取 .env，也不建立客戶端)
+    offline = args.command == 'executions' and args.db and args.mode != 'sync' \
+        and not getattr(args, 'instances', None)
+    if not offline:
+        load_env()
+    dump_at_exit(args.metrics_file or os.getenv('N8N_METRICS_FILE'))
+
+    # 多實例: 每個實例一個執行緒同時執行，合併結果
+    if getattr(args, 'instances', None):
+        from env_loader import select_instances
+        instances = select_instances(args.instances)
+        if instances is None:
+            sys.exit(2)
+        if args.command == 'list':
+            success = list_workflows_on_instances(instances, active_only=args.active)
+        elif args.mode != 'list' or args.db:
+            print("❌ --instances 只支援從 API 讀取執行記錄列表 (不支援 stats、sync 與 --db)")
+            sys.exit(2)
+        else:
+            success = get_executions_on_instances(instances, workflow_id=args.workflow_id,
+                                                  limit=args.limit or 10, status=args.status,
+                                                  since=args.since)
+        sys.exit(0 if success else 1)
+
     # 初始化 CLI
-    cli = ClaudeN8nCLI()
+    cli = ClaudeN8nCLI(offline=offline)
 
     # 執行對應的命令
     try:
@@ -393,13 +691,30 @@ def main():
         elif args.command == 'activate':
             cli.activate_workflow(args.workflow_id, disable=args.disable)
         elif args.command == 'executions':
-            cli.get_executions(workflow_id=getattr(args, 'workflow_id', None), limit=args.limit)
+            if args.mode == 'sync':
+                cli.sync_executions(args.db or DEFAULT_DB_FILE)
+            elif args.mode == 'stats':
+                cli.execution_stats(workflow_id=args.workflow_id, limit=args.limit,
+                                    bucket=args.bucket, as_json=args.json, status=args.status,
+                                    since=args.since, db=args.db)
+            else:
+                cli.get_executions(workflow_id=getattr(args, 'workflow_id', None),
+                                   limit=args.limit or 10, status=args.status,
+                                   since=args.since, db=args.db)
+        elif args.command == 'profile':
+            cli.profile_workflow(args.workflow_id, limit=args.limit, status=args.status,
+                                 as_json=args.json)
         elif args.command == 'webhook':
             cli.generate_webhook_url(args.workflow_id)
         elif args.command == 'update':
             cli.update_workflow(args.workflow_id, name=args.name)
         elif args.command == 'deploy':
-            cli.deploy_workflow(args.json_file, activate=args.activate)
+            if args.use_async:
+                cli.deploy_workflows_async(args.json_files, activate=args.activate, force=args.force,
+                                           concurrency=args.concurrency)
+            else:
+                for json_file in args.json_files:
+                    cli.deploy_workflow(json_file, activate=args.activate, force=args.force)
     except KeyboardInterrupt:
         print("\n操作被用戶中斷")
         sys.exit(1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+批量部署的本地變更追蹤狀態
+記錄每個工作流文件的大小、修改時間、內容雜湊，以及上次部署到的遠端 ID 與 versionId
+
+下次部署時，本地文件未變更且遠端 versionId 也未變更的文件可直接略過，不需任何 API 請求
+"""
+
+import os
+import hashlib
+import threading
+from typing import Dict, Optional
+
+import json_backend
+
+DEFAULT_STATE_FILE = '.n8n_deploy_state.json'
+
+
+def file_digest(path: str) -> str:
+    """計算文件內容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DeployState:
+    def __init__(self, state_file: str):
+        self.state_file = state_file
+        self.base_dir = os.path.dirname(os.path.abspath(state_file))
+        self._lock = threading.Lock()
+        self.files: Dict[str, Dict] = {}
+        self.host_url = ''
+
+    def _key(self, json_file: str) -> str:
+        # 以相對於狀態文件的路徑為鍵，CI 在不同目錄 checkout 時仍可沿用
+        return os.path.relpath(os.path.abspath(json_file), self.base_dir)
+
+    def load(self, host_url: str) -> 'DeployState':
+        """讀取狀態文件；屬於其他 n8n 實例的狀態會被忽略"""
+        self.host_url = host_url
+        if not os.path.exists(self.state_file):
+            return self
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json_backend.load(f)
+        except (OSError, ValueError):
+            return self
+        if state.get('host_url') == host_url:
+            self.files = state.get('files', {})
+        return self
+
+    def save(self) -> None:
+        """寫入狀態文件"""
+        with self._lock:
+            state = {'host_url': self.host_url, 'files': dict(sorted(self.files.items()))}
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json_backend.dump(state, f)
+        os.replace(tmp_file, self.state_file)
+
+    def unchanged_entry(self, json_file: str) -> Optional[Dict]:
+        """
+        本地文件自上次部署後未變更時返回其狀態項目
+
+        大小與修改時間相同時直接視為未變更；只有修改時間不同 (例如重新 checkout) 時才重新計算雜湊
+        """
+        with self._lock:
+            entry = self.files.get(self._key(json_file))
+        if not entry:
+            return None
+        try:
+            stat = os.stat(json_file)
+        except OSError:
+            return None
+
+        if stat.st_size != entry.get('size'):
+            return None
+        if stat.st_mtime_ns == entry.get('mtime_ns'):
+            return entry
+        if file_digest(json_file) != entry.get('sha256'):
+            return None
+
+        # 內容相同，只更新修改時間，下次即可走快速路徑
+        with self._lock:
+            entry = dict(entry, mtime_ns=stat.st_mtime_ns)
+            self.files[self._key(json_file)] = entry
+        return entry
+
+    def record(self, json_file: str, remote_id: str, version_id: Optional[str]) -> None:
+        """記錄文件部署後的狀態"""
+        stat = os.stat(json_file)
+        entry = {
+            'path': self._key(json_file),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_digest(json_file),
+            'remoteId': remote_id,
+            'versionId': version_id,
+        }
+        with self._lock:
+            self.files[entry['path']] = entry
@@ -2,11 +2,23 @@
 """
 環境變數載入工具
 用於安全地載入 .env 文件中的環境變數
+
+多個 n8n 實例以具名設定檔表示 (N8N_INSTANCES 列出名稱)：
+    N8N_INSTANCES=staging,prod-tw,prod-jp
+    N8N_STAGING_HOST_URL=https://staging.example.com
+    N8N_STAGING_API_KEY=...
+    N8N_PROD_TW_HOST_URL=https://tw.example.com
+    N8N_PROD_TW_API_KEY=...
 """
 
 import os
+import re
 import sys
 
+# 列出具名設定檔的環境變數；未命名的 N8N_HOST_URL/N8N_API_KEY 以 default 表示
+INSTANCES_VAR = 'N8N_INSTANCES'
+DEFAULT_INSTANCE = 'default'
+
 def load_env_file(env_file='.env'):
     """
     載入 .env 文件中的環境變數
@@ -79,6 +91,90 @@ def get_required_env_vars():
     
     return env_vars
 
+def instance_env_prefix(name):
+    """
+    設定檔名稱對應的環境變數前綴 (prod-tw -> N8N_PROD_TW_)
+    
+    Args:
+        name (str): 設定檔名稱
+    
+    Returns:
+        str: 環境變數前綴
+    """
+    return f"N8N_{re.sub(r'[^0-9A-Za-z]+', '_', name).strip('_').upper()}_"
+
+def get_instance_names():
+    """
+    獲取 N8N_INSTANCES 中的設定檔名稱
+    
+    Returns:
+        list: 設定檔名稱 (依設定順序)
+    """
+    value = os.getenv(INSTANCES_VAR, '')
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+def get_instance_env_vars(name):
+    """
+    獲取具名設定檔的連線設定
+    
+    Args:
+        name (str): 設定檔名稱，default 為未命名的 N8N_HOST_URL/N8N_API_KEY
+    
+    Returns:
+        dict: 含 N8N_HOST_URL 與 N8N_API_KEY 的字典，如果缺少變數則返回 None
+    """
+    if name == DEFAULT_INSTANCE:
+        return get_required_env_vars()
+    
+    prefix = instance_env_prefix(name)
+    env_vars = {}
+    missing_vars = []
+    for var in ['HOST_URL', 'API_KEY']:
+        value = os.getenv(f"{prefix}{var}")
+        if value:
+            env_vars[f"N8N_{var}"] = value
+        else:
+            missing_vars.append(f"{prefix}{var}")
+    
+    if missing_vars:
+        print(f"❌ 實例 {name} 缺少環境變數: {', '.join(missing_vars)}")
+        return None
+    
+    return env_vars
+
+def select_instances(spec):
+    """
+    解析 --instances 參數
+    
+    Args:
+        spec (str): 以逗號分隔的設定檔名稱；all 為 N8N_INSTANCES 中的全部
+    
+    Returns:
+        list: [(名稱, 連線設定), ...]，如果有任何設定檔無效則返回 None
+    """
+    names = []
+    for name in spec.split(','):
+        name = name.strip()
+        if name == 'all':
+            names.extend(get_instance_names())
+        elif name:
+            names.append(name)
+    # 去除重複但保留順序
+    names = list(dict.fromkeys(names))
+    
+    if not names:
+        print(f"❌ 沒有選擇任何實例 (all 需要先設定 {INSTANCES_VAR})")
+        return None
+    
+    instances = []
+    for name in names:
+        env_vars = get_instance_env_vars(name)
+        if env_vars is None:
+            print(f"💡 請在 .env 中設定 {instance_env_prefix(name)}HOST_URL 和 {instance_env_prefix(name)}API_KEY")
+            return None
+        instances.append((name, env_vars))
+    return instances
+
 def validate_env_vars():
     """
     驗證環境變數的有效性
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+工作流執行的節點耗時分析
+從含執行資料 (includeData) 的執行紀錄中取出每個節點每次執行的開始時間與耗時，
+跨多次執行彙總為依自身耗時排序的排行：呼叫次數、自身/總耗時、p50/p90/p99/max
+
+AI Agent 等根節點的耗時包含其子節點 (語言模型、工具、記憶體，以非 main 連線接入)，
+自身耗時會扣除同一次執行中子節點的耗時，避免重複計算。
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from execution_stats import percentile
+
+PROFILE_PERCENTILES = (50, 90, 99)
+
+
+def sub_node_parents(workflow: Dict) -> Dict[str, str]:
+    """由 connections 找出子節點 -> 根節點 (ai_languageModel、ai_tool 等非 main 連線)"""
+    parents = {}
+    for source, outputs in (workflow.get('connections') or {}).items():
+        for connection_type, branches in outputs.items():
+            if connection_type == 'main':
+                continue
+            for branch in branches or []:
+                for target in branch or []:
+                    if target.get('node'):
+                        parents[source] = target['node']
+    return parents
+
+
+class NodeProfiler:
+    """累積多次執行的節點耗時"""
+
+    def __init__(self, workflow: Optional[Dict] = None):
+        self.node_types: Dict[str, str] = {}
+        self.parents: Dict[str, str] = {}
+        if workflow:
+            self.set_workflow(workflow)
+
+        self.executions = 0
+        self.wall_time = 0.0
+        self._self_times: Dict[str, List[float]] = {}
+        self._total_times: Dict[str, float] = {}
+        self._executions_with_node: Dict[str, int] = {}
+
+    def set_workflow(self, workflow: Dict) -> None:
+        """以工作流定義補上節點類型與子節點關係"""
+        for node in workflow.get('nodes') or []:
+            self.node_types.setdefault(node.get('name'), node.get('type', ''))
+        for child, parent in sub_node_parents(workflow).items():
+            self.parents.setdefault(child, parent)
+
+    def add_execution(self, execution: Dict) -> bool:
+        """
+        加入一筆含執行資料的執行紀錄
+
+        Returns:
+            執行紀錄中是否有節點執行資料
+        """
+        run_data = (((execution.get('data') or {}).get('resultData') or {}).get('runData')) or {}
+        if not run_data:
+            return False
+        if execution.get('workflowData'):
+            self.set_workflow(execution['workflowData'])
+
+        self.executions += 1
+        starts = [run.get('startTime') for runs in run_data.values() for run in runs
+                  if run.get('startTime') is not None]
+        ends = [run['startTime'] + (run.get('executionTime') or 0) for runs in run_data.values()
+                for run in runs if run.get('startTime') is not None]
+        if starts:
+            self.wall_time += (max(ends) - min(starts)) / 1000.0
+
+        # 子節點耗時 (秒) 依根節點彙總，用於計算根節點的自身耗時
+        child_time: Dict[str, float] = {}
+        for name, runs in run_data.items():
+            parent = self.parents.get(name)
+            if parent:
+                child_time[parent] = child_time.get(parent, 0.0) + sum(
+                    (run.get('executionTime') or 0) / 1000.0 for run in runs)
+
+        for name, runs in run_data.items():
+            durations = [(run.get('executionTime') or 0) / 1000.0 for run in runs]
+            total = sum(durations)
+            self._total_times[name] = self._total_times.get(name, 0.0) + total
+            self._executions_with_node[name] = self._executions_with_node.get(name, 0) + 1
+
+            # 子節點耗時依比例從每次呼叫中扣除
+            subtract = child_time.get(name, 0.0)
+            ratio = max(total - subtract, 0.0) / total if total else 0.0
+            self._self_times.setdefault(name, []).extend(d * ratio for d in durations)
+        return True
+
+    def add_many(self, executions: Iterable[Dict]) -> int:
+        """加入多筆執行紀錄，返回含節點資料的筆數"""
+        return sum(1 for execution in executions if self.add_execution(execution))
+
+    def report(self) -> List[Dict]:
+        """依自身總耗時由多到少排序的節點排行"""
+        total_self = sum(sum(times) for times in self._self_times.values()) or 1.0
+        rows = []
+        for name, times in self._self_times.items():
+            sorted_times = sorted(times)
+            self_time = sum(sorted_times)
+            row = {
+                'node': name,
+                'type': self.node_types.get(name, ''),
+                'parent': self.parents.get(name),
+                'executions': self._executions_with_node[name],
+                'calls': len(sorted_times),
+                'calls_per_execution': len(sorted_times) / self._executions_with_node[name],
+                'self_time': self_time,
+                'self_share': self_time / total_self,
+                'total_time': self._total_times[name],
+            }
+            for q in PROFILE_PERCENTILES:
+                row[f'p{q}'] = percentile(sorted_times, q) if sorted_times else None
+            row['max'] = sorted_times[-1] if sorted_times else None
+            rows.append(row)
+        rows.sort(key=lambda row: (-row['self_time'], row['node']))
+        return rows
+
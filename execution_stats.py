@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+執行紀錄延遲統計
+以串流方式累積大量執行紀錄，時間戳記分批解析為緊湊的數值陣列，
+並依工作流與時間區間計算次數、錯誤率與 p50/p90/p95/p99/max 持續時間
+
+安裝 numpy 時以向量化方式解析時間與計算百分位數；未安裝時使用標準函式庫 (結果相同)。
+"""
+
+import math
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PERCENTILES = (50, 90, 95, 99)
+ERROR_STATUSES = frozenset(['error', 'crashed'])
+BUCKET_SECONDS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+# 每累積這麼多筆就解析一次時間戳記，原始字串不會整批留在記憶體中
+CHUNK_SIZE = 4096
+
+
+def _parse_one(value: Optional[str]) -> float:
+    """解析單個 ISO 8601 時間戳記為 epoch 秒數，無法解析時返回 NaN"""
+    if not value:
+        return math.nan
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return math.nan
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def parse_timestamps(values: List[Optional[str]]) -> array:
+    """
+    批次解析 ISO 8601 時間戳記 (n8n 以 UTC 'Z' 結尾)
+
+    Returns:
+        epoch 秒數的 array('d')，缺少或無法解析的值為 NaN
+    """
+    if np is not None:
+        try:
+            # datetime64 不接受時區後綴；全部為 UTC 'Z' 格式時可一次解析整批
+            stripped = [value[:-1] if value and value.endswith('Z') else (value or 'NaT')
+                        for value in values]
+            parsed = np.array(stripped, dtype='datetime64[ms]')
+            seconds = parsed.astype('int64') / 1000.0
+            seconds[np.isnat(parsed)] = np.nan
+            return array('d', seconds.tobytes())
+        except ValueError:
+            pass  # 含其他時區格式時逐筆解析
+    return array('d', (_parse_one(value) for value in values))
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """已排序數列的百分位數 (線性內插，與 numpy 預設方式相同)"""
+    if not sorted_values:
+        return math.nan
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+class ExecutionStats:
+    """累積執行紀錄並依工作流/時間區間產生延遲統計"""
+
+    def __init__(self):
+        self._workflow_codes: Dict[str, int] = {}
+        self.workflow_ids: List[str] = []
+        self.workflow_names: Dict[str, str] = {}
+
+        # 每筆執行紀錄一個元素的緊湊陣列
+        self._codes = array('i')
+        self._errors = array('b')
+        self._started = array('d')
+        self._durations = array('d')
+
+        self._pending: List[Tuple[int, bool, Optional[str], Optional[str]]] = []
+
+    def __len__(self) -> int:
+        return len(self._codes) + len(self._pending)
+
+    def add(self, execution: Dict) -> None:
+        """加入一筆執行紀錄 (API 或本地儲存的格式)"""
+        workflow_id = str(execution.get('workflowId') or 'N/A')
+        code = self._workflow_codes.get(workflow_id)
+        if code is None:
+            code = self._workflow_codes[workflow_id] = len(self.workflow_ids)
+            self.workflow_ids.append(workflow_id)
+        name = (execution.get('workflowData') or {}).get('name')
+        if name and workflow_id not in self.workflow_names:
+            self.workflow_names[workflow_id] = name
+
+        self._pending.append((code, execution.get('status') in ERROR_STATUSES,
+                              execution.get('startedAt'), execution.get('stoppedAt')))
+        if len(self._pending) >= CHUNK_SIZE:
+            self._flush()
+
+    def add_many(self, executions: Iterable[Dict]) -> int:
+        """串流加入多筆執行紀錄，返回加入的筆數"""
+        count = 0
+        for execution in executions:
+            self.add(execution)
+            count += 1
+        return count
+
+    def _flush(self) -> None:
+        """解析暫存的時間戳記並併入數值陣列"""
+        if not self._pending:
+            return
+        codes, errors, started_at, stopped_at = zip(*self._pending)
+        self._pending = []
+
+        started = parse_timestamps(list(started_at))
+        stopped = parse_timestamps(list(stopped_at))
+        if np is not None:
+            durations = np.frombuffer(stopped, dtype='d') - np.frombuffer(started, dtype='d')
+            self._durations.frombytes(durations.tobytes())
+        else:
+            self._durations.extend(stop - start for start, stop in zip(started, stopped))
+        self._codes.extend(codes)
+        self._errors.extend(errors)
+        self._started.extend(started)
+
+    def _summarize(self, keys, key_labels) -> List[Dict]:
+        """依 keys 分組計算統計；key_labels 將分組鍵轉為顯示用的欄位"""
+        self._flush()
+        results = []
+        if not len(self._codes):
+            return results
+
+        if np is not None:
+            keys = np.asarray(keys)
+            durations = np.frombuffer(self._durations, dtype='d')
+            errors = np.frombuffer(self._errors, dtype='b')
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+            for group in np.split(order, boundaries):
+                group_durations = durations[group]
+                group_durations = np.sort(group_durations[~np.isnan(group_durations)])
+                results.append(self._row(key_labels(keys[group[0]].item()), len(group),
+                                         int(errors[group].sum()), group_durations.tolist()))
+            return results
+
+        groups: Dict[int, List[int]] = {}
+        for index, key in enumerate(keys):
+            groups.setdefault(key, []).append(index)
+        for key in sorted(groups):
+            indexes = groups[key]
+            group_durations = sorted(self._durations[i] for i in indexes
+                                     if not math.isnan(self._durations[i]))
+            results.append(self._row(key_labels(key), len(indexes),
+                                     sum(self._errors[i] for i in indexes), group_durations))
+        return results
+
+    @staticmethod
+    def _row(labels: Dict, count: int, errors: int, sorted_durations: List[float]) -> Dict:
+        row = dict(labels)
+        row.update({
+            'count': count,
+            'errors': errors,
+            'error_rate': errors / count if count else 0.0,
+            'finished': len(sorted_durations),
+        })
+        # 沒有已完成的執行時百分位數為 None (JSON 輸出為 null)
+        for q in PERCENTILES:
+            row[f'p{q}'] = percentile(sorted_durations, q) if sorted_durations else None
+        row['max'] = sorted_durations[-1] if sorted_durations else None
+        return row
+
+    def by_workflow(self) -> List[Dict]:
+        """每個工作流的統計，依執行次數由多到少排序"""
+        def labels(code: int) -> Dict:
+            workflow_id = self.workflow_ids[code]
+            return {'workflowId': workflow_id, 'name': self.workflow_names.get(workflow_id, '')}
+
+        rows = self._summarize(self._codes, labels)
+        rows.sort(key=lambda row: (-row['count'], row['workflowId']))
+        return rows
+
+    def by_bucket(self, bucket: str = 'hour') -> List[Dict]:
+        """每個時間區間 (UTC) 的統計，依時間排序；缺少開始時間的紀錄不列入"""
+        self._flush()
+        seconds = BUCKET_SECONDS[bucket]
+        # 缺少開始時間的紀錄歸入 -1，最後再移除
+        if np is not None:
+            started = np.frombuffer(self._started, dtype='d')
+            keys = np.where(np.isnan(started), -1, np.floor(started / seconds)).astype('int64')
+        else:
+            keys = [-1 if math.isnan(value) else int(value // seconds) for value in self._started]
+
+        def labels(key: int) -> Dict:
+            if key < 0:
+                return {'bucket': None}
+            start = datetime.fromtimestamp(key * seconds, tz=timezone.utc)
+            return {'bucket': start.strftime('%Y-%m-%d %H:%M' if seconds < 86400 else '%Y-%m-%d')}
+
+        return [row for row in self._summarize(keys, labels) if row['bucket'] is not None]
+
+
+def format_seconds(value: float) -> str:
+    """格式化持續時間供表格顯示"""
+    if value is None or math.isnan(value):
+        return 'N/A'
+    if value < 1:
+        return f"{value * 1000:.0f}ms"
+    return f"{value:.1f}s"
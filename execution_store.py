@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+本地 SQLite 執行紀錄儲存
+從 n8n API 增量同步執行紀錄 (只讀取比上次完成同步時更新的紀錄)，
+之後的查詢與統計可離線完成，不需再逐頁讀取 API
+
+同步途中中斷時，sync_state 記錄本次的目標 ID 與下一頁的 cursor，下次同步先補上新紀錄再從 cursor 繼續，
+讀完所有頁面後才推進已同步的 ID，避免中斷後留下永久的缺口
+
+資料表 executions 以 workflowId、status、startedAt 建立索引；
+同步時會重新獲取上次仍在執行中 (running/waiting/new) 的紀錄以更新其狀態。
+"""
+
+import sqlite3
+from typing import Callable, Dict, Iterator, List, Optional
+
+from n8n_client import DEFAULT_PAGE_SIZE
+
+DEFAULT_DB_FILE = 'n8n_executions.db'
+
+# 這些狀態之後仍會改變，同步時需要重新獲取
+UNFINISHED_STATUSES = ('running', 'waiting', 'new')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS executions (
+    id INTEGER PRIMARY KEY,
+    workflowId TEXT,
+    workflowName TEXT,
+    status TEXT,
+    mode TEXT,
+    finished INTEGER,
+    startedAt TEXT,
+    stoppedAt TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_executions_workflow ON executions (workflowId, startedAt);
+CREATE INDEX IF NOT EXISTS idx_executions_status ON executions (status);
+CREATE INDEX IF NOT EXISTS idx_executions_started ON executions (startedAt);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+COLUMNS = ('id', 'workflowId', 'workflowName', 'status', 'mode', 'finished', 'startedAt', 'stoppedAt')
+
+# sync_state 的鍵: 完整同步到的 ID (此 ID 以下沒有缺口)、進行中同步的目標 ID 與下一頁 cursor
+SYNCED_ID = 'synced_id'
+SYNC_TARGET = 'sync_target'
+SYNC_CURSOR = 'sync_cursor'
+
+
+class ExecutionStore:
+    def __init__(self, db_path: str = DEFAULT_DB_FILE):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        # WAL 讓同步寫入時仍可查詢；NORMAL 同步在 WAL 下不會損壞資料庫
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def max_id(self) -> int:
+        """本地最大的執行 ID (沒有紀錄時為 0)"""
+        row = self.conn.execute('SELECT MAX(id) FROM executions').fetchone()
+        return row[0] or 0
+
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self.conn.execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, **values: Optional[str]) -> None:
+        """在單一交易中寫入同步狀態，值為 None 時刪除該鍵"""
+        with self.conn:
+            for key, value in values.items():
+                if value is None:
+                    self.conn.execute('DELETE FROM sync_state WHERE key = ?', (key,))
+                else:
+                    self.conn.execute('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)',
+                                      (key, str(value)))
+
+    def synced_id(self) -> int:
+        """已完整同步到的執行 ID；舊版資料庫沒有紀錄時以本地最大 ID 為準"""
+        value = self._get_state(SYNCED_ID)
+        return int(value) if value is not None else self.max_id()
+
+    def count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM executions').fetchone()[0]
+
+    def unfinished_ids(self) -> List[int]:
+        """仍在執行中的紀錄 ID"""
+        placeholders = ','.join('?' * len(UNFINISHED_STATUSES))
+        rows = self.conn.execute(f'SELECT id FROM executions WHERE status IN ({placeholders})',
+                                 UNFINISHED_STATUSES)
+        return [row[0] for row in rows]
+
+    def upsert_many(self, executions: List[Dict],
+                    name_lookup: Optional[Callable[[str], Optional[str]]] = None) -> int:
+        """在單一交易中寫入多筆執行紀錄，返回寫入筆數"""
+        rows = []
+        for execution in executions:
+            workflow_id = execution.get('workflowId')
+            workflow_name = (execution.get('workflowData') or {}).get('name')
+            if not workflow_name and name_lookup and workflow_id:
+                workflow_name = name_lookup(str(workflow_id))
+            rows.append((
+                int(execution['id']),
+                str(workflow_id) if workflow_id is not None else None,
+                workflow_name,
+                execution.get('status'),
+                execution.get('mode'),
+                int(bool(execution.get('finished'))),
+                execution.get('startedAt'),
+                execution.get('stoppedAt'),
+            ))
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO executions ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+        return len(rows)
+
+    def _sync_pages(self, request: Callable[..., Dict], cursor: Optional[str], stop_id: int,
+                    stats: Dict[str, int], name_lookup: Optional[Callable[[str], Optional[str]]],
+                    page_size: int, track: bool) -> int:
+        """
+        從 cursor (None 為最新一頁) 往舊的方向讀取並寫入大於 stop_id 的紀錄，直到遇到 stop_id 或沒有下一頁
+
+        Args:
+            track: 每寫入一頁就保存下一頁的 cursor (與第一頁的最大 ID 作為目標)，讀完時推進 synced_id
+
+        Returns:
+            讀到的最大執行 ID (沒有新紀錄時為 stop_id)
+        """
+        top = stop_id
+        while True:
+            params: Dict = {'limit': page_size}
+            if cursor:
+                params['cursor'] = cursor
+            result = request('GET', '/executions', None, params)
+            stats['pages'] += 1
+            page = result.get('data', [])
+            new_executions = [e for e in page if int(e['id']) > stop_id]
+            stats['added'] += self.upsert_many(new_executions, name_lookup)
+            if new_executions:
+                top = max(top, max(int(e['id']) for e in new_executions))
+
+            cursor = result.get('nextCursor')
+            done = not cursor or not page or len(new_executions) < len(page)
+            if track:
+                if done:
+                    target = max(int(self._get_state(SYNC_TARGET) or 0), top)
+                    self._set_state(synced_id=target, sync_target=None, sync_cursor=None)
+                else:
+                    self._set_state(sync_target=self._get_state(SYNC_TARGET) or top, sync_cursor=cursor)
+            if done:
+                return top
+
+    def sync(self, request: Callable[..., Dict],
+             name_lookup: Optional[Callable[[str], Optional[str]]] = None,
+             page_size: int = DEFAULT_PAGE_SIZE) -> Dict[str, int]:
+        """
+        從 API 增量同步
+
+        API 依執行 ID 由新到舊返回，讀到不大於已同步 ID 的紀錄即停止；每頁寫入後保存下一頁的 cursor，
+        上次同步中斷時先讀取中斷後的新紀錄，再從保存的 cursor 繼續讀到已同步 ID 為止。
+        另外逐筆重新獲取本地仍為執行中狀態的紀錄
+
+        Args:
+            request: 與 _make_request 相同簽名的請求函式
+            name_lookup: 由工作流 ID 查詢名稱的函式 (列表端點不含工作流名稱)
+            page_size: 每頁筆數
+
+        Returns:
+            {'added': 新增筆數, 'refreshed': 更新狀態筆數, 'pages': 讀取頁數}
+        """
+        if self._get_state(SYNCED_ID) is None:
+            # 首次同步 (或舊版資料庫): 先記錄起點，中斷後不會把已寫入的較新紀錄當成已同步
+            self._set_state(synced_id=self.max_id())
+        synced_id = self.synced_id()
+        target = self._get_state(SYNC_TARGET)
+        cursor = self._get_state(SYNC_CURSOR)
+        unfinished = self.unfinished_ids()
+        stats = {'added': 0, 'refreshed': 0, 'pages': 0}
+
+        if target is None:
+            self._sync_pages(request, None, synced_id, stats, name_lookup, page_size, track=True)
+        else:
+            # 上次同步中斷: 先補上之後新增的紀錄 (目標 ID 以上)，完成後才更新目標，再從 cursor 繼續
+            top = self._sync_pages(request, None, int(target), stats, name_lookup, page_size, track=False)
+            self._set_state(sync_target=max(top, int(target)))
+            if cursor:
+                self._sync_pages(request, cursor, synced_id, stats, name_lookup, page_size, track=True)
+            else:
+                self._set_state(synced_id=max(top, int(target)), sync_target=None)
+
+        for execution_id in unfinished:
+            try:
+                execution = request('GET', f'/executions/{execution_id}', None, None)
+            except Exception:
+                continue  # 已被刪除或暫時無法獲取，下次同步再試
+            execution = execution.get('data', execution)
+            if execution.get('id') is not None:
+                stats['refreshed'] += self.upsert_many([execution], name_lookup)
+
+        return stats
+
+    def query(self, workflow_id: Optional[str] = None, status: Optional[str] = None,
+              since: Optional[str] = None, limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        依條件查詢執行紀錄 (由新到舊)，返回與 API 列表相同格式的字典
+
+        Args:
+            workflow_id: 工作流 ID
+            status: 執行狀態 (success、error、running...)
+            since: 只返回此時間 (ISO 8601) 之後開始的紀錄
+            limit: 最多返回的筆數
+        """
+        conditions = []
+        params: List = []
+        if workflow_id:
+            conditions.append('workflowId = ?')
+            params.append(str(workflow_id))
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+        if since:
+            conditions.append('startedAt >= ?')
+            params.append(since)
+
+        sql = f"SELECT {', '.join(COLUMNS)} FROM executions"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY id DESC'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        cursor = self.conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                return
+            for row in rows:
+                yield {
+                    'id': str(row['id']),
+                    'workflowId': row['workflowId'],
+                    'workflowData': {'name': row['workflowName']} if row['workflowName'] else {},
+                    'status': row['status'],
+                    'mode': row['mode'],
+                    'finished': bool(row['finished']),
+                    'startedAt': row['startedAt'],
+                    'stoppedAt': row['stoppedAt'],
+                }
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+n8n 實例上已部署工作流的敏感資訊掃描
+依 nextCursor 串流讀取工作流列表 (不含 pinData)，每頁到達時立即以 workflow_secrets 的規則掃描，
+列表項目缺少節點時才個別獲取 (以執行緒池限制同時進行的請求數量)。記憶體中只保留兩頁資料與掃描結果。
+
+--incremental 時記錄每個工作流已掃描的 versionId 與結果，再次執行只掃描有變更的工作流
+
+Usage:
+    python3 security_check.py --remote [--jobs N] [--incremental] [--cache FILE]
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+from typing import Callable, Dict, List, Optional, Tuple
+
+import json_backend
+from n8n_client import iter_items
+from workflow_hash import version_key
+from workflow_secrets import redact_findings
+
+# 列表請求的查詢參數: 不傳回 pinData (不在掃描範圍內，且通常是最大的欄位)
+LIST_PARAMS = {'excludePinnedData': 'true'}
+
+
+class FleetScanCache:
+    """
+    工作流 ID -> 已掃描的 versionId 與結果；屬於其他實例或模式不同的快取會被忽略
+
+    結果只保存分類、規則、JSON 路徑與遮蔽後的比對內容，快取文件不含明文憑證
+    """
+
+    def __init__(self, cache_file: str, host_url: str, signature: str):
+        self.cache_file = cache_file
+        self.host_url = host_url
+        self.signature = signature
+        self.workflows: Dict[str, Dict] = {}
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def load(self) -> 'FleetScanCache':
+        if not os.path.exists(self.cache_file):
+            return self
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                state = json_backend.load(f)
+        except (OSError, ValueError):
+            return self
+        if state.get('host_url') == self.host_url and state.get('signature') == self.signature:
+            self.workflows = state.get('workflows', {})
+        return self
+
+    def save(self) -> None:
+        """寫入快取文件 (已刪除的工作流不保留)"""
+        with self._lock:
+            workflows = {workflow_id: entry for workflow_id, entry in sorted(self.workflows.items())
+                         if workflow_id in self._seen}
+        state = {'host_url': self.host_url, 'signature': self.signature, 'workflows': workflows}
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json_backend.dump(state, f, indent=False)
+        os.replace(tmp_file, self.cache_file)
+
+    def lookup(self, workflow_id: str, version: str) -> Optional[List[Tuple]]:
+        """versionId 與上次掃描時相同時返回快取的結果"""
+        with self._lock:
+            self._seen.add(workflow_id)
+            entry = self.workflows.get(workflow_id)
+        if not entry or not version or entry.get('versionId') != version:
+            return None
+        return [tuple(finding) for finding in entry.get('findings', [])]
+
+    def record(self, workflow_id: str, version: str, findings: List[Tuple]) -> None:
+        if not version:
+            return
+        with self._lock:
+            self._seen.add(workflow_id)
+            self.workflows[workflow_id] = {'versionId': version, 'findings': redact_findings(findings)}
+
+
+def scan_fleet(checker, request: Callable[..., Dict], jobs: int = 8,
+               cache: Optional[FleetScanCache] = None) -> Tuple[Dict[str, List[Tuple]], Dict[str, int]]:
+    """
+    掃描實例上的所有工作流
+
+    Args:
+        checker: SecurityChecker (使用 scan_workflow_data)
+        request: 與 _make_request 相同簽名的請求函式 (method, endpoint, data, params)
+        jobs: 個別獲取工作流時同時進行的請求上限
+        cache: versionId 快取，None 表示每個工作流都重新掃描
+
+    Returns:
+        ({"名稱 (ID)": findings}, 統計)
+    """
+    findings: Dict[str, List[Tuple]] = {}
+    stats = {'workflows': 0, 'scanned': 0, 'cached': 0, 'fetched': 0, 'errors': 0}
+
+    def scan(workflow: Dict) -> List[Tuple]:
+        return checker.scan_workflow_data(workflow) or []
+
+    def fetch_and_scan(workflow_id: str) -> Tuple[Dict, List[Tuple]]:
+        workflow = request('GET', f'/workflows/{workflow_id}', None, LIST_PARAMS).get('data', {})
+        return workflow, scan(workflow)
+
+    def collect(label: str, workflow_id: str, version: str, workflow_findings: List[Tuple]) -> None:
+        stats['scanned'] += 1
+        if cache is not None:
+            cache.record(workflow_id, version, workflow_findings)
+        if workflow_findings:
+            findings[label] = workflow_findings
+
+    # 限制同時在處理中的個別請求數量，列表仍以串流方式讀取
+    max_in_flight = max(jobs, 1) * 4
+    in_flight = {}
+
+    def drain(return_when) -> None:
+        done, _ = wait(in_flight, return_when=return_when)
+        for future in done:
+            label, workflow_id = in_flight.pop(future)
+            try:
+                workflow, workflow_findings = future.result()
+            except Exception as e:
+                print(f"⚠️  無法獲取工作流 {label}: {e}")
+                stats['errors'] += 1
+                continue
+            stats['fetched'] += 1
+            collect(label, workflow_id, version_key(workflow), workflow_findings)
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        # 處理目前頁面時已在背景讀取下一頁
+        for workflow in iter_items(request, '/workflows', LIST_PARAMS):
+            stats['workflows'] += 1
+            workflow_id = workflow.get('id')
+            label = f"{workflow.get('name', 'unnamed_workflow')} ({workflow_id})"
+            version = version_key(workflow)
+
+            cached = cache.lookup(workflow_id, version) if cache is not None else None
+            if cached is not None:
+                stats['cached'] += 1
+                if cached:
+                    findings[label] = cached
+                continue
+
+            if isinstance(workflow.get('nodes'), list):
+                collect(label, workflow_id, version, scan(workflow))
+                continue
+
+            # 列表項目不含節點 (部分 n8n 版本) 時個別獲取
+            in_flight[executor.submit(fetch_and_scan, workflow_id)] = (label, workflow_id)
+            if len(in_flight) >= max_in_flight:
+                drain(FIRST_COMPLETED)
+
+        if in_flight:
+            drain(ALL_COMPLETED)
+
+    return findings, stats
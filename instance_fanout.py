@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+多實例並行執行
+--instances 選擇的每個實例各以一個執行緒同時執行同一個命令 (各自的連線池與客戶端)，
+執行期間的輸出依執行緒分別收集，結束後依選擇順序輸出並在每行前加上 [實例名稱]，
+最後由各命令合併結果 (例如 list 的單一表格、backup 的各實例統計)
+
+實例設定檔見 env_loader (N8N_INSTANCES、N8N_<NAME>_HOST_URL、N8N_<NAME>_API_KEY)
+
+Usage:
+    python3 claude_n8n_cli.py list --instances staging,prod-tw,prod-jp
+    python3 n8n_deploy_pipeline.py batch-deploy ./workflows --instances all
+"""
+
+import io
+import os
+import sys
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class ThreadOutput(io.TextIOBase):
+    """
+    依執行緒導向輸出：已指定緩衝區的執行緒寫入自己的緩衝區，其他執行緒寫入原本的串流
+
+    緩衝區記錄在 contextvars 中，沿用呼叫端 context 的背景執行緒 (例如 iter_items 的預先讀取) 也寫入同一個緩衝區
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._buffer = contextvars.ContextVar('instance_output', default=None)
+
+    def capture(self, buffer) -> None:
+        self._buffer.set(buffer)
+
+    def release(self) -> None:
+        self._buffer.set(None)
+
+    def write(self, text: str) -> int:
+        buffer = self._buffer.get()
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def instance_path(path: str, instance: str) -> str:
+    """每個實例各自的狀態/快取文件 (.n8n_deploy_state.json -> .n8n_deploy_state.prod-tw.json)"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{instance}{ext}"
+
+
+def run_on_instances(instances: List[Tuple[str, Dict[str, str]]],
+                     task: Callable[[str, str, str], Any]) -> List[Dict]:
+    """
+    同時對所有實例執行 task(name, host_url, api_key)
+
+    task 拋出例外 (包含 SystemExit) 時記錄為該實例失敗，不影響其他實例
+
+    Returns:
+        依選擇順序的 [{'instance', 'host_url', 'result', 'error', 'output', 'elapsed'}, ...]
+    """
+    router = ThreadOutput(sys.stdout)
+
+    def run(name: str, env_vars: Dict[str, str]) -> Dict:
+        host_url = env_vars['N8N_HOST_URL'].rstrip('/')
+        outcome = {'instance': name, 'host_url': host_url, 'result': None, 'error': None}
+        buffer = io.StringIO()
+        router.capture(buffer)
+        started = time.perf_counter()
+        try:
+            outcome['result'] = task(name, host_url, env_vars['N8N_API_KEY'])
+        except SystemExit as e:
+            outcome['error'] = f"結束代碼 {e.code}"
+        except Exception as e:
+            outcome['error'] = str(e)
+        finally:
+            router.release()
+        outcome['elapsed'] = time.perf_counter() - started
+        outcome['output'] = buffer.getvalue()
+        return outcome
+
+    print(f"🌐 同時對 {len(instances)} 個實例執行: {', '.join(name for name, _ in instances)}")
+    sys.stdout = router
+    try:
+        with ThreadPoolExecutor(max_workers=len(instances)) as executor:
+            futures = [executor.submit(run, name, env_vars) for name, env_vars in instances]
+            outcomes = [future.result() for future in futures]
+    finally:
+        sys.stdout = router.stream
+    return outcomes
+
+
+def print_instance_output(outcomes: List[Dict]) -> None:
+    """依實例順序輸出收集到的內容，每行加上 [實例名稱]"""
+    width = max(len(outcome['instance']) for outcome in outcomes) + 2
+    for outcome in outcomes:
+        tag = f"[{outcome['instance']}]".ljust(width)
+        for line in outcome['output'].splitlines():
+            print(f"{tag} {line}" if line else tag.rstrip())
+        if outcome['error']:
+            print(f"{tag} ❌ 執行失敗: {outcome['error']}")
+
+
+def _failed(outcome: Dict) -> bool:
+    """例外、task 返回 False 或結果中的 ok 為 False 時視為失敗"""
+    result = outcome['result']
+    return (outcome['error'] is not None or result is False
+            or (isinstance(result, dict) and result.get('ok') is False))
+
+
+def print_instance_summary(outcomes: List[Dict], columns: List[Tuple[str, str]]) -> None:
+    """
+    各實例結果的合併表格
+
+    Args:
+        columns: [(欄位標題, result 字典中的鍵), ...]；result 不是字典或執行失敗時留空
+    """
+    print("\n" + "=" * 80)
+    print("🌐 多實例結果")
+    print("=" * 80)
+    header = f"{'實例':<12} {'狀態':<6} {'耗時':>8}  " + ' '.join(f"{title:>8}" for title, _ in columns)
+    print(header)
+    print("-" * 80)
+    for outcome in outcomes:
+        result = outcome['result'] if isinstance(outcome['result'], dict) else {}
+        failed = _failed(outcome)
+        values = ' '.join(f"{result.get(key, '') if not outcome['error'] else '':>8}" for _, key in columns)
+        print(f"{outcome['instance']:<12} {'❌' if failed else '✅':<6} {outcome['elapsed']:>7.1f}s  {values}")
+
+
+def any_failed(outcomes: List[Dict]) -> bool:
+    """任何實例執行失敗"""
+    return any(_failed(outcome) for outcome in outcomes)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+JSON 讀寫後端
+安裝 orjson (pip install orjson) 時以其解析與輸出 JSON，未安裝時使用標準庫 json。
+標準庫在 indent 輸出時會退回純 Python 編碼器，含大量 pinData 或長提示詞的工作流差異特別明顯。
+
+另提供串流讀取 read_fields：逐塊讀取頂層物件，只解析需要的欄位，
+其餘欄位 (例如 pinData) 只掃描括號與字串邊界後丟棄，不會建立物件。
+
+注意: workflow_hash 的正規化 JSON 固定使用標準庫，以確保不同環境算出相同的雜湊值。
+"""
+
+import os
+import re
+import json
+from itertools import accumulate
+from operator import sub
+from typing import Any, Dict, IO, Iterable, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+# 串流讀取每次讀入的字元數
+STREAM_CHUNK_SIZE = 1 << 16
+
+# load_file 指定 fields 時，超過此大小 (位元組) 的文件改用串流讀取
+STREAM_THRESHOLD = 8 * 1024 * 1024
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson 不接受 NaN/Infinity 等標準庫可解析的內容，交給標準庫判斷
+            pass
+    return json.loads(data)
+
+
+def load(f: IO) -> Any:
+    """從已開啟的文件 (文字或二進位模式) 讀取"""
+    return loads(f.read())
+
+
+def dumps_bytes(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """輸出 UTF-8 編碼的 JSON (非 ASCII 字元不轉義)"""
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, option=option)
+        except orjson.JSONEncodeError:
+            # 非字串鍵、超過 64 位元的整數等，交給標準庫處理
+            pass
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys,
+                      ensure_ascii=False).encode('utf-8')
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    return dumps_bytes(obj, indent=indent, sort_keys=sort_keys).decode('utf-8')
+
+
+def dump(obj: Any, f: IO, indent: bool = True, sort_keys: bool = False) -> None:
+    """寫入已開啟的文字模式文件 (預設與 json.dump(indent=2, ensure_ascii=False) 相同格式)"""
+    f.write(dumps(obj, indent=indent, sort_keys=sort_keys))
+
+
+_WHITESPACE = re.compile(r'\s*')
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_NON_BRACKET = re.compile(r'[^\[\]{}]+')
+# 括號對應的深度變化 +1/-1 (以 2/0 表示，累加後再減去字元數)
+_BRACKET_STEPS = bytes.maketrans(b'{[]}', b'\x02\x02\x00\x00')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[,\]}\s]')
+
+
+class _StreamReader:
+    """以固定大小的區塊讀取文字，只保留尚未處理 (或標記為需保留) 的部分"""
+
+    def __init__(self, f: IO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.anchor: Optional[int] = None  # 需保留的值的起點
+
+    def _more(self) -> bool:
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            return False
+        start = self.pos if self.anchor is None else self.anchor
+        self.buf = self.buf[start:] + chunk
+        self.pos -= start
+        if self.anchor is not None:
+            self.anchor = 0
+        return True
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.buf, min(self.pos, len(self.buf)))
+
+    def peek(self) -> str:
+        """略過空白並返回下一個字元 (文件結尾時為空字串)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return ''
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self._error(f"Expecting '{char}'")
+        self.pos += 1
+
+    def _search(self, pattern: re.Pattern) -> Optional[re.Match]:
+        """從目前位置搜尋 pattern，必要時讀入更多內容；文件結尾仍找不到時返回 None"""
+        while True:
+            match = pattern.search(self.buf, self.pos)
+            if match is not None:
+                return match
+            self.pos = len(self.buf)
+            if not self._more():
+                return None
+
+    def skip_string(self) -> None:
+        self.pos += 1  # 開頭的引號
+        while True:
+            match = self._search(_STRING_SPECIAL)
+            if match is None:
+                raise self._error('Unterminated string')
+            if match.group() == '"':
+                self.pos = match.end()
+                return
+            # 反斜線: 連同被轉義的字元一起略過
+            self.pos = match.start()
+            while self.pos + 1 >= len(self.buf):
+                if not self._more():
+                    raise self._error('Unterminated string')
+            self.pos += 2
+
+    def _skip_lines(self, depth: int) -> Optional[int]:
+        """
+        快速略過緩衝區中完整的行 (有效 JSON 的字串內不會有未轉義的換行)
+
+        以正規表示式移除字串與括號以外的內容後計算深度變化；
+        容器會在這些行中結束 (或沒有完整的行) 時返回 None，由呼叫端逐個符號掃描
+        """
+        cut = self.buf.rfind('\n', self.pos) + 1
+        if cut <= self.pos:
+            return None
+        text = _STRING.sub('', self.buf[self.pos:cut])
+        if '"' in text:
+            return None
+        steps = _NON_BRACKET.sub('', text).encode('ascii').translate(_BRACKET_STEPS)
+        if steps and depth + min(map(sub, accumulate(steps), range(1, len(steps) + 1))) <= 0:
+            return None
+        self.pos = cut
+        return depth + sum(steps) - len(steps)
+
+    def skip_value(self) -> None:
+        """略過一個值 (只檢查字串與括號邊界，不驗證內容)"""
+        char = self.peek()
+        if char == '"':
+            self.skip_string()
+        elif char in ('{', '['):
+            depth = 0
+            bulk_from = 0
+            while True:
+                if depth > 0 and self.pos >= bulk_from:
+                    skipped = self._skip_lines(depth)
+                    if skipped is not None:
+                        depth = skipped
+                        continue
+                    bulk_from = self.buf.rfind('\n', self.pos) + 1
+                length = len(self.buf)
+                match = self._search(_STRUCTURE)
+                if len(self.buf) != length:
+                    bulk_from = 0  # 讀入了新內容
+                if match is None:
+                    raise self._error('Unterminated container')
+                if match.group() == '"':
+                    self.pos = match.start()
+                    self.skip_string()
+                    continue
+                self.pos = match.end()
+                depth += 1 if match.group() in '{[' else -1
+                if depth == 0:
+                    return
+        elif char:
+            match = self._search(_SCALAR_END)
+            self.pos = match.start() if match is not None else len(self.buf)
+        else:
+            raise self._error('Expecting value')
+
+    def read_value(self) -> Any:
+        self.peek()
+        self.anchor = self.pos
+        self.skip_value()
+        text = self.buf[self.anchor:self.pos]
+        self.anchor = None
+        return loads(text)
+
+
+def read_fields(path: str, fields: Iterable[str], chunk_size: int = STREAM_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    串流讀取 JSON 物件文件的部分頂層欄位
+
+    Args:
+        path: 文件路徑 (頂層必須是物件)
+        fields: 需要解析的欄位名稱，其餘欄位略過
+        chunk_size: 每次讀入的字元數
+
+    Returns:
+        只含 fields 中 (存在的) 欄位的字典
+    """
+    wanted = set(fields)
+    result: Dict[str, Any] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _StreamReader(f, chunk_size)
+        reader.expect('{')
+        if reader.peek() == '}':
+            return result
+        while True:
+            if reader.peek() != '"':
+                raise reader._error('Expecting property name enclosed in double quotes')
+            key = reader.read_value()
+            reader.expect(':')
+            if key in wanted:
+                result[key] = reader.read_value()
+            else:
+                reader.skip_value()
+            char = reader.peek()
+            if char == ',':
+                reader.pos += 1
+            elif char == '}':
+                return result
+            else:
+                raise reader._error("Expecting ',' delimiter")
+
+
+def load_file(path: str, fields: Optional[Iterable[str]] = None,
+              stream_threshold: int = STREAM_THRESHOLD) -> Any:
+    """
+    讀取 JSON 文件
+
+    指定 fields 且文件超過 stream_threshold 時只串流解析這些頂層欄位；
+    否則讀取完整內容 (可能包含 fields 以外的欄位)
+    """
+    if fields is not None and os.path.getsize(path) > stream_threshold:
+        return read_fields(path, fields)
+    with open(path, 'rb') as f:
+        return loads(f.read())
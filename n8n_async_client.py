@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+n8n API 非同步客戶端
+在單一事件迴圈中同時發送多個請求，並以 semaphore 限制同時進行的請求數量
+
+安裝 aiohttp 時使用原生非同步連線池；未安裝時退回共用的同步連線池客戶端，
+在執行緒池中執行請求 (並行上限相同)。
+
+Usage:
+    async with AsyncN8nClient(host_url, api_key, concurrency=20) as client:
+        workflows = await client.list_workflows()
+        details = await asyncio.gather(*(client.get_workflow(w['id']) for w in workflows))
+"""
+
+import time
+import asyncio
+import random
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from n8n_client import (DEFAULT_CONCURRENCY, DEFAULT_PAGE_SIZE, IDEMPOTENT_METHODS,
+                        RETRY_STATUS_CODES, SUPPORTED_METHODS, _env_number, get_client)
+import json_backend
+from api_metrics import registry as metrics_registry
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class N8nAsyncError(Exception):
+    """非同步 API 請求失敗"""
+
+    def __init__(self, message: str, status: Optional[int] = None, body: Any = None):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+class AsyncN8nClient:
+    def __init__(self, host_url: str, api_key: str, concurrency: int = DEFAULT_CONCURRENCY,
+                 timeout: Optional[float] = None, connect_timeout: Optional[float] = None,
+                 retries: Optional[int] = None, backoff_factor: float = 0.5):
+        self.host_url = host_url.rstrip('/')
+        self.base_url = f"{self.host_url}/api/v1"
+        self.api_key = api_key
+        self.concurrency = max(concurrency, 1)
+        self.timeout = timeout or _env_number('N8N_TIMEOUT', 30.0, float)
+        self.connect_timeout = connect_timeout or _env_number('N8N_CONNECT_TIMEOUT', 10.0, float)
+        self.retries = _env_number('N8N_RETRIES', 3) if retries is None else retries
+        self.backoff_factor = backoff_factor
+        self.native = aiohttp is not None
+
+        self._semaphore = None
+        self._session = None
+        self._sync_client = None
+        self.request_count = 0
+
+    async def __aenter__(self) -> 'AsyncN8nClient':
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """建立連線池 (需在事件迴圈中呼叫)"""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        if self.native:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={
+                    'X-N8N-API-KEY': self.api_key,
+                    'Content-Type': 'application/json',
+                    'Accept': 'application/json',
+                },
+                timeout=aiohttp.ClientTimeout(total=None, connect=self.connect_timeout,
+                                              sock_read=self.timeout),
+            )
+        else:
+            self._sync_client = get_client(self.host_url, self.api_key, pool_size=self.concurrency)
+
+    async def close(self) -> None:
+        """關閉連線池"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff_factor * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    async def _native_request(self, method: str, endpoint: str, data: Optional[Dict],
+                              params: Optional[Dict]) -> Dict:
+        url = f"{self.base_url}{endpoint}"
+        # 與同步客戶端相同，請求主體以 JSON 編碼後的位元組數計算
+        payload = json_backend.dumps_bytes(data) if data is not None else None
+        request_bytes = len(payload) if payload is not None else 0
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                async with self._session.request(method, url, data=payload, params=params) as response:
+                    if response.status in RETRY_STATUS_CODES and method in IDEMPOTENT_METHODS \
+                            and attempt < self.retries:
+                        delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+                    else:
+                        body = await response.read()
+                        metrics_registry.record(method, endpoint, response.status,
+                                                time.perf_counter() - started, request_bytes,
+                                                len(body), attempt)
+                        if response.status >= 400:
+                            raise N8nAsyncError(f"{response.status} {response.reason}: {url}",
+                                                response.status, body.decode('utf-8', 'replace'))
+                        if response.status == 204 or not body:
+                            return {}
+                        return json_backend.loads(body) or {}
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if method not in IDEMPOTENT_METHODS or attempt >= self.retries:
+                    metrics_registry.record(method, endpoint, 'error', time.perf_counter() - started,
+                                            request_bytes, 0, attempt)
+                    raise N8nAsyncError(f"連線失敗: {url}: {e}") from e
+                delay = self._retry_delay(attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                      params: Optional[Dict] = None) -> Dict:
+        """發送請求到 n8n API 並回傳 JSON，同時進行的請求數量受 semaphore 限制"""
+        method = method.upper()
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"不支援的 HTTP 方法: {method}")
+        if self._semaphore is None:
+            await self.open()
+
+        body = data if method in ('POST', 'PUT', 'PATCH') else None
+        self.request_count += 1
+        async with self._semaphore:
+            if self.native:
+                return await self._native_request(method, endpoint, body, params)
+
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(
+                    None, self._sync_client.request, method, endpoint, body, params)
+            except Exception as e:
+                response = getattr(e, 'response', None)
+                status = response.status_code if response is not None else None
+                raise N8nAsyncError(str(e), status) from e
+
+    def format_stats(self) -> str:
+        """格式化請求統計供 CLI 顯示"""
+        backend = 'aiohttp' if self.native else '執行緒池'
+        return f"API 請求 {self.request_count} 次 (非同步, {backend}, 並行上限 {self.concurrency})"
+
+    async def iter_pages(self, endpoint: str, params: Optional[Dict] = None,
+                         page_size: int = DEFAULT_PAGE_SIZE,
+                         limit: Optional[int] = None) -> AsyncIterator[List[Dict]]:
+        """依 nextCursor 逐頁讀取列表端點，處理目前頁面時已在背景請求下一頁"""
+        remaining = limit
+        if remaining is not None and remaining <= 0:
+            return
+
+        def fetch(cursor: Optional[str]):
+            page_params = dict(params or {})
+            page_params['limit'] = page_size if remaining is None else min(page_size, remaining)
+            if cursor:
+                page_params['cursor'] = cursor
+            return asyncio.ensure_future(self.request('GET', endpoint, params=page_params))
+
+        pending = fetch(None)
+        try:
+            while pending is not None:
+                result = await pending
+                pending = None
+
+                page = result.get('data', [])
+                if remaining is not None:
+                    page = page[:remaining]
+                    remaining -= len(page)
+                cursor = result.get('nextCursor')
+                if cursor and page and (remaining is None or remaining > 0):
+                    pending = fetch(cursor)
+
+                if page:
+                    yield page
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def iter_workflows(self, page_size: int = DEFAULT_PAGE_SIZE, **filters) -> AsyncIterator[Dict]:
+        """逐筆讀取所有工作流"""
+        async for page in self.iter_pages('/workflows', filters, page_size):
+            for workflow in page:
+                yield workflow
+
+    async def list_workflows(self, page_size: int = DEFAULT_PAGE_SIZE, **filters) -> List[Dict]:
+        """依 nextCursor 列出所有工作流"""
+        return [workflow async for workflow in self.iter_workflows(page_size, **filters)]
+
+    async def get_workflow(self, workflow_id: str) -> Dict:
+        """獲取單個工作流"""
+        return await self.request('GET', f'/workflows/{workflow_id}')
+
+    async def create_workflow(self, workflow_data: Dict) -> Dict:
+        """創建工作流"""
+        return await self.request('POST', '/workflows', workflow_data)
+
+    async def update_workflow(self, workflow_id: str, workflow_data: Dict) -> Dict:
+        """更新工作流"""
+        return await self.request('PUT', f'/workflows/{workflow_id}', workflow_data)
+
+    async def activate_workflow(self, workflow_id: str, active: bool = True) -> Dict:
+        """啟用或停用工作流"""
+        return await self.request('PATCH', f'/workflows/{workflow_id}', {'active': active})
+
+    async def execute_workflow(self, workflow_id: str) -> Dict:
+        """執行工作流"""
+        return await self.request('POST', f'/workflows/{workflow_id}/execute')
+
+    async def iter_executions(self, limit: Optional[int] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                              **filters) -> AsyncIterator[Dict]:
+        """逐筆讀取執行紀錄 (由新到舊)"""
+        async for page in self.iter_pages('/executions', filters, page_size, limit):
+            for execution in page:
+                yield execution
+
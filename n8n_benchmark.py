@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+工具效能評測
+以本地 API 替身伺服器 (n8n_fake_server.py) 與合成資料評測 list、batch-deploy、backup、
+validate 與安全掃描的吞吐量，以及統一入口 (n8n_tools.py) 的冷啟動時間。每個評測在獨立的
+子程序中執行，回報 ops/sec、API 請求數、傳輸位元組數與峰值 RSS，結果存為 JSON，
+可與先前的結果比較並標出效能退步
+
+Usage:
+    python3 n8n_benchmark.py [--only list,backup] [--scale 1.0] [--jobs 8] [--latency 0.005]
+                             [--repeat 3] [--output bench.json] [--compare baseline.json] [--threshold 0.15]
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from n8n_fake_server import DEFAULT_TEMPLATE, FakeN8nServer
+
+# 各評測的預設資料量 (--scale 會等比例放大)
+DEFAULT_SIZES = {
+    'list': 2000,
+    'batch-deploy': 200,
+    'backup': 500,
+    'validate': 2000,
+    'security-scan': 100,
+    'startup': 40,
+}
+
+# 啟動時間評測輪流執行的命令 ({workflow} 代換為合成的工作流文件)；都不需要連線
+STARTUP_COMMANDS = [
+    ['--help'],
+    ['backup', '--help'],
+    ['list', '--help'],
+    ['validate', '{workflow}'],
+]
+
+
+def _peak_rss_kb() -> Optional[int]:
+    """子程序的峰值 RSS (KB)，包含同一程序中的替身伺服器"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以位元組為單位，Linux 以 KB 為單位
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _write_workflow_files(directory: str, count: int) -> List[str]:
+    """以範本產生 count 個工作流 JSON 文件 (名稱與 generate_fleet 相同)"""
+    with open(DEFAULT_TEMPLATE, 'r', encoding='utf-8') as f:
+        template = json.load(f)
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for index in range(count):
+        workflow = dict(template, name=f"{template['name']} #{index + 1:05d}")
+        for key in ('id', 'versionId'):
+            workflow.pop(key, None)
+        path = os.path.join(directory, f"workflow_{index + 1:05d}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(workflow, f, indent=2, ensure_ascii=False)
+        files.append(path)
+    return files
+
+
+def bench_list(server: FakeN8nServer, size: int, workdir: str, jobs: int) -> Callable[[], int]:
+    server.generate_fleet(size)
+    from claude_n8n_cli import ClaudeN8nCLI
+    cli = ClaudeN8nCLI()
+
+    def run() -> int:
+        cli.list_workflows()
+        return size
+    return run
+
+
+def bench_batch_deploy(server: FakeN8nServer, size: int, workdir: str, jobs: int) -> Callable[[], int]:
+    # 一半的文件在遠端已有同名工作流 (更新)，另一半需要創建
+    server.generate_fleet(size // 2)
+    directory = os.path.join(workdir, 'workflows')
+    _write_workflow_files(directory, size)
+    from n8n_deploy_pipeline import N8nDeployPipeline
+    pipeline = N8nDeployPipeline(pool_size=jobs if jobs > 1 else None)
+
+    def run() -> int:
+        pipeline.batch_deploy(directory, jobs=jobs)
+        return size
+    return run
+
+
+def bench_backup(server: FakeN8nServer, size: int, workdir: str, jobs: int) -> Callable[[], int]:
+    server.generate_fleet(size)
+    from n8n_deploy_pipeline import N8nDeployPipeline
+    pipeline = N8nDeployPipeline(pool_size=jobs if jobs > 1 else None)
+
+    def run() -> int:
+        pipeline.backup_workflows(os.path.join(workdir, 'backup'), jobs=jobs)
+        return size
+    return run
+
+
+def bench_validate(server: FakeN8nServer, size: int, workdir: str, jobs: int) -> Callable[[], int]:
+    with open(DEFAULT_TEMPLATE, 'r', encoding='utf-8') as f:
+        workflow = json.load(f)
+    from n8n_deploy_pipeline import N8nDeployPipeline
+    pipeline = N8nDeployPipeline()
+
+    def run() -> int:
+        for _ in range(size):
+            pipeline.validate_workflow(workflow)
+        return size
+    return run
+
+
+def bench_security_scan(server: FakeN8nServer, size: int, workdir: str, jobs: int) -> Callable[[], int]:
+    directory = os.path.join(workdir, 'scan')
+    _write_workflow_files(directory, size)
+    from security_check import SecurityChecker
+    checker = SecurityChecker()
+
+    def run() -> int:
+        checker.scan_directory(directory)
+        return size
+    return run
+
+
+def bench_startup(server: FakeN8nServer, size: int, workdir: str, jobs: int) -> Callable[[], int]:
+    """每次啟動一個新的直譯器執行 n8n_tools.py (每次啟動算一次操作)，另記錄各命令的平均毫秒數"""
+    workflow_file = _write_workflow_files(os.path.join(workdir, 'startup'), 1)[0]
+    entry = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'n8n_tools.py')
+    commands = [[arg.replace('{workflow}', workflow_file) for arg in command] for command in STARTUP_COMMANDS]
+    timings: Dict[str, List[float]] = {' '.join(command): [] for command in STARTUP_COMMANDS}
+
+    def run() -> int:
+        for index in range(size):
+            command = commands[index % len(commands)]
+            started = time.perf_counter()
+            subprocess.run([sys.executable, entry] + command, cwd=workdir, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings[' '.join(STARTUP_COMMANDS[index % len(commands)])].append(time.perf_counter() - started)
+        run.details = {name: round(sum(values) / len(values) * 1000, 1)
+                       for name, values in timings.items() if values}
+        return size
+    return run
+
+
+BENCHMARKS = {
+    'list': bench_list,
+    'batch-deploy': bench_batch_deploy,
+    'backup': bench_backup,
+    'validate': bench_validate,
+    'security-scan': bench_security_scan,
+    'startup': bench_startup,
+}
+
+
+def _run_child(name: str, size: int, jobs: int, latency: float, seed: int) -> Dict:
+    """在子程序中準備資料並執行一次評測"""
+    with tempfile.TemporaryDirectory(prefix='n8n_bench_') as workdir, \
+            FakeN8nServer(latency=latency, seed=seed) as server:
+        os.environ.update(server.env())
+        os.environ['N8N_RETRIES'] = '3'
+        from api_metrics import registry
+
+        run = BENCHMARKS[name](server, size, workdir, jobs)
+        server.reset_stats()
+        registry.reset()
+
+        # 評測對象的輸出不計入結果
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            ops = run()
+            elapsed = time.perf_counter() - started
+
+        server_stats = server.stats()
+        result = {
+            'size': size,
+            'ops': ops,
+            'elapsed': round(elapsed, 4),
+            'ops_per_sec': round(ops / elapsed, 2) if elapsed else None,
+            'requests': server_stats['requests'],
+            'client_requests': registry.to_dict()['totals']['requests'],
+            'bytes': server_stats['bytes_in'] + server_stats['bytes_out'],
+            'peak_rss_kb': _peak_rss_kb(),
+        }
+        # 評測可附上各項目的細節 (例如各命令的啟動毫秒數)
+        if getattr(run, 'details', None):
+            result['details'] = run.details
+        return result
+
+
+def run_benchmark(name: str, size: int, jobs: int, latency: float, repeat: int, seed: int) -> Dict:
+    """執行 repeat 次 (每次一個新的子程序)，以最快的一次為結果"""
+    runs = []
+    context = multiprocessing.get_context('spawn')
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            runs.append(executor.submit(_run_child, name, size, jobs, latency, seed).result())
+    best = dict(min(runs, key=lambda r: r['elapsed']))
+    best['runs'] = [r['elapsed'] for r in runs]
+    best['peak_rss_kb'] = max((r['peak_rss_kb'] or 0) for r in runs) or None
+    return best
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    比較兩次評測結果，返回退步項目說明
+
+    ops/sec 下降或峰值 RSS 增加超過 threshold (比例) 時視為退步；
+    每次操作的 API 請求數是確定值，只要增加就視為退步
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        if base.get('ops_per_sec') and result.get('ops_per_sec') is not None:
+            change = result['ops_per_sec'] / base['ops_per_sec'] - 1
+            if change < -threshold:
+                regressions.append(f"{name}: ops/sec {base['ops_per_sec']} -> {result['ops_per_sec']} "
+                                   f"({change * 100:+.1f}%)")
+        if base.get('ops') and result.get('ops'):
+            base_per_op = base['requests'] / base['ops']
+            per_op = result['requests'] / result['ops']
+            if per_op > base_per_op + 1e-9:
+                regressions.append(f"{name}: 每次操作的 API 請求 {base_per_op:.2f} -> {per_op:.2f}")
+        if base.get('peak_rss_kb') and result.get('peak_rss_kb'):
+            change = result['peak_rss_kb'] / base['peak_rss_kb'] - 1
+            if change > threshold:
+                regressions.append(f"{name}: 峰值 RSS {base['peak_rss_kb']} KB -> {result['peak_rss_kb']} KB "
+                                   f"({change * 100:+.1f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='n8n 工具效能評測 (使用本地 API 替身伺服器)')
+    parser.add_argument('--only', help=f"只執行指定評測，以逗號分隔 ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--scale', type=float, default=1.0, help='資料量倍數')
+    parser.add_argument('--jobs', type=int, default=8, help='batch-deploy/backup 的並行數')
+    parser.add_argument('--latency', type=float, default=0.005, help='替身伺服器每個請求的延遲 (秒)')
+    parser.add_argument('--repeat', type=int, default=3, help='每個評測重複次數 (取最快的一次)')
+    parser.add_argument('--seed', type=int, default=42, help='合成資料的隨機種子')
+    parser.add_argument('--output', help='將結果寫入 JSON 文件')
+    parser.add_argument('--compare', help='與先前的結果 JSON 比較')
+    parser.add_argument('--threshold', type=float, default=0.15, help='視為退步的變化比例')
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"❌ 未知的評測: {', '.join(unknown)}")
+        sys.exit(1)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'scale': args.scale, 'jobs': args.jobs, 'latency': args.latency,
+                   'repeat': args.repeat, 'seed': args.seed},
+        'results': {},
+    }
+
+    print(f"⏱️  效能評測 (延遲 {args.latency * 1000:.1f}ms, 並行 {args.jobs}, 重複 {args.repeat} 次)")
+    print("-" * 100)
+    print(f"{'評測':<15} {'數量':<8} {'耗時':<10} {'ops/sec':<12} {'API 請求':<10} {'傳輸':<12} {'峰值 RSS':<12}")
+    print("-" * 100)
+    for name in names:
+        size = max(int(DEFAULT_SIZES[name] * args.scale), 1)
+        result = run_benchmark(name, size, args.jobs, args.latency, args.repeat, args.seed)
+        report['results'][name] = result
+        rss = f"{result['peak_rss_kb'] / 1024:.1f} MB" if result['peak_rss_kb'] else 'N/A'
+        print(f"{name:<15} {size:<8} {result['elapsed']:<10.3f} {result['ops_per_sec']:<12} "
+              f"{result['requests']:<10} {result['bytes'] / 1024 / 1024:<8.1f} MB  {rss:<12}")
+        for detail, value in result.get('details', {}).items():
+            print(f"    {detail:<40} {value} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 結果已寫入: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n⚠️  與 {args.compare} 相比發現 {len(regressions)} 項退步:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            sys.exit(1)
+        print(f"\n✅ 與 {args.compare} 相比沒有退步 (門檻 {args.threshold * 100:.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+n8n API 共用 HTTP 客戶端
+以連線池 Session 提供 keep-alive、逾時設定與冪等請求重試，供所有 CLI 工具共用
+requests 在第一次建立客戶端時才載入，只使用分頁輔助函式或常數的模組不需要付出匯入成本
+
+環境變數 (皆為選填):
+    N8N_POOL_SIZE       連線池大小 (預設 10)
+    N8N_TIMEOUT         讀取逾時秒數 (預設 30)
+    N8N_CONNECT_TIMEOUT 連線逾時秒數 (預設 10)
+    N8N_RETRIES         冪等請求的重試次數 (預設 3)
+"""
+
+import os
+import time
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import json_backend
+from api_metrics import registry as metrics_registry
+
+# 只有冪等方法會自動重試，POST/PATCH 失敗時直接回報，避免重複建立或修改
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+SUPPORTED_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+DEFAULT_PAGE_SIZE = 250
+# 非同步客戶端的預設同時請求上限 (放在這裡讓 CLI 不必為了參數預設值載入 asyncio/aiohttp)
+DEFAULT_CONCURRENCY = 10
+
+# 延遲載入的 requests 模組 (見 import_requests)
+requests = None
+
+
+def import_requests():
+    """載入並返回 requests (約佔 CLI 啟動時間的一半，不連線的命令不會呼叫)"""
+    global requests
+    if requests is None:
+        import requests as requests_module
+        requests = requests_module
+    return requests
+
+
+def _env_number(name: str, default, cast=int):
+    """讀取數值型環境變數，格式錯誤時使用預設值"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        return default
+
+
+class N8nClient:
+    def __init__(self, host_url: str, api_key: str, pool_size: Optional[int] = None,
+                 timeout: Optional[float] = None, connect_timeout: Optional[float] = None,
+                 retries: Optional[int] = None, backoff_factor: float = 0.5):
+        self.host_url = host_url.rstrip('/')
+        self.base_url = f"{self.host_url}/api/v1"
+        self.pool_size = pool_size or _env_number('N8N_POOL_SIZE', 10)
+        self.timeout = (
+            connect_timeout or _env_number('N8N_CONNECT_TIMEOUT', 10.0, float),
+            timeout or _env_number('N8N_TIMEOUT', 30.0, float),
+        )
+        retries = _env_number('N8N_RETRIES', 3) if retries is None else retries
+
+        import_requests()
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                                   max_retries=retry, pool_block=True)
+
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self.session.headers.update({
+            'X-N8N-API-KEY': api_key,
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        })
+
+        self._lock = threading.Lock()
+        self._request_count = 0
+
+    def request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                params: Optional[Dict] = None) -> Dict:
+        """
+        發送請求到 n8n API 並回傳 JSON
+
+        失敗時拋出 requests.exceptions.RequestException，由呼叫端決定如何處理
+        """
+        method = method.upper()
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"不支援的 HTTP 方法: {method}")
+
+        url = f"{self.base_url}{endpoint}"
+        json_body = data if method in ('POST', 'PUT', 'PATCH') else None
+
+        with self._lock:
+            self._request_count += 1
+
+        started = time.perf_counter()
+        try:
+            # 以 json_backend 編碼 (session 已設定 Content-Type: application/json)
+            body = json_backend.dumps_bytes(json_body) if json_body is not None else None
+            response = self.session.request(method, url, data=body, params=params,
+                                            timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            # 連線失敗 (重試用盡) 時沒有回應，以 error 記錄
+            metrics_registry.record(method, endpoint, 'error', time.perf_counter() - started,
+                                    retries=self._retry_count(getattr(e, 'response', None)))
+            raise
+        metrics_registry.record(method, endpoint, response.status_code, time.perf_counter() - started,
+                                len(response.request.body or b''), len(response.content),
+                                self._retry_count(response))
+
+        response.raise_for_status()
+        if not response.content:
+            return {}
+        return json_backend.loads(response.content)
+
+    @staticmethod
+    def _retry_count(response: Optional['requests.Response']) -> int:
+        """urllib3 在回應中記錄的重試歷史"""
+        retries = getattr(getattr(response, 'raw', None), 'retries', None)
+        return len(retries.history) if retries is not None else 0
+
+    def connection_stats(self) -> Dict[str, Optional[int]]:
+        """
+        回報請求數、新建連線數與連線重用數
+
+        連線數由 urllib3 連線池的公開介面 (pools.keys()、pools[key]) 取得；
+        urllib3 版本不支援時 connections/reused 為 None
+        """
+        with self._lock:
+            request_count = self._request_count
+
+        try:
+            new_connections = 0
+            pool_requests = 0
+            pools = self.adapter.poolmanager.pools
+            for key in pools.keys():
+                try:
+                    pool = pools[key]
+                except KeyError:
+                    continue  # 列出後才被淘汰的連線池
+                new_connections += pool.num_connections
+                pool_requests += pool.num_requests
+        except Exception:
+            return {'requests': request_count, 'connections': None, 'reused': None}
+
+        return {
+            'requests': request_count,
+            'connections': new_connections,
+            'reused': max(pool_requests - new_connections, 0),
+        }
+
+    def format_stats(self) -> str:
+        """格式化連線統計供 CLI 顯示"""
+        stats = self.connection_stats()
+        if stats['connections'] is None:
+            return f"API 請求 {stats['requests']} 次 (無法取得連線統計)"
+        return (f"API 請求 {stats['requests']} 次, 新建連線 {stats['connections']} 條, "
+                f"重用連線 {stats['reused']} 次")
+
+    def close(self) -> None:
+        """關閉連線池"""
+        self.session.close()
+
+
+_clients: Dict[Tuple[str, str], N8nClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(host_url: str, api_key: str, **kwargs) -> N8nClient:
+    """取得共用客戶端，同一主機與 API Key 在同一個程序中只建立一個連線池"""
+    key = (host_url.rstrip('/'), api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = N8nClient(host_url, api_key, **kwargs)
+            _clients[key] = client
+        return client
+
+
+def iter_pages(request: Callable[..., Dict], endpoint: str, params: Optional[Dict] = None,
+               page_size: int = DEFAULT_PAGE_SIZE, limit: Optional[int] = None,
+               prefetch: bool = True) -> Iterator[List[Dict]]:
+    """
+    依 nextCursor 逐頁讀取列表端點 (/workflows、/executions)
+
+    Args:
+        request: 與 _make_request 相同簽名的請求函式 (method, endpoint, data, params)
+        endpoint: API 端點
+        params: 額外的查詢參數 (篩選條件)
+        page_size: 每頁筆數
+        limit: 最多讀取的筆數，None 表示讀到最後一頁
+        prefetch: 在呼叫端處理目前頁面時，於背景預先讀取下一頁
+
+    Yields:
+        每一頁的 data 列表
+    """
+    base_params = dict(params or {})
+    remaining = limit
+
+    def fetch(cursor: Optional[str]) -> Dict:
+        page_params = dict(base_params)
+        page_params['limit'] = page_size if remaining is None else min(page_size, remaining)
+        if cursor:
+            page_params['cursor'] = cursor
+        return request('GET', endpoint, None, page_params)
+
+    if remaining is not None and remaining <= 0:
+        return
+
+    import contextvars
+    from concurrent.futures import ThreadPoolExecutor
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    # 預先讀取的執行緒沿用呼叫端的 context (例如多實例執行時的輸出緩衝區)
+    context = contextvars.copy_context()
+    try:
+        pending = executor.submit(context.run, fetch, None) if executor else None
+        result = None if executor else fetch(None)
+        while True:
+            if pending is not None:
+                result = pending.result()
+                pending = None
+
+            page = result.get('data', [])
+            if remaining is not None:
+                page = page[:remaining]
+                remaining -= len(page)
+            cursor = result.get('nextCursor')
+            has_more = bool(cursor) and bool(page) and (remaining is None or remaining > 0)
+
+            # 先送出下一頁的請求，再把目前頁面交給呼叫端
+            if has_more and executor:
+                pending = executor.submit(context.run, fetch, cursor)
+
+            if page:
+                yield page
+
+            if not has_more:
+                return
+            if not executor:
+                result = fetch(cursor)
+    finally:
+        if executor:
+            executor.shutdown(wait=False)
+
+
+def iter_items(request: Callable[..., Dict], endpoint: str, params: Optional[Dict] = None,
+               page_size: int = DEFAULT_PAGE_SIZE, limit: Optional[int] = None,
+               prefetch: bool = True) -> Iterator[Dict]:
+    """逐筆讀取列表端點，記憶體中最多只保留兩頁資料"""
+    for page in iter_pages(request, endpoint, params, page_size, limit, prefetch):
+        yield from page
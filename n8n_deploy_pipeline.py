@@ -4,42 +4,84 @@ n8n 自動化部署管道
 支持從本地開發環境自動部署工作流到 n8n 實例
 
 Usage:
-    python3 n8n_deploy_pipeline.py deploy <JSON_FILE> [--activate] [--validate]
-    python3 n8n_deploy_pipeline.py batch-deploy <DIRECTORY> [--activate] [--validate]
-    python3 n8n_deploy_pipeline.py validate <JSON_FILE>
-    python3 n8n_deploy_pipeline.py backup [--output-dir DIRECTORY]
-    python3 n8n_deploy_pipeline.py sync <LOCAL_DIR> <REMOTE_BACKUP>
+    python3 n8n_deploy_pipeline.py deploy <JSON_FILE> [--activate] [--validate] [--slim [PASSES]]
+    python3 n8n_deploy_pipeline.py batch-deploy <DIRECTORY> [--activate] [--validate] [--jobs N] [--async] [--incremental] [--slim [PASSES]] [--instances NAMES]
+    python3 n8n_deploy_pipeline.py validate <JSON_FILE_OR_DIRECTORY> [--jobs N] [--json] [--show-warnings]
+    python3 n8n_deploy_pipeline.py lint <FILE_OR_DIRECTORY>... [--json]
+    python3 n8n_deploy_pipeline.py backup [--output-dir DIRECTORY] [--jobs N] [--incremental] [--store] [--slim [PASSES]] [--instances NAMES]
+    python3 n8n_deploy_pipeline.py backup-list [--output-dir DIRECTORY] [--workflow-id ID]
+    python3 n8n_deploy_pipeline.py restore <WORKFLOW_ID> [--output-dir DIRECTORY] [--at TIMESTAMP]
+    python3 n8n_deploy_pipeline.py sync <LOCAL_DIR> <REMOTE_BACKUP> [--jobs N] [--dry-run] [--include-remote-only] [--init-base]
 """
 
 import os
 import sys
 import json
-import requests
+import json_backend
 import argparse
+from n8n_client import DEFAULT_CONCURRENCY, get_client, import_requests, iter_items
+from api_metrics import dump_at_exit
+from workflow_index import WorkflowIndex
+from workflow_hash import content_hash, deploy_hash, version_key
+from backup_store import BackupStore, safe_filename
+from deploy_state import DeployState, DEFAULT_STATE_FILE
+from workflow_sync import SyncBase, SYNC_ACTIONS, assign_pull_files, build_sync_plan
+from workflow_deploy import DeploySteps, deploy_steps, run_deploy, run_deploy_async
+from workflow_lint import lint_files, lint_workflow, print_findings
+from workflow_validate import validate_file, validate_files, validate_workflow as validate_workflow_structure
+from workflow_slim import DEFAULT_SLIM_PASSES, format_slim_report, parse_slim_passes, slim_workflow
 import glob
-from typing import Dict, List, Optional, Any, Tuple
+import io
+import threading
+import contextvars
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple
 from datetime import datetime
 import shutil
 from pathlib import Path
 
-# 嘗試載入環境變數
-try:
-    from env_loader import load_env_file
-    load_env_file()
-except ImportError:
-    # 如果 env_loader 不存在，嘗試手動載入 .env
-    if os.path.exists('.env'):
-        with open('.env', 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
+if TYPE_CHECKING:
+    # asyncio 與非同步客戶端 (aiohttp) 只在 batch-deploy --async 時載入
+    import asyncio
+    from n8n_async_client import AsyncN8nClient
+
+# 並行部署時每個執行緒/協程各自的輸出緩衝區
+_output_buffer = contextvars.ContextVar('deploy_output', default=None)
+
+# 只讀取本地文件、不需要連線設定的命令
+LOCAL_COMMANDS = ('lint', 'validate', 'backup-list', 'restore')
+
+# 備份目錄中記錄各工作流最後備份版本的清單文件
+BACKUP_MANIFEST = 'manifest.json'
+
+_env_loaded = False
+
+def load_env() -> None:
+    """載入環境變數 (只在需要連線設定時呼叫一次，--help 與本地命令不讀取 .env)"""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from env_loader import load_env_file
+        load_env_file()
+    except ImportError:
+        # 如果 env_loader 不存在，嘗試手動載入 .env
+        if os.path.exists('.env'):
+            with open('.env', 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#') and '=' in line:
+                        key, value = line.split('=', 1)
+                        os.environ[key.strip()] = value.strip()
 
 class N8nDeployPipeline:
-    def __init__(self):
-        self.host_url = os.getenv('N8N_HOST_URL')
-        self.api_key = os.getenv('N8N_API_KEY')
+    def __init__(self, pool_size: Optional[int] = None, host_url: Optional[str] = None,
+                 api_key: Optional[str] = None):
+        """未指定 host_url/api_key 時使用 N8N_HOST_URL/N8N_API_KEY (多實例時由設定檔傳入)"""
+        if not host_url or not api_key:
+            load_env()
+        self.host_url = host_url or os.getenv('N8N_HOST_URL')
+        self.api_key = api_key or os.getenv('N8N_API_KEY')
 
         if not self.host_url or not self.api_key:
             print("錯誤: 請設定必要的環境變數")
@@ -49,12 +91,8 @@ class N8nDeployPipeline:
             print("   export N8N_API_KEY='your_actual_api_key_here'")
             sys.exit(1)
         
-        self.headers = {
-            'X-N8N-API-KEY': self.api_key,
-            'Content-Type': 'application/json'
-        }
-        
         self.host_url = self.host_url.rstrip('/')
+        self.client = get_client(self.host_url, self.api_key, pool_size=pool_size)
         
         # 部署統計
         self.deploy_stats = {
@@ -62,166 +100,297 @@ class N8nDeployPipeline:
             'updated': 0,
             'activated': 0,
             'errors': 0,
-            'skipped': 0
+            'skipped': 0,
+            'slimBefore': 0,
+            'slimAfter': 0
         }
+        
+        # 並行部署用的鎖
+        self._stats_lock = threading.Lock()
+        self._name_locks: Dict[str, threading.Lock] = {}
+        
+        # 工作流名稱/ID 索引 (每次執行只建立一次)
+        self.workflow_index = None
+        self.index_cache = None
+        self.index_ttl = 0
+        
+        # 內容與遠端相同時略過更新 (force_deploy=True 時一律寫入)
+        self.force_deploy = False
+        
+        # 增量批量部署的本地變更追蹤狀態 (None 表示不啟用)
+        self.deploy_state: Optional[DeployState] = None
+        
+        # 部署與備份前套用的瘦身項目 (空值表示不瘦身)，pinData 另存目錄
+        self.slim_passes: Tuple[str, ...] = ()
+        self.pin_data_dir: Optional[str] = None
     
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> Dict:
         """發送 HTTP 請求到 n8n API"""
-        url = f"{self.host_url}/api/v1{endpoint}"
-        
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=self.headers, params=params)
-            elif method.upper() == 'POST':
-                response = requests.post(url, headers=self.headers, json=data, params=params)
-            elif method.upper() == 'PUT':
-                response = requests.put(url, headers=self.headers, json=data, params=params)
-            elif method.upper() == 'PATCH':
-                response = requests.patch(url, headers=self.headers, json=data, params=params)
-            else:
-                raise ValueError(f"不支援的 HTTP 方法: {method}")
-            
-            response.raise_for_status()
-            return response.json()
+            return self.client.request(method, endpoint, data, params)
             
-        except requests.exceptions.RequestException as e:
+        except import_requests().exceptions.RequestException as e:
             raise Exception(f"API 請求失敗: {e}")
     
-    def validate_workflow(self, workflow_data: Dict) -> Tuple[bool, List[str]]:
-        """驗證工作流 JSON 結構"""
-        errors = []
-        
-        # 檢查必要欄位
-        required_fields = ['name', 'nodes', 'connections']
-        for field in required_fields:
-            if field not in workflow_data:
-                errors.append(f"缺少必要欄位: {field}")
-        
-        # 檢查節點結構
-        if 'nodes' in workflow_data:
-            nodes = workflow_data['nodes']
-            if not isinstance(nodes, list):
-                errors.append("nodes 必須是陣列")
-            else:
-                for i, node in enumerate(nodes):
-                    if not isinstance(node, dict):
-                        errors.append(f"節點 {i} 必須是物件")
-                        continue
-                    
-                    # 檢查節點必要欄位
-                    node_required = ['type', 'typeVersion', 'position', 'id', 'name']
-                    for field in node_required:
-                        if field not in node:
-                            errors.append(f"節點 {i} 缺少必要欄位: {field}")
-        
-        # 檢查連接結構
-        if 'connections' in workflow_data:
-            connections = workflow_data['connections']
-            if not isinstance(connections, dict):
-                errors.append("connections 必須是物件")
-        
-        # 檢查工作流名稱
-        if 'name' in workflow_data:
-            name = workflow_data['name']
-            if not isinstance(name, str) or len(name.strip()) == 0:
-                errors.append("工作流名稱不能為空")
-        
+    def _print(self, *args, **kwargs) -> None:
+        """輸出訊息；並行部署時寫入目前執行緒/協程的緩衝區，避免輸出交錯"""
+        buffer = _output_buffer.get()
+        if buffer is not None:
+            kwargs['file'] = buffer
+        print(*args, **kwargs)
+    
+    def _count(self, key: str, amount: int = 1) -> None:
+        """執行緒安全地更新部署統計"""
+        with self._stats_lock:
+            self.deploy_stats[key] += amount
+    
+    def _name_lock(self, workflow_name: str) -> threading.Lock:
+        """取得工作流名稱對應的鎖"""
+        with self._stats_lock:
+            return self._name_locks.setdefault(workflow_name, threading.Lock())
+    
+    def _deploy_buffered(self, json_file: str, activate: bool, validate: bool) -> Tuple[bool, str]:
+        """在工作執行緒中部署單個文件，並回傳結果與完整輸出"""
+        buffer = io.StringIO()
+        token = _output_buffer.set(buffer)
+        try:
+            success = self.deploy_single_workflow(json_file, activate, validate)
+        except Exception as e:
+            self._print(f"❌ 部署失敗: {e}")
+            self._count('errors')
+            success = False
+        finally:
+            _output_buffer.reset(token)
+        return success, buffer.getvalue()
+    
+    def get_workflow_index(self, refresh: bool = False) -> WorkflowIndex:
+        """取得工作流索引，首次使用時才列出遠端工作流"""
+        if self.workflow_index is None or refresh:
+            self.workflow_index = WorkflowIndex(self._make_request, self.host_url,
+                                                cache_file=self.index_cache, ttl=self.index_ttl)
+            # refresh 時略過本地快取，重新列出遠端工作流
+            self.workflow_index.load(force=refresh)
+            source = '本地快取' if self.workflow_index.from_cache else f'API ({self.workflow_index.pages_fetched} 頁)'
+            print(f"🗂️  已建立工作流索引: {len(self.workflow_index)} 個工作流 (來源: {source})")
+        return self.workflow_index
+    
+    def save_workflow_index(self) -> None:
+        """將索引寫回本地快取"""
+        if self.workflow_index is not None and self.index_cache:
+            try:
+                self.workflow_index.save_cache()
+            except OSError as e:
+                print(f"⚠️  無法寫入索引快取 {self.index_cache}: {e}")
+    
+    def save_deploy_state(self) -> None:
+        """寫入增量部署狀態文件"""
+        if self.deploy_state is not None:
+            try:
+                self.deploy_state.save()
+            except OSError as e:
+                print(f"⚠️  無法寫入部署狀態 {self.deploy_state.state_file}: {e}")
+    
+    def validate_workflow(self, workflow_data: Dict,
+                          warnings: Optional[List[str]] = None) -> Tuple[bool, List[str]]:
+        """驗證工作流 JSON 結構與連接 (warnings 不為 None 時附加可疑但不阻止部署的問題)"""
+        errors, graph_warnings = validate_workflow_structure(workflow_data)
+        if warnings is not None:
+            warnings.extend(graph_warnings)
         return len(errors) == 0, errors
     
-    def deploy_single_workflow(self, json_file: str, activate: bool = False, validate: bool = True) -> bool:
-        """部署單個工作流"""
-        print(f"\n📁 正在處理文件: {json_file}")
+    def _load_workflow_file(self, json_file: str, validate: bool = True) -> Optional[Dict]:
+        """讀取並驗證待部署的工作流文件，失敗時返回 None"""
+        self._print(f"\n📁 正在處理文件: {json_file}")
         
         # 讀取 JSON 文件
         try:
             with open(json_file, 'r', encoding='utf-8') as f:
-                workflow_data = json.load(f)
+                workflow_data = json_backend.load(f)
         except FileNotFoundError:
-            print(f"❌ 文件不存在: {json_file}")
-            self.deploy_stats['errors'] += 1
-            return False
+            self._print(f"❌ 文件不存在: {json_file}")
+            self._count('errors')
+            return None
         except json.JSONDecodeError as e:
-            print(f"❌ JSON 格式錯誤: {e}")
-            self.deploy_stats['errors'] += 1
-            return False
+            self._print(f"❌ JSON 格式錯誤: {e}")
+            self._count('errors')
+            return None
         
         workflow_name = workflow_data.get('name', '未命名工作流')
-        print(f"🏷️  工作流名稱: {workflow_name}")
+        self._print(f"🏷️  工作流名稱: {workflow_name}")
         
         # 驗證工作流
         if validate:
-            print("🔍 正在驗證工作流結構...")
+            self._print("🔍 正在驗證工作流結構...")
             is_valid, validation_errors = self.validate_workflow(workflow_data)
             if not is_valid:
-                print("❌ 工作流驗證失敗:")
+                self._print("❌ 工作流驗證失敗:")
                 for error in validation_errors:
-                    print(f"   - {error}")
-                self.deploy_stats['errors'] += 1
-                return False
-            print("✅ 工作流結構驗證通過")
+                    self._print(f"   - {error}")
+                self._count('errors')
+                return None
+            self._print("✅ 工作流結構驗證通過")
+        
+        # 瘦身後再與遠端比對，確保比較的是實際送出的內容
+        workflow_data, report = self._slim(workflow_data)
+        if report:
+            self._print(f"🪶 瘦身: {format_slim_report(report)}")
+        return workflow_data
+    
+    def _slim(self, workflow_data: Dict) -> Tuple[Dict, Optional[Dict]]:
+        """套用瘦身項目並累計節省的大小，返回 (工作流, 瘦身報告)；未啟用時報告為 None"""
+        if not self.slim_passes:
+            return workflow_data, None
+        workflow_data, report = slim_workflow(workflow_data, self.slim_passes, self.pin_data_dir)
+        self._count('slimBefore', report['before'])
+        self._count('slimAfter', report['after'])
+        return workflow_data, report
+    
+    def _skip_unchanged(self, json_file: str, activate: bool) -> bool:
+        """本地文件與遠端 versionId 自上次部署後皆未變更時略過 (只查本地狀態與索引)"""
+        if self.deploy_state is None or self.force_deploy:
+            return False
+        entry = self.deploy_state.unchanged_entry(json_file)
+        if not entry or not entry.get('versionId'):
+            return False
+        remote = self.workflow_index.get(entry['remoteId']) if self.workflow_index else None
+        if not remote or remote.get('versionId') != entry['versionId']:
+            return False
+        if activate and not remote.get('active', False):
+            return False
         
+        self._print(f"\n⏭️  {json_file}: 本地與遠端皆未變更，略過 (ID: {entry['remoteId']})")
+        self._count('skipped')
+        return True
+    
+    def _record_deploy_state(self, json_file: str, deployed_workflow: Dict) -> None:
+        """記錄部署後的文件狀態與遠端版本"""
+        if self.deploy_state is None or not deployed_workflow.get('id'):
+            return
+        version_id = deployed_workflow.get('versionId')
+        if not version_id and self.workflow_index:
+            version_id = (self.workflow_index.get(deployed_workflow['id']) or {}).get('versionId')
         try:
-            # 檢查是否已存在同名工作流
-            print("🔍 檢查現有工作流...")
-            existing_workflows = self._make_request('GET', '/workflows')
-            existing_workflow = None
-            
-            for wf in existing_workflows.get('data', []):
-                if wf.get('name') == workflow_name:
-                    existing_workflow = wf
-                    break
-            
-            if existing_workflow:
-                workflow_id = existing_workflow['id']
-                print(f"🔄 發現同名工作流，正在更新 (ID: {workflow_id})")
-                
-                # 更新現有工作流
-                result = self._make_request('PUT', f'/workflows/{workflow_id}', workflow_data)
-                self.deploy_stats['updated'] += 1
-                action = "更新"
-            else:
-                print("🆕 創建新工作流")
-                
-                # 創建新工作流
-                result = self._make_request('POST', '/workflows', workflow_data)
-                self.deploy_stats['created'] += 1
-                action = "創建"
-            
-            deployed_workflow = result.get('data', {})
-            workflow_id = deployed_workflow.get('id')
-            
-            print(f"✅ 工作流{action}成功! (ID: {workflow_id})")
-            
-            # 如果需要啟用工作流
-            if activate and not deployed_workflow.get('active', False):
-                print("🔄 正在啟用工作流...")
-                try:
-                    self._make_request('PATCH', f'/workflows/{workflow_id}', {"active": True})
-                    print("✅ 工作流已啟用")
-                    self.deploy_stats['activated'] += 1
-                except Exception as e:
-                    print(f"⚠️  啟用工作流失敗: {e}")
-            
-            current_status = '啟用' if deployed_workflow.get('active', False) or activate else '停用'
-            print(f"📊 當前狀態: {current_status}")
-            
+            self.deploy_state.record(json_file, deployed_workflow['id'], version_id)
+        except OSError as e:
+            self._print(f"⚠️  無法記錄部署狀態: {e}")
+    
+    def deploy_single_workflow(self, json_file: str, activate: bool = False, validate: bool = True) -> bool:
+        """部署單個工作流"""
+        if self._skip_unchanged(json_file, activate):
+            return True
+        workflow_data = self._load_workflow_file(json_file, validate)
+        if workflow_data is None:
+            return False
+        workflow_name = workflow_data.get('name', '未命名工作流')
+        
+        try:
+            self.get_workflow_index()
+            # 同名工作流需依序處理，避免並行部署時重複創建
+            with self._name_lock(workflow_name):
+                run_deploy(self._deploy_steps(json_file, workflow_data, activate), self._make_request)
             return True
             
         except Exception as e:
-            print(f"❌ 部署失敗: {e}")
-            self.deploy_stats['errors'] += 1
+            self._print(f"❌ 部署失敗: {e}")
+            self._count('errors')
             return False
     
-    def batch_deploy(self, directory: str, activate: bool = False, validate: bool = True) -> None:
-        """批量部署目錄中的所有工作流"""
+    def _deploy_steps(self, json_file: str, workflow_data: Dict, activate: bool) -> DeploySteps:
+        """共用的部署流程 (同步與非同步路徑相同)，完成後記錄增量部署狀態"""
+        deployed_workflow = yield from deploy_steps(workflow_data, self.workflow_index, activate=activate,
+                                                    force=self.force_deploy, emit=self._print,
+                                                    count=self._count)
+        self._record_deploy_state(json_file, deployed_workflow)
+        return deployed_workflow
+    
+    async def _deploy_single_async(self, client: 'AsyncN8nClient', json_file: str, activate: bool,
+                                   validate: bool, name_locks: Dict[str, 'asyncio.Lock']) -> Tuple[bool, str]:
+        """以非同步客戶端部署單個工作流，並回傳結果與完整輸出"""
+        import asyncio
+        buffer = io.StringIO()
+        token = _output_buffer.set(buffer)
+        try:
+            if self._skip_unchanged(json_file, activate):
+                return True, buffer.getvalue()
+            workflow_data = self._load_workflow_file(json_file, validate)
+            if workflow_data is None:
+                return False, buffer.getvalue()
+            workflow_name = workflow_data.get('name', '未命名工作流')
+            
+            async with name_locks.setdefault(workflow_name, asyncio.Lock()):
+                await run_deploy_async(self._deploy_steps(json_file, workflow_data, activate), client.request)
+            return True, buffer.getvalue()
+        
+        except Exception as e:
+            self._print(f"❌ 部署失敗: {e}")
+            self._count('errors')
+            return False, buffer.getvalue()
+        finally:
+            _output_buffer.reset(token)
+    
+    async def _async_batch_deploy(self, json_files: List[str], activate: bool, validate: bool,
+                                  concurrency: int) -> Tuple[List[Tuple[bool, str]], str]:
+        import asyncio
+        from n8n_async_client import AsyncN8nClient
+        async with AsyncN8nClient(self.host_url, self.api_key, concurrency=concurrency) as client:
+            self.workflow_index = WorkflowIndex(self._make_request, self.host_url,
+                                                cache_file=self.index_cache, ttl=self.index_ttl)
+            await self.workflow_index.load_async(client.list_workflows)
+            source = '本地快取' if self.workflow_index.from_cache else 'API'
+            print(f"🗂️  已建立工作流索引: {len(self.workflow_index)} 個工作流 (來源: {source})")
+            
+            name_locks: Dict[str, 'asyncio.Lock'] = {}
+            tasks = [self._deploy_single_async(client, json_file, activate, validate, name_locks)
+                     for json_file in json_files]
+            results = await asyncio.gather(*tasks)
+            return results, client.format_stats()
+    
+    def _print_deploy_report(self, total: int, successful: int, failed_files: List[str],
+                             connection_stats: Optional[str] = None) -> None:
+        """顯示部署統計報告"""
+        print("\n" + "="*60)
+        print("📊 部署統計報告")
+        print("="*60)
+        print(f"總文件數: {total}")
+        print(f"成功部署: {successful}")
+        print(f"創建新工作流: {self.deploy_stats['created']}")
+        print(f"更新現有工作流: {self.deploy_stats['updated']}")
+        print(f"啟用工作流: {self.deploy_stats['activated']}")
+        print(f"錯誤數量: {self.deploy_stats['errors']}")
+        print(f"跳過數量: {self.deploy_stats['skipped']}")
+        if self.slim_passes:
+            print(f"瘦身節省: {self._format_slim_total()}")
+        print(f"連線統計: {connection_stats or self.client.format_stats()}")
+        
+        if self.deploy_stats['errors'] > 0:
+            print(f"\n⚠️  有 {self.deploy_stats['errors']} 個文件部署失敗，請檢查上述錯誤訊息")
+            for json_file in failed_files:
+                print(f"   - {json_file}")
+        else:
+            print(f"\n🎉 所有工作流部署完成!")
+    
+    def _format_slim_total(self) -> str:
+        before = self.deploy_stats['slimBefore']
+        saved = before - self.deploy_stats['slimAfter']
+        share = saved / before * 100 if before else 0.0
+        return f"{saved / 1024:.1f} KB / {before / 1024:.1f} KB ({share:.1f}%)"
+    
+    def batch_deploy(self, directory: str, activate: bool = False, validate: bool = True,
+                     jobs: int = 1, use_async: bool = False) -> bool:
+        """
+        批量部署目錄中的所有工作流，所有文件都成功時返回 True
+        
+        jobs > 1 時以執行緒池並行部署；use_async 時改在單一事件迴圈中以
+        非同步客戶端部署，jobs 為同時進行的請求上限
+        """
         print(f"📂 正在掃描目錄: {directory}")
         
-        # 尋找所有 JSON 文件
-        json_files = glob.glob(os.path.join(directory, "*.json"))
+        # 尋找所有 JSON 文件 (排序以確保輸出與報告順序固定)
+        json_files = sorted(glob.glob(os.path.join(directory, "*.json")))
         
         if not json_files:
             print("❌ 目錄中沒有找到 JSON 文件")
-            return
+            return False
         
         print(f"📋 找到 {len(json_files)} 個 JSON 文件")
         
@@ -229,82 +398,481 @@ class N8nDeployPipeline:
         self.deploy_stats = {key: 0 for key in self.deploy_stats}
         
         successful_deployments = 0
+        failed_files = []
         
-        for json_file in json_files:
-            if self.deploy_single_workflow(json_file, activate, validate):
-                successful_deployments += 1
+        if use_async:
+            import asyncio
+            concurrency = jobs if jobs > 1 else DEFAULT_CONCURRENCY
+            print(f"⚡ 非同步部署: 最多 {concurrency} 個同時請求")
+            try:
+                results, connection_stats = asyncio.run(
+                    self._async_batch_deploy(json_files, activate, validate, concurrency))
+            except Exception as e:
+                print(f"❌ 無法建立工作流索引: {e}")
+                return False
+            for json_file, (success, output) in zip(json_files, results):
+                print(output, end='')
+                if success:
+                    successful_deployments += 1
+                else:
+                    failed_files.append(json_file)
+            self.save_workflow_index()
+            self.save_deploy_state()
+            self._print_deploy_report(len(json_files), successful_deployments, failed_files,
+                                      connection_stats)
+            return not failed_files
         
-        # 顯示部署統計
-        print("\n" + "="*60)
-        print("📊 部署統計報告")
-        print("="*60)
-        print(f"總文件數: {len(json_files)}")
-        print(f"成功部署: {successful_deployments}")
-        print(f"創建新工作流: {self.deploy_stats['created']}")
-        print(f"更新現有工作流: {self.deploy_stats['updated']}")
-        print(f"啟用工作流: {self.deploy_stats['activated']}")
-        print(f"錯誤數量: {self.deploy_stats['errors']}")
-        print(f"跳過數量: {self.deploy_stats['skipped']}")
+        # 整批部署只列出一次遠端工作流
+        try:
+            self.get_workflow_index(refresh=True)
+        except Exception as e:
+            print(f"❌ 無法建立工作流索引: {e}")
+            return False
         
-        if self.deploy_stats['errors'] > 0:
-            print(f"\n⚠️  有 {self.deploy_stats['errors']} 個文件部署失敗，請檢查上述錯誤訊息")
+        if jobs > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            print(f"⚡ 並行部署: {jobs} 個工作執行緒")
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                futures = [executor.submit(self._deploy_buffered, json_file, activate, validate)
+                           for json_file in json_files]
+                # 依文件順序輸出各自的完整紀錄
+                for json_file, future in zip(json_files, futures):
+                    success, output = future.result()
+                    print(output, end='')
+                    if success:
+                        successful_deployments += 1
+                    else:
+                        failed_files.append(json_file)
         else:
-            print(f"\n🎉 所有工作流部署完成!")
+            for json_file in json_files:
+                if self.deploy_single_workflow(json_file, activate, validate):
+                    successful_deployments += 1
+                else:
+                    failed_files.append(json_file)
+        
+        self.save_workflow_index()
+        self.save_deploy_state()
+        self._print_deploy_report(len(json_files), successful_deployments, failed_files)
+        return not failed_files
     
-    def backup_workflows(self, output_dir: str = "n8n_backup") -> None:
-        """備份所有工作流到本地目錄"""
+    def _load_backup_manifest(self, output_dir: str) -> Dict[str, Dict]:
+        """讀取備份清單 (工作流 ID -> versionId/雜湊/文件)"""
+        manifest_path = os.path.join(output_dir, BACKUP_MANIFEST)
+        if not os.path.exists(manifest_path):
+            return {}
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json_backend.load(f).get('workflows', {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️  無法讀取備份清單，將執行完整備份: {e}")
+            return {}
+    
+    def _save_backup_manifest(self, output_dir: str, manifest: Dict[str, Dict]) -> None:
+        """寫入備份清單"""
+        manifest_path = os.path.join(output_dir, BACKUP_MANIFEST)
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json_backend.dump({'host_url': self.host_url, 'workflows': manifest}, f, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+    
+    def _backup_single_workflow(self, workflow_id: str, workflow_name: str, output_dir: str,
+                                timestamp: str, store: Optional[BackupStore] = None) -> Tuple[str, Dict]:
+        """獲取並保存單個工作流，返回 (保存位置說明, 清單項目)"""
+        if store is not None:
+            full_workflow = self._make_request('GET', f'/workflows/{workflow_id}')
+            workflow_data = full_workflow.get('data', {})
+            workflow_data.setdefault('id', workflow_id)
+            workflow_data, report = self._slim(workflow_data)
+            entry, added = store.put(workflow_data, timestamp)
+            label = f"objects/{entry['hash'][:12]}" + ("" if added else " (內容未變更)")
+            if report:
+                label += f" 🪶 {format_slim_report(report)}"
+            return label, entry
+        
+        # 清理文件名中的特殊字符
+        filename = f"{safe_filename(workflow_name)}_{workflow_id}_{timestamp}.json"
+        filepath = os.path.join(output_dir, filename)
+        
+        # 獲取完整的工作流數據
+        full_workflow = self._make_request('GET', f'/workflows/{workflow_id}')
+        workflow_data, report = self._slim(full_workflow.get('data', {}))
+        
+        # 保存到文件
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json_backend.dump(workflow_data, f)
+        
+        entry = {
+            'name': workflow_name,
+            'versionId': version_key(workflow_data),
+            'hash': content_hash(workflow_data),
+            'deployHash': deploy_hash(workflow_data),
+            'file': filename,
+            'backedUpAt': timestamp,
+        }
+        if report:
+            return f"{filename} 🪶 {format_slim_report(report)}", entry
+        return filename, entry
+    
+    def backup_workflows(self, output_dir: str = "n8n_backup", jobs: int = 1,
+                         incremental: bool = False, use_store: bool = False) -> Optional[Dict[str, int]]:
+        """
+        備份所有工作流到本地目錄
+        
+        jobs > 1 時並行獲取工作流；incremental 時依備份清單略過 versionId 未變更的工作流；
+        use_store 時寫入內容定址的壓縮倉庫 (相同內容只保存一次)
+        
+        Returns:
+            {'found', 'backedUp', 'unchanged', 'errors'}；備份過程失敗時返回 None
+        """
         print(f"💾 正在備份工作流到目錄: {output_dir}")
         
-        # 創建備份目錄
-        Path(output_dir).mkdir(exist_ok=True)
+        # 創建備份目錄 (多實例時為 <output_dir>/<實例>)
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        
+        # 倉庫模式以索引中的最新版本作為備份清單
+        store = BackupStore(output_dir) if use_store else None
+        manifest = store.latest() if store else self._load_backup_manifest(output_dir)
+        if incremental:
+            print(f"📒 增量備份: 清單中已有 {len(manifest)} 個工作流")
         
         try:
-            # 獲取所有工作流
-            result = self._make_request('GET', '/workflows')
-            workflows = result.get('data', [])
-            
-            if not workflows:
-                print("❌ 沒有找到任何工作流")
-                return
-            
-            print(f"📋 找到 {len(workflows)} 個工作流")
-            
             backup_count = 0
+            found_count = 0
+            unchanged_count = 0
+            error_count = 0
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
-            for workflow in workflows:
-                workflow_id = workflow.get('id')
-                workflow_name = workflow.get('name', 'unnamed_workflow')
-                
-                # 清理文件名中的特殊字符
-                safe_name = "".join(c for c in workflow_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                safe_name = safe_name.replace(' ', '_')
-                
-                filename = f"{safe_name}_{workflow_id}_{timestamp}.json"
-                filepath = os.path.join(output_dir, filename)
-                
-                try:
-                    # 獲取完整的工作流數據
-                    full_workflow = self._make_request('GET', f'/workflows/{workflow_id}')
-                    workflow_data = full_workflow.get('data', {})
-                    
-                    # 保存到文件
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        json.dump(workflow_data, f, indent=2, ensure_ascii=False)
-                    
+            # 限制同時在處理中的工作流數量，列表仍以串流方式讀取
+            from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+            max_in_flight = max(jobs, 1) * 4
+            in_flight = {}
+            
+            def drain(return_when) -> None:
+                nonlocal backup_count, error_count
+                done, _ = wait(in_flight, return_when=return_when)
+                for future in done:
+                    workflow_id, workflow_name = in_flight.pop(future)
+                    try:
+                        filename, entry = future.result()
+                    except Exception as e:
+                        print(f"❌ 備份失敗 {workflow_name}: {e}")
+                        error_count += 1
+                        continue
+                    manifest[workflow_id] = entry
                     print(f"✅ 已備份: {workflow_name} -> {filename}")
                     backup_count += 1
+            
+            with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+                # 逐頁串流讀取所有工作流 (依 nextCursor)，處理目前頁面時預先讀取下一頁
+                for workflow in iter_items(self._make_request, '/workflows'):
+                    found_count += 1
+                    workflow_id = workflow.get('id')
+                    workflow_name = workflow.get('name', 'unnamed_workflow')
+                    
+                    # versionId 未變更且備份文件仍存在時不需重新獲取
+                    entry = manifest.get(workflow_id)
+                    version = version_key(workflow)
+                    if incremental and entry and version and entry.get('versionId') == version:
+                        if store.has_blob(entry['hash']) if store else \
+                                os.path.exists(os.path.join(output_dir, entry.get('file', ''))):
+                            unchanged_count += 1
+                            continue
                     
-                except Exception as e:
-                    print(f"❌ 備份失敗 {workflow_name}: {e}")
+                    future = executor.submit(self._backup_single_workflow, workflow_id,
+                                             workflow_name, output_dir, timestamp, store)
+                    in_flight[future] = (workflow_id, workflow_name)
+                    if len(in_flight) >= max_in_flight:
+                        drain(FIRST_COMPLETED)
+                
+                if in_flight:
+                    drain(ALL_COMPLETED)
+            
+            if store is None:
+                self._save_backup_manifest(output_dir, manifest)
+            
+            result = {'found': found_count, 'backedUp': backup_count,
+                      'unchanged': unchanged_count, 'errors': error_count}
+            if found_count == 0:
+                print("❌ 沒有找到任何工作流")
+                return result
             
-            print(f"\n🎉 備份完成! 成功備份 {backup_count} 個工作流到 {output_dir}")
+            print(f"\n📋 共找到 {found_count} 個工作流")
+            if incremental:
+                print(f"⏭️  未變更略過: {unchanged_count} 個")
+            if error_count:
+                print(f"⚠️  備份失敗: {error_count} 個")
+            print(f"🎉 備份完成! 成功備份 {backup_count} 個工作流到 {output_dir}")
+            if self.slim_passes:
+                print(f"🪶 瘦身節省: {self._format_slim_total()}")
+            if store is not None:
+                store_stats = store.stats()
+                print(f"🗄️  倉庫: {store_stats['entries']} 個版本, {store_stats['blobs']} 個物件, "
+                      f"{store_stats['bytes'] / 1024:.1f} KB")
+            print(f"📡 連線統計: {self.client.format_stats()}")
+            return result
             
         except Exception as e:
             print(f"❌ 備份過程失敗: {e}")
+            return None
+
+    def _sync_one(self, item: Dict, local_dir: str, base: SyncBase, fetched: Dict[str, Dict],
+                  timestamp: str) -> str:
+        """執行同步計畫中的單個動作，並將結果記錄為新的基準，返回結果說明"""
+        action = item['action']
+        if action == 'pull':
+            workflow_data = fetched.get(item['id'])
+            if workflow_data is None:
+                workflow_data = self._make_request('GET', f"/workflows/{item['id']}").get('data', {})
+            # 遠端新增的工作流已由 assign_pull_files 分配不重複的文件名稱
+            json_file = item['file']
+            with open(json_file, 'w', encoding='utf-8') as f:
+                json_backend.dump(workflow_data, f)
+            base.record(workflow_data, timestamp)
+            return f"已寫回本地 {json_file}"
+
+        with open(item['file'], 'r', encoding='utf-8') as f:
+            workflow_data = json_backend.load(f)
+        if action == 'create':
+            result = self._make_request('POST', '/workflows', workflow_data)
+            self._count('created')
+        else:
+            result = self._make_request('PUT', f"/workflows/{item['id']}", workflow_data)
+            self._count('updated')
+
+        deployed_workflow = result.get('data', {})
+        if not deployed_workflow.get('versionId'):
+            # 回應沒有版本資訊時重新獲取，確保基準的 versionId 與遠端一致
+            workflow_id = deployed_workflow.get('id') or item['id']
+            deployed_workflow = self._make_request('GET', f'/workflows/{workflow_id}').get('data', {})
+        self.get_workflow_index().upsert(deployed_workflow)
+        base.record(deployed_workflow, timestamp)
+        return f"已推送到遠端 (ID: {deployed_workflow.get('id')})"
+
+    def sync_workflows(self, local_dir: str, backup_dir: str, jobs: int = 1,
+                       dry_run: bool = False, include_remote_only: bool = False,
+                       init_base: bool = False) -> bool:
+        """
+        本地目錄、備份基準與遠端實例的三方同步
+
+        以遠端索引的 versionId 與本地/基準的部署內容雜湊產生計畫，只有需要比對內容的
+        工作流才獲取完整內容；計畫中的 create/update/pull 以執行緒池並行執行。
+        基準目錄不存在時只有 init_base=True 才建立新的基準
+        """
+        print(f"🔁 三方同步: 本地 {local_dir} <-> 基準 {backup_dir} <-> {self.host_url}")
+
+        json_files = sorted(glob.glob(os.path.join(local_dir, "*.json")))
+        try:
+            base = SyncBase(backup_dir, create=init_base)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            print("💡 請確認路徑；第一次同步可加上 --init-base 建立新的基準")
+            return False
+        workflow_index = self.get_workflow_index(refresh=True)
+        print(f"📋 本地 {len(json_files)} 個文件, 基準 {len(base.entries)} 個工作流")
+
+        fetched: Dict[str, Dict] = {}
+
+        def fetch_remote(workflow_id: str) -> Dict:
+            fetched[workflow_id] = self._make_request('GET', f'/workflows/{workflow_id}').get('data', {})
+            return fetched[workflow_id]
+
+        plan = build_sync_plan(json_files, workflow_index, workflow_index, base, fetch_remote,
+                               include_remote_only)
+        assign_pull_files(plan, local_dir)
+        counts = {action: 0 for action in SYNC_ACTIONS}
+        for item in plan:
+            counts[item['action']] += 1
+
+        print(f"\n{'動作':<10} {'名稱':<30} {'ID':<20} {'原因'}")
+        print("-" * 80)
+        for item in plan:
+            if item['action'] != 'noop':
+                print(f"{item['action']:<10} {(item['name'] or 'N/A')[:29]:<30} "
+                      f"{item['id'] or '-':<20} {item['reason']}")
+        print(f"\n📊 計畫: " + ", ".join(f"{action} {counts[action]}" for action in SYNC_ACTIONS))
+        print(f"📡 內容比對獲取 {len(fetched)} 個工作流")
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if dry_run:
+            print("\n💡 --dry-run: 未執行任何變更")
+            return counts['conflict'] == 0
+
+        # 沒有基準但內容一致的工作流直接建立基準，下次同步即可只比對 versionId
+        for item in plan:
+            if item['action'] == 'noop' and item['id'] in fetched:
+                base.record(fetched[item['id']], timestamp)
+
+        actions = [item for item in plan if item['action'] in ('create', 'update', 'pull')]
+        self.deploy_stats = {key: 0 for key in self.deploy_stats}
+        error_count = 0
+        if actions:
+            from concurrent.futures import ThreadPoolExecutor
+            print(f"\n⚡ 執行 {len(actions)} 個動作 ({max(jobs, 1)} 個工作執行緒)")
+            with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+                futures = [executor.submit(self._sync_one, item, local_dir, base, fetched, timestamp)
+                           for item in actions]
+                for item, future in zip(actions, futures):
+                    try:
+                        print(f"✅ {item['action']} {item['name']}: {future.result()}")
+                    except Exception as e:
+                        print(f"❌ {item['action']} {item['name']} 失敗: {e}")
+                        error_count += 1
+
+        base.save(self.host_url)
+        self.save_workflow_index()
+
+        if counts['conflict']:
+            print(f"\n⚠️  有 {counts['conflict']} 個衝突需手動處理:")
+            for item in plan:
+                if item['action'] == 'conflict':
+                    print(f"   - {item['name']} ({item['file']}): {item['reason']}")
+        if error_count:
+            print(f"⚠️  有 {error_count} 個動作執行失敗")
+        if not counts['conflict'] and not error_count:
+            print("\n🎉 同步完成!")
+        print(f"📡 連線統計: {self.client.format_stats()}")
+        return counts['conflict'] == 0 and error_count == 0
+
+def list_backups(output_dir: str = "n8n_backup", workflow_id: Optional[str] = None) -> None:
+    """列出倉庫中的備份版本 (只讀取本地索引，不需要連線設定)"""
+    if not os.path.isdir(output_dir):
+        print(f"❌ 備份目錄不存在: {output_dir}")
+        return
+    store = BackupStore(output_dir)
+    if workflow_id:
+        entries = store.history(workflow_id)
+    else:
+        entries = sorted(store.latest().values(), key=lambda e: (e.get('name') or '', e['id']))
+
+    if not entries:
+        print("❌ 沒有找到任何備份")
+        return
+
+    print(f"{'ID':<20} {'名稱':<30} {'備份時間':<16} {'雜湊':<14} {'大小':<8}")
+    print("-" * 92)
+    for entry in entries:
+        name = (entry.get('name') or 'N/A')[:29]
+        print(f"{entry['id']:<20} {name:<30} {entry['backedUpAt']:<16} "
+              f"{entry['hash'][:12]:<14} {entry['size']:<8}")
+
+def restore_backup(workflow_id: str, output_dir: str = "n8n_backup",
+                   at: Optional[str] = None, output_file: Optional[str] = None) -> bool:
+    """從倉庫還原工作流 JSON 文件 (只讀取本地倉庫，不需要連線設定)"""
+    if not os.path.isdir(output_dir):
+        print(f"❌ 備份目錄不存在: {output_dir}")
+        return False
+    store = BackupStore(output_dir)
+    entry = store.find(workflow_id, at)
+    if entry is None:
+        print(f"❌ 找不到工作流 {workflow_id} 的備份")
+        return False
+
+    workflow_data = store.get_blob(entry['hash'])
+    output_file = output_file or f"{workflow_id}_{entry['backedUpAt']}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json_backend.dump(workflow_data, f)
+    print(f"✅ 已還原: {entry.get('name')} ({entry['backedUpAt']}) -> {output_file}")
+    return True
+
+def validate_command(path: str, jobs: Optional[int] = None, as_json: bool = False,
+                     show_warnings: bool = False) -> bool:
+    """驗證單一文件或整個目錄，返回是否全部通過 (目錄模式預設只列出錯誤)"""
+    if as_json:
+        results = validate_files([path], jobs=jobs)
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return not any(result['errors'] for result in results)
+    
+    if not os.path.isdir(path):
+        result = validate_file(path, keep_workflow=True)
+        if result['errors']:
+            print("❌ 工作流驗證失敗:")
+            for error in result['errors']:
+                print(f"   - {error}")
+            return False
+        print("✅ 工作流驗證通過")
+        for warning in result['warnings']:
+            print(f"⚠️  {warning}")
+        findings = lint_workflow(result['workflow'], source=path)
+        if findings:
+            print(f"\n💡 效能建議 ({len(findings)}):")
+            for finding in findings:
+                print(f"   - [{finding['rule']}] {finding['message']}")
+        return True
+    
+    results = validate_files([path], jobs=jobs)
+    failed = sum(1 for result in results if result['errors'])
+    warned = sum(1 for result in results if result['warnings'])
+    for result in results:
+        warnings = result['warnings'] if show_warnings else []
+        if not result['errors'] and not warnings:
+            continue
+        print(f"\n{'❌' if result['errors'] else '⚠️ '} {result['file']}")
+        for error in result['errors']:
+            print(f"   - {error}")
+        for warning in warnings:
+            print(f"   ⚠️  {warning}")
+    print(f"\n📊 驗證 {len(results)} 個文件: {len(results) - failed} 個通過, {failed} 個失敗")
+    if warned and not show_warnings:
+        print(f"💡 {warned} 個文件有警告 (加上 --show-warnings 顯示)")
+    return failed == 0
+
+def add_slim_arguments(subparser: argparse.ArgumentParser) -> None:
+    """部署與備份命令共用的瘦身參數"""
+    subparser.add_argument('--slim', nargs='?', const='default', metavar='PASSES',
+                           help='送出或保存前瘦身，以逗號分隔項目 (pin-data,sticky-notes,cached-metadata,'
+                                f'positions 或 all；不指定項目時為 {",".join(DEFAULT_SLIM_PASSES)})')
+    subparser.add_argument('--pin-data-dir', help='瘦身移除 pinData 前先另存到此目錄')
+
+def configure_pipeline(pipeline: N8nDeployPipeline, args: argparse.Namespace,
+                       slim_passes: Tuple[str, ...], instance: Optional[str] = None) -> None:
+    """依命令列參數設定部署管道；多實例時增量狀態、索引快取與 pinData 目錄各實例分開"""
+    from instance_fanout import instance_path
+    pipeline.force_deploy = getattr(args, 'force', False)
+    if args.command == 'batch-deploy' and args.incremental:
+        state_file = args.state or os.path.join(args.directory, DEFAULT_STATE_FILE)
+        if instance:
+            state_file = instance_path(state_file, instance)
+        pipeline.deploy_state = DeployState(state_file).load(pipeline.host_url)
+    if getattr(args, 'index_cache', None):
+        pipeline.index_cache = instance_path(args.index_cache, instance) if instance else args.index_cache
+        pipeline.index_ttl = args.index_ttl
+    pipeline.slim_passes = slim_passes
+    pin_data_dir = getattr(args, 'pin_data_dir', None)
+    pipeline.pin_data_dir = os.path.join(pin_data_dir, instance) if pin_data_dir and instance else pin_data_dir
+
+def run_on_instances_command(args: argparse.Namespace, jobs: int, slim_passes: Tuple[str, ...]) -> bool:
+    """batch-deploy 與 backup 同時對 --instances 選擇的實例執行，最後輸出各實例的合併統計"""
+    from env_loader import select_instances
+    from instance_fanout import any_failed, print_instance_output, print_instance_summary, run_on_instances
+    instances = select_instances(args.instances)
+    if instances is None:
+        sys.exit(2)
+    
+    def task(name: str, host_url: str, api_key: str) -> Dict:
+        pipeline = N8nDeployPipeline(pool_size=jobs if jobs > 1 else None, host_url=host_url, api_key=api_key)
+        configure_pipeline(pipeline, args, slim_passes, instance=name)
+        if args.command == 'batch-deploy':
+            success = pipeline.batch_deploy(args.directory, activate=args.activate, validate=args.validate,
+                                            jobs=jobs, use_async=args.use_async)
+            return dict(pipeline.deploy_stats, ok=success)
+        # 每個實例備份到各自的子目錄
+        result = pipeline.backup_workflows(os.path.join(args.output_dir, name), jobs=jobs,
+                                           incremental=args.incremental, use_store=args.store)
+        return dict(result, ok=result['errors'] == 0) if result is not None else False
+    
+    outcomes = run_on_instances(instances, task)
+    print_instance_output(outcomes)
+    if args.command == 'batch-deploy':
+        columns = [('創建', 'created'), ('更新', 'updated'), ('跳過', 'skipped'), ('錯誤', 'errors')]
+    else:
+        columns = [('工作流', 'found'), ('已備份', 'backedUp'), ('未變更', 'unchanged'), ('失敗', 'errors')]
+    print_instance_summary(outcomes, columns)
+    return not any_failed(outcomes)
 
 def main():
     parser = argparse.ArgumentParser(description='n8n 自動化部署管道')
+    parser.add_argument('--metrics-file', default=None,
+                        help='結束時將 API 請求指標寫入此文件 (.prom 為 Prometheus 格式，其餘為 JSON)')
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
     # deploy 命令
@@ -312,20 +880,76 @@ def main():
     deploy_parser.add_argument('json_file', help='工作流 JSON 文件路徑')
     deploy_parser.add_argument('--activate', action='store_true', help='部署後自動啟用')
     deploy_parser.add_argument('--validate', action='store_true', default=True, help='部署前驗證工作流')
+    deploy_parser.add_argument('--force', action='store_true', help='即使內容與遠端相同也重新寫入')
+    deploy_parser.add_argument('--index-cache', help='工作流索引快取文件路徑')
+    deploy_parser.add_argument('--index-ttl', type=float, default=300, help='索引快取有效秒數')
+    add_slim_arguments(deploy_parser)
     
     # batch-deploy 命令
     batch_parser = subparsers.add_parser('batch-deploy', help='批量部署目錄中的工作流')
     batch_parser.add_argument('directory', help='包含 JSON 文件的目錄路徑')
     batch_parser.add_argument('--activate', action='store_true', help='部署後自動啟用所有工作流')
     batch_parser.add_argument('--validate', action='store_true', default=True, help='部署前驗證所有工作流')
+    batch_parser.add_argument('--jobs', type=int, default=1, help='並行部署的工作執行緒數量')
+    batch_parser.add_argument('--async', dest='use_async', action='store_true',
+                              help='使用非同步客戶端部署 (--jobs 為同時請求上限)')
+    batch_parser.add_argument('--force', action='store_true', help='即使內容與遠端相同也重新寫入')
+    batch_parser.add_argument('--incremental', action='store_true',
+                              help='依本地狀態文件略過本地與遠端皆未變更的文件')
+    batch_parser.add_argument('--instances', help='以逗號分隔的實例設定檔 (all 為 N8N_INSTANCES 中的全部)，同時對各實例執行')
+    batch_parser.add_argument('--state', help=f'增量部署狀態文件路徑 (預設 <DIRECTORY>/{DEFAULT_STATE_FILE})')
+    batch_parser.add_argument('--index-cache', help='工作流索引快取文件路徑')
+    batch_parser.add_argument('--index-ttl', type=float, default=300, help='索引快取有效秒數')
+    add_slim_arguments(batch_parser)
     
     # validate 命令
     validate_parser = subparsers.add_parser('validate', help='驗證工作流 JSON 文件')
-    validate_parser.add_argument('json_file', help='要驗證的 JSON 文件路徑')
+    validate_parser.add_argument('json_file', help='要驗證的 JSON 文件或目錄路徑')
+    validate_parser.add_argument('--jobs', type=int, default=None,
+                                 help='驗證目錄時的程序數量 (預設為 CPU 核心數)')
+    validate_parser.add_argument('--json', action='store_true', help='以 JSON 格式輸出驗證結果')
+    validate_parser.add_argument('--show-warnings', action='store_true',
+                                 help='驗證目錄時也列出警告 (無法到達的節點、循環)')
+    
+    # lint 命令
+    lint_parser = subparsers.add_parser('lint', help='靜態分析工作流的效能問題')
+    lint_parser.add_argument('paths', nargs='+', help='工作流 JSON 文件或目錄')
+    lint_parser.add_argument('--json', action='store_true', help='以 JSON 格式輸出分析結果')
     
     # backup 命令
     backup_parser = subparsers.add_parser('backup', help='備份所有工作流')
     backup_parser.add_argument('--output-dir', default='n8n_backup', help='備份輸出目錄')
+    backup_parser.add_argument('--jobs', type=int, default=1, help='並行獲取工作流的執行緒數量')
+    backup_parser.add_argument('--incremental', action='store_true',
+                               help='略過 versionId 自上次備份後未變更的工作流')
+    backup_parser.add_argument('--store', action='store_true',
+                               help='使用內容定址的壓縮倉庫 (相同內容只保存一次)')
+    backup_parser.add_argument('--instances', help='以逗號分隔的實例設定檔 (all 為 N8N_INSTANCES 中的全部)，'
+                                                   '同時備份到 <output-dir>/<實例>')
+    add_slim_arguments(backup_parser)
+    
+    # backup-list 命令
+    backup_list_parser = subparsers.add_parser('backup-list', help='列出倉庫中的備份版本')
+    backup_list_parser.add_argument('--output-dir', default='n8n_backup', help='備份目錄')
+    backup_list_parser.add_argument('--workflow-id', help='列出特定工作流的所有版本')
+    
+    # restore 命令
+    restore_parser = subparsers.add_parser('restore', help='從備份倉庫還原工作流 JSON')
+    restore_parser.add_argument('workflow_id', help='工作流ID')
+    restore_parser.add_argument('--output-dir', default='n8n_backup', help='備份目錄')
+    restore_parser.add_argument('--at', help='還原此時間 (YYYYMMDD_HHMMSS) 之前最新的版本')
+    restore_parser.add_argument('--output', help='輸出文件路徑')
+    
+    # sync 命令
+    sync_parser = subparsers.add_parser('sync', help='本地目錄、備份基準與遠端實例三方同步')
+    sync_parser.add_argument('local_dir', help='本地工作流 JSON 目錄')
+    sync_parser.add_argument('remote_backup', help='作為同步基準的備份目錄 (倉庫或含 manifest.json 的備份)')
+    sync_parser.add_argument('--jobs', type=int, default=1, help='並行執行同步動作的執行緒數量')
+    sync_parser.add_argument('--dry-run', action='store_true', help='只顯示同步計畫，不執行變更')
+    sync_parser.add_argument('--include-remote-only', action='store_true',
+                             help='將本地沒有的遠端新工作流寫回本地目錄')
+    sync_parser.add_argument('--init-base', action='store_true',
+                             help='基準目錄不存在時建立新的基準 (預設視為錯誤)')
     
     args = parser.parse_args()
     
@@ -333,28 +957,73 @@ def main():
         parser.print_help()
         sys.exit(1)
     
+    # 只讀取本地文件的命令不需要連線設定 (不讀取 .env，也不載入 HTTP 客戶端)
+    if args.command not in LOCAL_COMMANDS:
+        load_env()
+    dump_at_exit(args.metrics_file or os.getenv('N8N_METRICS_FILE'))
+    
+    # lint 只分析本地文件，不需要連線設定
+    if args.command == 'lint':
+        findings = lint_files(args.paths)
+        if args.json:
+            print(json.dumps(findings, indent=2, ensure_ascii=False))
+        elif findings:
+            print_findings(findings)
+            print(f"\n⚠️  共 {len(findings)} 個效能問題")
+        else:
+            print("✅ 沒有發現效能問題")
+        sys.exit(1 if any(f['severity'] == 'error' for f in findings) else 0)
+    
+    # validate 只檢查本地文件，不需要連線設定
+    if args.command == 'validate':
+        sys.exit(0 if validate_command(args.json_file, jobs=args.jobs, as_json=args.json,
+                                         show_warnings=args.show_warnings) else 1)
+    
+    # backup-list 與 restore 只讀取本地備份倉庫
+    if args.command == 'backup-list':
+        list_backups(args.output_dir, workflow_id=args.workflow_id)
+        sys.exit(0)
+    if args.command == 'restore':
+        sys.exit(0 if restore_backup(args.workflow_id, args.output_dir, at=args.at,
+                                     output_file=args.output) else 1)
+    
+    try:
+        slim_passes = parse_slim_passes(getattr(args, 'slim', None))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    jobs = max(getattr(args, 'jobs', 1), 1)
+    
+    # 多實例: 每個實例一個執行緒同時執行，合併結果
+    if getattr(args, 'instances', None):
+        try:
+            success = run_on_instances_command(args, jobs, slim_passes)
+        except KeyboardInterrupt:
+            print("\n操作被用戶中斷")
+            sys.exit(1)
+        sys.exit(0 if success else 1)
+    
     # 初始化部署管道
-    pipeline = N8nDeployPipeline()
+    pipeline = N8nDeployPipeline(pool_size=jobs if jobs > 1 else None)
+    configure_pipeline(pipeline, args, slim_passes)
     
     # 執行對應的命令
     try:
         if args.command == 'deploy':
             pipeline.deploy_single_workflow(args.json_file, activate=args.activate, validate=args.validate)
+            pipeline.save_workflow_index()
         elif args.command == 'batch-deploy':
-            pipeline.batch_deploy(args.directory, activate=args.activate, validate=args.validate)
-        elif args.command == 'validate':
-            with open(args.json_file, 'r', encoding='utf-8') as f:
-                workflow_data = json.load(f)
-            is_valid, errors = pipeline.validate_workflow(workflow_data)
-            if is_valid:
-                print("✅ 工作流驗證通過")
-            else:
-                print("❌ 工作流驗證失敗:")
-                for error in errors:
-                    print(f"   - {error}")
-                sys.exit(1)
+            pipeline.batch_deploy(args.directory, activate=args.activate, validate=args.validate,
+                                  jobs=jobs, use_async=args.use_async)
         elif args.command == 'backup':
-            pipeline.backup_workflows(args.output_dir)
+            pipeline.backup_workflows(args.output_dir, jobs=jobs, incremental=args.incremental,
+                                      use_store=args.store)
+        elif args.command == 'sync':
+            if not pipeline.sync_workflows(args.local_dir, args.remote_backup, jobs=jobs,
+                                           dry_run=args.dry_run,
+                                           include_remote_only=args.include_remote_only,
+                                           init_base=args.init_base):
+                sys.exit(1)
     except KeyboardInterrupt:
         print("\n操作被用戶中斷")
         sys.exit(1)
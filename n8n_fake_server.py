@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+本地 n8n REST API 替身伺服器
+在同一個程序內 (或獨立執行) 模擬工具使用到的 /api/v1 端點，用於離線測試與效能評測：
+
+    GET/POST          /workflows                  (cursor 分頁, active/name 篩選)
+    GET/PUT/PATCH/DELETE /workflows/{id}
+    POST              /workflows/{id}/activate | deactivate | execute
+    GET               /executions                 (cursor 分頁, workflowId/status/includeData 篩選)
+    GET/DELETE        /executions/{id}
+
+可設定延遲、單頁上限、429/5xx 注入比例與合成工作流數量 (預設以 Line___AI______.json 為範本)。
+
+Usage:
+    with FakeN8nServer(latency=0.01, error_rate=0.01) as server:
+        server.generate_fleet(5000, executions_per_workflow=2)
+        os.environ.update(server.env())
+        ...
+
+    python3 n8n_fake_server.py --port 5678 --fleet 5000 --latency 0.02 --rate-limit-rate 0.01
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from api_metrics import endpoint_template
+
+API_PREFIX = '/api/v1'
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Line___AI______.json')
+DEFAULT_MAX_PAGE_SIZE = 250
+
+# 由伺服器管理、建立或更新時不採用請求內容的欄位
+SERVER_FIELDS = ('id', 'versionId', 'createdAt', 'updatedAt')
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeN8n/1.0'
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _dispatch(self, method: str) -> None:
+        fake: 'FakeN8nServer' = self.server.fake
+        length = int(self.headers.get('Content-Length') or 0)
+        raw_body = self.rfile.read(length) if length else b''
+        parsed = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+
+        status, payload, headers = fake.handle(method, parsed.path, query, raw_body,
+                                               self.headers.get('X-N8N-API-KEY'))
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+        fake._count_bytes(len(raw_body), len(body))
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_PATCH(self):
+        self._dispatch('PATCH')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+
+class FakeN8nServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, api_key: Optional[str] = None,
+                 latency: float = 0.0, jitter: float = 0.0,
+                 max_page_size: int = DEFAULT_MAX_PAGE_SIZE, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Args:
+            api_key: 要求的 X-N8N-API-KEY，None 表示不檢查
+            latency: 每個請求的固定延遲 (秒)
+            jitter: 額外的隨機延遲上限 (秒)
+            max_page_size: 列表端點單頁上限 (n8n 為 250)
+            error_rate: 隨機返回 500/502/503 的比例
+            rate_limit_rate: 隨機返回 429 (Retry-After: 0) 的比例
+            seed: 隨機種子，固定後合成資料與錯誤注入可重現
+        """
+        self.host = host
+        self.port = port
+        self.api_key = api_key
+        self.latency = latency
+        self.jitter = jitter
+        self.max_page_size = max_page_size
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.workflows: Dict[str, Dict] = {}
+        self.executions: Dict[int, Dict] = {}
+        self._next_workflow = 1
+        self._next_execution = 1
+
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.reset_stats()
+
+    # ---- 生命週期 ----
+
+    def start(self) -> 'FakeN8nServer':
+        """在背景執行緒啟動伺服器"""
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self.port = self._httpd.server_port
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> 'FakeN8nServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def env(self) -> Dict[str, str]:
+        """讓 CLI 工具連到此伺服器所需的環境變數"""
+        return {'N8N_HOST_URL': self.url, 'N8N_API_KEY': self.api_key or 'fake-n8n-api-key'}
+
+    # ---- 統計 ----
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.request_counts: Dict[str, int] = {}
+            self.injected_errors = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+
+    def _count_bytes(self, received: int, sent: int) -> None:
+        with self._lock:
+            self.bytes_in += received
+            self.bytes_out += sent
+
+    def stats(self) -> Dict:
+        """伺服器端看到的請求數 (依端點模板)、注入的錯誤數與傳輸位元組數"""
+        with self._lock:
+            return {
+                'requests': sum(self.request_counts.values()),
+                'by_endpoint': dict(sorted(self.request_counts.items())),
+                'injected_errors': self.injected_errors,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+            }
+
+    # ---- 資料 ----
+
+    def add_workflow(self, workflow_data: Dict, workflow_id: Optional[str] = None) -> Dict:
+        """新增工作流 (會指派 id 與 versionId)"""
+        now = _now()
+        with self._lock:
+            if workflow_id is None:
+                workflow_id = f"wf{self._next_workflow:06d}"
+                self._next_workflow += 1
+            workflow = {key: value for key, value in workflow_data.items() if key not in SERVER_FIELDS}
+            workflow.update(id=workflow_id, versionId=str(uuid.uuid4()), createdAt=now, updatedAt=now)
+            workflow.setdefault('active', False)
+            self.workflows[workflow_id] = workflow
+        return workflow
+
+    def add_execution(self, workflow_id: str, status: str = 'success',
+                      started_at: Optional[datetime] = None, duration: float = 1.0) -> Dict:
+        """新增執行紀錄"""
+        started_at = started_at or datetime.now(timezone.utc)
+        with self._lock:
+            execution_id = self._next_execution
+            self._next_execution += 1
+            execution = {
+                'id': str(execution_id),
+                'workflowId': workflow_id,
+                'status': status,
+                'mode': 'webhook',
+                'finished': status == 'success',
+                'startedAt': started_at.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+                'stoppedAt': (started_at + timedelta(seconds=duration))
+                .isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+            }
+            self.executions[execution_id] = execution
+        return execution
+
+    def generate_fleet(self, count: int, template_file: str = DEFAULT_TEMPLATE,
+                       executions_per_workflow: int = 0, active_ratio: float = 0.5) -> List[str]:
+        """
+        以範本產生大量合成工作流 (名稱加上序號)，返回工作流 ID
+
+        各工作流共用範本的節點與連線物件 (只在 PUT 時替換)，5000 個工作流也只佔很少記憶體
+        """
+        with open(template_file, 'r', encoding='utf-8') as f:
+            template = json.load(f)
+        base_name = template.get('name', 'workflow')
+        start = datetime.now(timezone.utc) - timedelta(days=1)
+
+        workflow_ids = []
+        for index in range(count):
+            workflow = self.add_workflow(dict(template, name=f"{base_name} #{index + 1:05d}",
+                                              active=self._random.random() < active_ratio))
+            workflow_ids.append(workflow['id'])
+            for _ in range(executions_per_workflow):
+                status = 'error' if self._random.random() < 0.05 else 'success'
+                started_at = start + timedelta(seconds=self._random.uniform(0, 86400))
+                self.add_execution(workflow['id'], status, started_at,
+                                   self._random.lognormvariate(0.5, 0.6))
+        return workflow_ids
+
+    def _run_data(self, execution: Dict) -> Dict:
+        """依工作流節點產生可重現的 runData (includeData 時使用)"""
+        workflow = self.workflows.get(execution['workflowId']) or {}
+        rng = random.Random(int(execution['id']))
+        started = datetime.fromisoformat(execution['startedAt'].replace('Z', '+00:00'))
+        clock = int(started.timestamp() * 1000)
+        run_data = {}
+        for node in workflow.get('nodes') or []:
+            if node.get('type') == 'n8n-nodes-base.stickyNote':
+                continue
+            execution_time = int(rng.lognormvariate(3, 1.2))
+            run_data[node['name']] = [{'startTime': clock, 'executionTime': execution_time,
+                                       'executionStatus': 'success', 'source': []}]
+            clock += execution_time
+        return {'resultData': {'runData': run_data}}
+
+    # ---- 請求處理 ----
+
+    def _page(self, items: List[Dict], query: Dict) -> Dict:
+        try:
+            limit = min(int(query.get('limit', 100)), self.max_page_size)
+            offset = int(query.get('cursor') or 0)
+        except ValueError:
+            limit, offset = min(100, self.max_page_size), 0
+        page = items[offset:offset + limit]
+        next_offset = offset + len(page)
+        return {'data': page, 'nextCursor': str(next_offset) if next_offset < len(items) else None}
+
+    def handle(self, method: str, path: str, query: Dict, raw_body: bytes,
+               api_key: Optional[str]) -> Tuple[int, Optional[Dict], Dict]:
+        """處理單個請求，返回 (狀態碼, JSON 內容, 額外標頭)"""
+        endpoint = path[len(API_PREFIX):] if path.startswith(API_PREFIX) else path
+        with self._lock:
+            key = f"{method} {endpoint_template(endpoint)}"
+            self.request_counts[key] = self.request_counts.get(key, 0) + 1
+            roll = self._random.random()
+            delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0.0)
+            error_status = None
+            if roll < self.rate_limit_rate:
+                error_status = 429
+            elif roll < self.rate_limit_rate + self.error_rate:
+                error_status = self._random.choice((500, 502, 503))
+            if error_status:
+                self.injected_errors += 1
+
+        if delay:
+            time.sleep(delay)
+        if not path.startswith(API_PREFIX):
+            return 404, {'message': 'not found'}, {}
+        if self.api_key is not None and api_key != self.api_key:
+            return 401, {'message': 'unauthorized'}, {}
+        if error_status == 429:
+            return 429, {'message': 'Too Many Requests'}, {'Retry-After': '0'}
+        if error_status:
+            return error_status, {'message': 'Injected server error'}, {}
+
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+        except ValueError:
+            return 400, {'message': 'invalid JSON body'}, {}
+
+        parts = endpoint.strip('/').split('/')
+        if parts[0] == 'workflows':
+            return self._handle_workflows(method, parts[1:], query, body)
+        if parts[0] == 'executions':
+            return self._handle_executions(method, parts[1:], query)
+        return 404, {'message': 'not found'}, {}
+
+    def _handle_workflows(self, method: str, parts: List[str], query: Dict,
+                          body: Dict) -> Tuple[int, Optional[Dict], Dict]:
+        if not parts:
+            if method == 'GET':
+                with self._lock:
+                    items = list(self.workflows.values())
+                if 'active' in query:
+                    active = query['active'] == 'true'
+                    items = [w for w in items if bool(w.get('active')) == active]
+                if 'name' in query:
+                    items = [w for w in items if w.get('name') == query['name']]
+                return 200, self._page(items, query), {}
+            if method == 'POST':
+                if not body.get('name'):
+                    return 400, {'message': 'request/body must have required property name'}, {}
+                return 200, {'data': self.add_workflow(body)}, {}
+            return 405, {'message': 'method not allowed'}, {}
+
+        workflow_id = parts[0]
+        with self._lock:
+            workflow = self.workflows.get(workflow_id)
+        if workflow is None:
+            return 404, {'message': f'Workflow {workflow_id} not found'}, {}
+
+        action = parts[1] if len(parts) > 1 else None
+        if action in ('activate', 'deactivate') and method == 'POST':
+            with self._lock:
+                workflow = dict(workflow, active=action == 'activate', updatedAt=_now())
+                self.workflows[workflow_id] = workflow
+            return 200, {'data': workflow}, {}
+        if action == 'execute' and method == 'POST':
+            execution = self.add_execution(workflow_id)
+            return 200, {'data': {'executionId': execution['id']}}, {}
+        if action is not None:
+            return 404, {'message': 'not found'}, {}
+
+        if method == 'GET':
+            return 200, {'data': workflow}, {}
+        if method == 'DELETE':
+            with self._lock:
+                self.workflows.pop(workflow_id, None)
+            return 200, {'data': workflow}, {}
+        if method in ('PUT', 'PATCH'):
+            updates = {key: value for key, value in body.items() if key not in SERVER_FIELDS}
+            with self._lock:
+                if method == 'PUT':
+                    workflow = dict(updates, id=workflow_id, active=workflow.get('active', False),
+                                    createdAt=workflow.get('createdAt'))
+                else:
+                    workflow = dict(workflow, **updates)
+                workflow.update(versionId=str(uuid.uuid4()), updatedAt=_now())
+                self.workflows[workflow_id] = workflow
+            return 200, {'data': workflow}, {}
+        return 405, {'message': 'method not allowed'}, {}
+
+    def _handle_executions(self, method: str, parts: List[str],
+                           query: Dict) -> Tuple[int, Optional[Dict], Dict]:
+        include_data = query.get('includeData') == 'true'
+        if not parts:
+            if method != 'GET':
+                return 405, {'message': 'method not allowed'}, {}
+            with self._lock:
+                # 與 n8n 相同，由新到舊 (ID 遞增寫入，反轉即可)
+                items = list(reversed(self.executions.values()))
+            if 'workflowId' in query:
+                items = [e for e in items if e['workflowId'] == query['workflowId']]
+            if 'status' in query:
+                items = [e for e in items if e['status'] == query['status']]
+            result = self._page(items, query)
+            if include_data:
+                result['data'] = [dict(e, data=self._run_data(e)) for e in result['data']]
+            return 200, result, {}
+
+        try:
+            execution_id = int(parts[0])
+        except ValueError:
+            return 404, {'message': 'not found'}, {}
+        with self._lock:
+            execution = self.executions.get(execution_id)
+            if execution is not None and method == 'DELETE':
+                del self.executions[execution_id]
+        if execution is None:
+            return 404, {'message': f'Execution {execution_id} not found'}, {}
+        if method not in ('GET', 'DELETE'):
+            return 405, {'message': 'method not allowed'}, {}
+        if include_data:
+            execution = dict(execution, data=self._run_data(execution))
+        return 200, {'data': execution}, {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地 n8n REST API 替身伺服器')
+    parser.add_argument('--host', default='127.0.0.1', help='監聽位址')
+    parser.add_argument('--port', type=int, default=5678, help='監聽埠號')
+    parser.add_argument('--api-key', help='要求的 API Key (預設不檢查)')
+    parser.add_argument('--fleet', type=int, default=0, help='產生的合成工作流數量')
+    parser.add_argument('--executions-per-workflow', type=int, default=0, help='每個合成工作流的執行紀錄數')
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE, help='合成工作流的範本 JSON')
+    parser.add_argument('--latency', type=float, default=0.0, help='每個請求的延遲 (秒)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='額外隨機延遲上限 (秒)')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_MAX_PAGE_SIZE, help='列表單頁上限')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='隨機返回 5xx 的比例')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='隨機返回 429 的比例')
+    parser.add_argument('--seed', type=int, help='隨機種子')
+    args = parser.parse_args()
+
+    server = FakeN8nServer(args.host, args.port, args.api_key, args.latency, args.jitter,
+                           args.page_size, args.error_rate, args.rate_limit_rate, args.seed)
+    if args.fleet:
+        server.generate_fleet(args.fleet, args.template, args.executions_per_workflow)
+    server.start()
+
+    print(f"🧪 n8n 替身伺服器已啟動: {server.url}{API_PREFIX}")
+    print(f"   工作流 {len(server.workflows)} 個, 執行紀錄 {len(server.executions)} 筆")
+    for key, value in server.env().items():
+        print(f"   export {key}='{value}'")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"\n📊 {json.dumps(server.stats(), ensure_ascii=False)}")
+        server.stop()
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,26 +13,35 @@ Usage:
 import os
 import sys
 import json
-import requests
 import argparse
+from n8n_client import get_client, import_requests, iter_items
+from api_metrics import dump_at_exit
 from typing import Dict, List, Optional, Any
 
-# 嘗試載入環境變數
-try:
-    from env_loader import load_env_file
-    load_env_file()
-except ImportError:
-    # 如果 env_loader 不存在，嘗試手動載入 .env
-    if os.path.exists('.env'):
-        with open('.env', 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
+_env_loaded = False
+
+def load_env() -> None:
+    """載入環境變數 (只在需要連線設定時呼叫一次，--help 與本地命令不讀取 .env)"""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from env_loader import load_env_file
+        load_env_file()
+    except ImportError:
+        # 如果 env_loader 不存在，嘗試手動載入 .env
+        if os.path.exists('.env'):
+            with open('.env', 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#') and '=' in line:
+                        key, value = line.split('=', 1)
+                        os.environ[key.strip()] = value.strip()
 
 class N8nIntegration:
     def __init__(self):
+        load_env()
         self.host_url = os.getenv('N8N_HOST_URL')
         self.api_key = os.getenv('N8N_API_KEY')
 
@@ -44,34 +53,18 @@ class N8nIntegration:
             print("   export N8N_API_KEY='your_actual_api_key_here'")
             sys.exit(1)
         
-        self.headers = {
-            'X-N8N-API-KEY': self.api_key,
-            'Content-Type': 'application/json'
-        }
-        
         # 移除 URL 末尾的斜線
         self.host_url = self.host_url.rstrip('/')
+
+        # 共用連線池客戶端
+        self.client = get_client(self.host_url, self.api_key)
     
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict:
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> Dict:
         """發送 HTTP 請求到 n8n API"""
-        url = f"{self.host_url}/api/v1{endpoint}"
-        
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=self.headers)
-            elif method.upper() == 'POST':
-                response = requests.post(url, headers=self.headers, json=data)
-            elif method.upper() == 'PUT':
-                response = requests.put(url, headers=self.headers, json=data)
-            elif method.upper() == 'DELETE':
-                response = requests.delete(url, headers=self.headers)
-            else:
-                raise ValueError(f"不支援的 HTTP 方法: {method}")
-            
-            response.raise_for_status()
-            return response.json()
+            return self.client.request(method, endpoint, data, params)
             
-        except requests.exceptions.RequestException as e:
+        except import_requests().exceptions.RequestException as e:
             print(f"API 請求失敗: {e}")
             if hasattr(e, 'response') and e.response is not None:
                 try:
@@ -84,25 +77,28 @@ class N8nIntegration:
     def list_workflows(self) -> None:
         """列出所有工作流"""
         print("正在獲取工作流列表...")
-        result = self._make_request('GET', '/workflows')
         
-        workflows = result.get('data', [])
-        if not workflows:
-            print("沒有找到任何工作流")
-            return
-        
-        print(f"\n找到 {len(workflows)} 個工作流:")
-        print("-" * 80)
-        print(f"{'ID':<20} {'名稱':<30} {'狀態':<10} {'節點數':<8}")
-        print("-" * 80)
-        
-        for workflow in workflows:
+        # 逐頁串流輸出，不在記憶體中保留完整列表
+        count = 0
+        for workflow in iter_items(self._make_request, '/workflows'):
+            if count == 0:
+                print("-" * 80)
+                print(f"{'ID':<20} {'名稱':<30} {'狀態':<10} {'節點數':<8}")
+                print("-" * 80)
+            count += 1
+            
             workflow_id = workflow.get('id', 'N/A')
             name = workflow.get('name', 'N/A')
             active = '啟用' if workflow.get('active', False) else '停用'
             node_count = len(workflow.get('nodes', []))
             
             print(f"{workflow_id:<20} {name:<30} {active:<10} {node_count:<8}")
+        
+        if count == 0:
+            print("沒有找到任何工作流")
+            return
+        
+        print(f"\n找到 {count} 個工作流")
     
     def get_workflow(self, workflow_id: str) -> None:
         """獲取特定工作流的詳細資訊"""
@@ -206,6 +202,8 @@ def main():
     parser.add_argument('command', choices=['list-workflows', 'get-workflow', 'execute', 'create-sample'],
                        help='要執行的命令')
     parser.add_argument('workflow_id', nargs='?', help='工作流ID (用於 get-workflow 和 execute 命令)')
+    parser.add_argument('--metrics-file', default=None,
+                       help='結束時將 API 請求指標寫入此文件 (.prom 為 Prometheus 格式，其餘為 JSON)')
     
     args = parser.parse_args()
     
@@ -214,6 +212,9 @@ def main():
         print(f"錯誤: {args.command} 命令需要提供 workflow_id 參數")
         sys.exit(1)
     
+    load_env()
+    dump_at_exit(args.metrics_file or os.getenv('N8N_METRICS_FILE'))
+    
     # 初始化 n8n 整合
     n8n = N8nIntegration()
     
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+n8n 工具統一入口
+依命令延遲載入對應的工具模組，並交由該模組原本的 main() 處理參數：
+
+- 只載入一個工具模組，--help 與未知命令不載入任何工具
+- HTTP 客戶端 (requests/aiohttp/asyncio) 只在需要連線的命令建立客戶端時才載入
+- .env 只在需要連線設定時讀取，validate、lint、backup-list、restore 等本地命令不讀取
+
+工具模組的全域選項 (例如 --metrics-file) 可寫在命令之前或之後，轉交時移到子命令之前
+
+Usage:
+    python3 n8n_tools.py [--metrics-file FILE] <COMMAND> [ARGS...]
+    python3 n8n_tools.py validate ./workflows --jobs 8
+    python3 n8n_tools.py backup --store --incremental
+    python3 n8n_tools.py list --active
+    python3 n8n_tools.py security-check --staged
+"""
+
+import sys
+from importlib import import_module
+from typing import Dict, List, Optional, Tuple
+
+# 命令 -> (模組, 轉交給模組的子命令 (None 表示模組沒有子命令), 說明)
+COMMANDS: Dict[str, Tuple[str, Optional[str], str]] = {
+    # n8n_deploy_pipeline.py
+    'deploy': ('n8n_deploy_pipeline', 'deploy', '部署單個工作流'),
+    'batch-deploy': ('n8n_deploy_pipeline', 'batch-deploy', '批量部署目錄中的工作流'),
+    'validate': ('n8n_deploy_pipeline', 'validate', '驗證工作流 JSON 文件 (本地)'),
+    'lint': ('n8n_deploy_pipeline', 'lint', '靜態分析工作流的效能問題 (本地)'),
+    'backup': ('n8n_deploy_pipeline', 'backup', '備份所有工作流'),
+    'backup-list': ('n8n_deploy_pipeline', 'backup-list', '列出倉庫中的備份版本'),
+    'restore': ('n8n_deploy_pipeline', 'restore', '從備份倉庫還原工作流 JSON'),
+    'sync': ('n8n_deploy_pipeline', 'sync', '本地目錄、備份基準與遠端實例三方同步'),
+    # claude_n8n_cli.py
+    'test': ('claude_n8n_cli', 'test', '測試 API 連線'),
+    'list': ('claude_n8n_cli', 'list', '列出工作流'),
+    'activate': ('claude_n8n_cli', 'activate', '啟用或停用工作流'),
+    'executions': ('claude_n8n_cli', 'executions', '執行記錄列表、統計與本地同步'),
+    'profile': ('claude_n8n_cli', 'profile', '節點耗時分析'),
+    'webhook': ('claude_n8n_cli', 'webhook', '產生 Webhook URL'),
+    'update': ('claude_n8n_cli', 'update', '更新工作流名稱'),
+    'deploy-files': ('claude_n8n_cli', 'deploy', '部署多個工作流文件 (可使用 --async)'),
+    # n8n_integration.py
+    'get-workflow': ('n8n_integration', 'get-workflow', '顯示工作流詳細資訊'),
+    'execute': ('n8n_integration', 'execute', '執行工作流'),
+    'create-sample': ('n8n_integration', 'create-sample', '創建範例工作流'),
+    # 沒有子命令的工具
+    'security-check': ('security_check', None, '敏感資訊掃描 (本地目錄、git 變更或 --remote 實例)'),
+    'benchmark': ('n8n_benchmark', None, '工具效能評測 (包含啟動時間)'),
+}
+
+# 工具模組主解析器的全域選項 -> 是否需要值 (argparse 只接受寫在子命令之前)
+GLOBAL_OPTIONS: Dict[str, bool] = {
+    '--metrics-file': True,
+}
+
+
+def print_usage(file=None) -> None:
+    """依模組分組列出命令 (不載入任何工具模組)"""
+    file = file or sys.stdout
+    print("用法: n8n_tools.py [--metrics-file FILE] <COMMAND> [ARGS...]", file=file)
+    print("      n8n_tools.py <COMMAND> --help   顯示命令的參數說明\n", file=file)
+    module = None
+    for command, (module_name, _, description) in COMMANDS.items():
+        if module_name != module:
+            module = module_name
+            print(f"{module}.py:", file=file)
+        print(f"  {command:<16} {description}", file=file)
+
+
+def split_global_options(argv: List[str]) -> Tuple[List[str], List[str]]:
+    """將全域選項 (可在命令前後任意位置，-- 之後不處理) 與其餘參數分開"""
+    global_args: List[str] = []
+    rest: List[str] = []
+    index = 0
+    while index < len(argv):
+        arg = argv[index]
+        if arg == '--':
+            rest.extend(argv[index:])
+            break
+        name = arg.split('=', 1)[0]
+        if name in GLOBAL_OPTIONS:
+            takes_value = GLOBAL_OPTIONS[name] and '=' not in arg
+            global_args.extend(argv[index:index + 2] if takes_value else [arg])
+            index += 2 if takes_value else 1
+            continue
+        rest.append(arg)
+        index += 1
+    return global_args, rest
+
+
+def resolve(argv: List[str]) -> Tuple[str, List[str]]:
+    """
+    將命令列參數轉換為 (模組名稱, 交給模組的 argv[1:])；全域選項放在子命令之前
+
+    Raises:
+        KeyError: 未知的命令
+    """
+    global_args, rest = split_global_options(argv)
+    if not rest:
+        raise KeyError('')
+    command, rest = rest[0], rest[1:]
+    module_name, subcommand, _ = COMMANDS[command]
+    return module_name, global_args + ([subcommand] if subcommand else []) + rest
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    command = next(iter(split_global_options(argv)[1]), None)
+    if command is None or command in ('-h', '--help'):
+        print_usage()
+        sys.exit(0 if command else 1)
+
+    try:
+        module_name, module_args = resolve(argv)
+    except KeyError:
+        import difflib
+        print(f"❌ 未知的命令: {command}", file=sys.stderr)
+        suggestions = difflib.get_close_matches(command, COMMANDS, n=3)
+        if suggestions:
+            print(f"💡 是否要執行: {', '.join(suggestions)}", file=sys.stderr)
+        print_usage(file=sys.stderr)
+        sys.exit(2)
+
+    # 工具模組以 argparse 解析 sys.argv，保留本入口的程式名稱讓用法說明一致
+    sys.argv = [sys.argv[0]] + module_args
+    import_module(module_name).main()
+
+
+if __name__ == '__main__':
+    main()
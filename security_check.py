@@ -2,13 +2,76 @@
 """
 安全檢查工具
 檢查代碼庫中是否有硬編碼的敏感資訊
+
+所有模式預先編譯，各自的預篩選版本在整塊文字上搜尋，只有命中的行才以命中的模式逐行比對；
+文件以固定大小的區塊讀取，多個文件以程序池並行掃描。
+--incremental 以內容雜湊快取各文件的結果；--staged/--since 只掃描 git diff 中新增的行。
+n8n 工作流匯出 (*.json) 以結構化方式掃描 (見 workflow_secrets)，位置以 JSON 路徑表示；
+--remote 改為掃描 N8N_HOST_URL 實例上已部署的工作流 (見 fleet_secret_scan)
+
+Usage:
+    python3 security_check.py [DIRECTORY] [--jobs N] [--incremental] [--cache FILE]
+    python3 security_check.py [DIRECTORY] --staged
+    python3 security_check.py [DIRECTORY] --since <REV>
+    python3 security_check.py [DIRECTORY] --plain-json
+    python3 security_check.py --remote [--jobs N] [--incremental]
 """
 
 import os
 import re
 import sys
-import glob
-from typing import List, Tuple, Dict
+import copy
+import json
+import codecs
+import hashlib
+import argparse
+import subprocess
+from typing import Iterator, List, Optional, Tuple, Dict
+
+import json_backend
+from deploy_state import file_digest
+from workflow_secrets import WorkflowSecretScanner, redact_findings
+
+# 文件數量少於此值時不啟動程序池 (啟動成本高於掃描本身)
+PARALLEL_MIN_FILES = 16
+
+# 每次讀入的字元數；區塊只在換行處切開，未完成的最後一行留到下一個區塊
+SCAN_CHUNK_SIZE = 1 << 20
+
+# 掃描結果快取的預設文件名 (位於掃描目錄中)；快取只保存遮蔽後的比對內容
+DEFAULT_CACHE_FILE = '.security_scan_cache.json'
+# 快取格式版本 (2: 比對內容已遮蔽)，舊格式的快取會被忽略並覆寫
+CACHE_FORMAT = 2
+
+# 遠端掃描的 versionId 快取預設文件名 (位於目前目錄) 與同時獲取工作流的請求上限
+DEFAULT_FLEET_CACHE_FILE = '.security_fleet_cache.json'
+DEFAULT_FETCH_JOBS = 8
+
+# git diff 區塊標頭中新內容的起始行號
+_HUNK_HEADER = re.compile(r'^@@ -\S+ \+(\d+)(?:,\d+)? @@')
+
+# 不區分大小寫比對時會對應到 ASCII 字母、但 lower() 不會轉成 ASCII 的字元
+_CASE_FOLD_CHARS = '\u0130\u0131\u017f\u212a'
+_CASE_FOLDS = str.maketrans(_CASE_FOLD_CHARS, 'iisk')
+
+# 模式中的跳脫序列、否定字元集開頭與大寫字母
+_PATTERN_TOKEN = re.compile(r'\\.|\[\^|[A-Z]', re.DOTALL)
+
+
+def _prefilter_pattern(pattern: str, lower: bool = False) -> str:
+    """
+    預篩選用的模式: 否定字元集不跨行 (避免 [^@]+ 之類的片段一路掃描到文件結尾)；
+    lower 時將跳脫序列以外的字母轉為小寫
+    """
+    def convert(match: re.Match) -> str:
+        token = match.group()
+        if token == '[^':
+            return '[^\\n'
+        if token.startswith('\\'):
+            return token
+        return token.lower() if lower else token
+    return _PATTERN_TOKEN.sub(convert, pattern)
+
 
 class SecurityChecker:
     def __init__(self):
@@ -59,6 +122,8 @@ class SecurityChecker:
         self.exclude_files = {
             '.env.example',
             'security_check.py',
+            DEFAULT_CACHE_FILE,
+            DEFAULT_FLEET_CACHE_FILE,
             '.gitignore',
             'SECURITY.md',
         }
@@ -70,50 +135,191 @@ class SecurityChecker:
             '.vscode',
             '.idea',
         }
+        
+        # 工作流 JSON 以結構化方式掃描 (False 時與其他文件一樣逐行掃描)
+        self.structured_json = True
+        
+        self._compile()
+    
+    def _compile(self) -> None:
+        """
+        預先編譯所有模式 (修改 sensitive_patterns 或 exclude_patterns 後需重新呼叫)
+        
+        每個模式另有一個預篩選版本在整個區塊上搜尋，記錄可能命中的行與模式；
+        模式之間可能重疊 (例如 LINE User ID 同時符合 32 位十六進位)，因此命中的行
+        仍以原始模式逐行比對，結果與逐行逐模式掃描相同
+        """
+        self._patterns = [(category, pattern, re.compile(pattern, re.IGNORECASE))
+                          for category, patterns in self.sensitive_patterns.items()
+                          for pattern in patterns]
+        self._ignorecase_prefilters = [re.compile(_prefilter_pattern(pattern), re.IGNORECASE)
+                                       for _, pattern, _ in self._patterns]
+        # 不區分大小寫的搜尋無法使用字面前綴加速，改在轉為小寫的文字上以小寫模式搜尋
+        # (模式含非 ASCII 字元時大小寫對應不單純，只使用上面的版本)
+        self._lowered_prefilters = None
+        if all(pattern.isascii() for _, pattern, _ in self._patterns):
+            try:
+                self._lowered_prefilters = [re.compile(_prefilter_pattern(pattern, lower=True))
+                                            for _, pattern, _ in self._patterns]
+            except re.error:
+                pass
+        self._excluded = re.compile('|'.join(f'(?:{pattern})' for pattern in self.exclude_patterns),
+                                    re.IGNORECASE)
+        self._workflow_scanner: Optional[WorkflowSecretScanner] = None
+    
+    def subset(self, categories) -> 'SecurityChecker':
+        """只含指定分類模式的檢查器 (排除規則相同)"""
+        checker = copy.copy(self)
+        checker.sensitive_patterns = {category: patterns for category, patterns in self.sensitive_patterns.items()
+                                      if category in categories}
+        checker._compile()
+        return checker
+    
+    def scan_workflow_data(self, data) -> Optional[List[Tuple[str, str, str, str]]]:
+        """
+        以結構化方式掃描已解析的 JSON；不是工作流匯出時返回 None
+        返回: [(category, rule, json_path, matched_content), ...]
+        """
+        if self._workflow_scanner is None:
+            self._workflow_scanner = WorkflowSecretScanner(self)
+        return self._workflow_scanner.scan_document(data)
     
     def is_excluded_content(self, content: str) -> bool:
         """檢查內容是否為排除的範例內容"""
-        for pattern in self.exclude_patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                return True
-        return False
+        return self._excluded.search(content) is not None
+    
+    def _candidate_lines(self, block: str) -> Dict[int, List[int]]:
+        """返回區塊中可能命中的行 (行首位置 -> 模式索引列表)"""
+        folded = block
+        if not block.isascii() and any(char in block for char in _CASE_FOLD_CHARS):
+            folded = block.translate(_CASE_FOLDS)
+        lowered = folded.lower()
+        if self._lowered_prefilters is not None and len(lowered) == len(block):
+            text, prefilters = lowered, self._lowered_prefilters
+        else:
+            text, prefilters = block, self._ignorecase_prefilters
+        
+        candidates: Dict[int, List[int]] = {}
+        for index, prefilter in enumerate(prefilters):
+            # 命中後從下一行繼續搜尋，同一行的其他符合由逐行比對處理
+            pos = 0
+            while True:
+                match = prefilter.search(text, pos)
+                if match is None:
+                    break
+                start = text.rfind('\n', 0, match.start()) + 1
+                candidates.setdefault(start, []).append(index)
+                end = text.find('\n', match.start())
+                if end < 0:
+                    break
+                pos = end + 1
+        return candidates
+    
+    def _read_blocks(self, f) -> Iterator[str]:
+        """逐區塊讀取，每個區塊都在換行處結束 (最後一個區塊除外)"""
+        pending = ''
+        while True:
+            chunk = f.read(SCAN_CHUNK_SIZE)
+            if not chunk:
+                if pending:
+                    yield pending
+                return
+            text = pending + chunk
+            cut = text.rfind('\n') + 1
+            if cut:
+                yield text[:cut]
+            pending = text[cut:]
+    
+    def scan_line(self, line: str, indices: Optional[List[int]] = None) -> Iterator[Tuple[str, str, str]]:
+        """
+        比對單行，返回 (category, pattern, matched_content)
+        
+        indices 指定只比對的模式 (依 _patterns 順序的索引)，預設比對全部
+        """
+        line = line.strip()
+        if not line or line.startswith('#'):
+            return
+        patterns = self._patterns if indices is None else [self._patterns[i] for i in indices]
+        for category, pattern, compiled in patterns:
+            for match in compiled.finditer(line):
+                matched_content = match.group()
+                
+                # 跳過排除的內容
+                if self._excluded.search(matched_content):
+                    continue
+                
+                yield category, pattern, matched_content
+    
+    def _scan_block(self, block: str) -> Iterator[Tuple[int, str, str, str]]:
+        """掃描一個區塊，返回 (區塊內的行索引, category, pattern, matched_content)"""
+        pos = 0
+        index = 0
+        for start, indices in sorted(self._candidate_lines(block).items()):
+            index += block.count('\n', pos, start)
+            pos = start
+            end = block.find('\n', start)
+            line = block[start:end] if end >= 0 else block[start:]
+            for category, pattern, matched_content in self.scan_line(line, indices):
+                yield index, category, pattern, matched_content
+    
+    def scan_lines(self, numbered_lines: List[Tuple[int, str]]) -> List[Tuple[str, str, int, str]]:
+        """掃描 (行號, 行內容) 列表 (例如 diff 中新增的行)"""
+        block = '\n'.join(line for _, line in numbered_lines)
+        return [(category, pattern, numbered_lines[index][0], matched_content)
+                for index, category, pattern, matched_content in self._scan_block(block)]
     
     def scan_file(self, file_path: str) -> List[Tuple[str, str, int, str]]:
         """
         掃描單個文件
         返回: [(category, pattern, line_number, matched_content), ...]
+        (工作流 JSON 的 line_number 為 JSON 路徑字串)
         """
+        if self.structured_json and file_path.lower().endswith('.json'):
+            try:
+                findings = self.scan_workflow_data(json_backend.load_file(file_path))
+            except (OSError, ValueError, RecursionError):
+                # 無法解析時逐行掃描 (讀取錯誤也在下方回報)
+                findings = None
+            if findings is not None:
+                return findings
+        
         findings = []
         
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-            
-            for line_num, line in enumerate(lines, 1):
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                
-                for category, patterns in self.sensitive_patterns.items():
-                    for pattern in patterns:
-                        matches = re.finditer(pattern, line, re.IGNORECASE)
-                        for match in matches:
-                            matched_content = match.group()
-                            
-                            # 跳過排除的內容
-                            if self.is_excluded_content(matched_content):
-                                continue
-                            
-                            findings.append((category, pattern, line_num, matched_content))
+                line_base = 1
+                for block in self._read_blocks(f):
+                    for index, category, pattern, matched_content in self._scan_block(block):
+                        findings.append((category, pattern, line_base + index, matched_content))
+                    line_base += block.count('\n')
         
         except Exception as e:
             print(f"⚠️  無法讀取文件 {file_path}: {e}")
         
         return findings
     
-    def scan_directory(self, directory: str = '.') -> Dict[str, List[Tuple]]:
-        """掃描整個目錄"""
-        all_findings = {}
+    def signature(self) -> str:
+        """目前模式的雜湊，模式變更後快取的結果即失效"""
+        patterns = json.dumps([CACHE_FORMAT, self.sensitive_patterns, self.exclude_patterns,
+                               self.structured_json], sort_keys=True)
+        return hashlib.sha256(patterns.encode('utf-8')).hexdigest()
+    
+    def is_excluded_path(self, relative_path: str) -> bool:
+        """路徑是否位於排除的目錄、屬於排除的文件或不是文本文件"""
+        parts = relative_path.replace(os.sep, '/').split('/')
+        return (parts[-1] in self.exclude_files
+                or any(part in self.exclude_dirs for part in parts[:-1])
+                or not self.is_text_file(relative_path))
+    
+    def scan_directory(self, directory: str = '.', jobs: Optional[int] = None,
+                       cache: Optional['ScanCache'] = None) -> Dict[str, List[Tuple]]:
+        """
+        掃描整個目錄
+        
+        jobs 為掃描程序數量 (預設為 CPU 核心數)，文件較少時在目前程序中依序掃描；
+        指定 cache 時內容未變更的文件直接使用快取的結果
+        """
+        candidates = []
         
         for root, dirs, files in os.walk(directory):
             # 排除特定目錄
@@ -129,11 +335,78 @@ class SecurityChecker:
                 
                 # 只掃描文本文件
                 if self.is_text_file(file_path):
-                    findings = self.scan_file(file_path)
-                    if findings:
-                        all_findings[relative_path] = findings
+                    candidates.append((relative_path, file_path))
         
-        return all_findings
+        return self.scan_files(candidates, jobs, cache)
+    
+    def scan_files(self, candidates: List[Tuple[str, str]], jobs: Optional[int] = None,
+                   cache: Optional['ScanCache'] = None) -> Dict[str, List[Tuple]]:
+        """掃描 (顯示路徑, 文件路徑) 列表，只返回有發現的文件 (依列表順序)"""
+        results: Dict[str, List[Tuple]] = {}
+        pending = []
+        for relative_path, file_path in candidates:
+            cached, digest = cache.lookup(relative_path, file_path) if cache else (None, None)
+            if cached is not None:
+                results[relative_path] = cached
+            else:
+                pending.append((relative_path, file_path, digest))
+        
+        paths = [file_path for _, file_path, _ in pending]
+        jobs = jobs or os.cpu_count() or 1
+        if jobs <= 1 or len(paths) < PARALLEL_MIN_FILES:
+            scanned = map(self.scan_file, paths)
+        else:
+            # 程序池 (multiprocessing) 只在需要時載入
+            from concurrent.futures import ProcessPoolExecutor
+            chunksize = max(len(paths) // (jobs * 4), 1)
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                     initargs=(self,)) as executor:
+                scanned = list(executor.map(_scan_worker, paths, chunksize=chunksize))
+        
+        for (relative_path, _, digest), findings in zip(pending, scanned):
+            results[relative_path] = findings
+            if cache is not None and digest:
+                cache.store(digest, findings)
+        
+        return {relative_path: results[relative_path]
+                for relative_path, _ in candidates if results[relative_path]}
+    
+    def scan_git_diff(self, directory: str = '.', staged: bool = False,
+                      since: Optional[str] = None) -> Dict[str, List[Tuple]]:
+        """
+        只掃描 git diff 中新增的行 (staged: 暫存區相對於 HEAD；since: 相對於該版本)
+        
+        行號為新內容中的行號，路徑相對於 directory；工作流 JSON 以結構化方式掃描新內容，
+        只保留出現在新增行中的結果
+        """
+        findings = {}
+        for relative_path, numbered_lines in git_added_lines(directory, staged, since).items():
+            if self.is_excluded_path(relative_path):
+                continue
+            file_findings = None
+            if self.structured_json and relative_path.lower().endswith('.json'):
+                file_findings = self._scan_changed_workflow(directory, relative_path, staged, numbered_lines)
+            if file_findings is None:
+                file_findings = self.scan_lines(numbered_lines)
+            if file_findings:
+                findings[relative_path] = file_findings
+        return findings
+    
+    def _scan_changed_workflow(self, directory: str, relative_path: str, staged: bool,
+                               numbered_lines: List[Tuple[int, str]]) -> Optional[List[Tuple]]:
+        """結構化掃描變更後的工作流，不是工作流匯出或無法解析時返回 None"""
+        try:
+            if staged:
+                data = json_backend.loads(git_show_staged(directory, relative_path))
+            else:
+                data = json_backend.load_file(os.path.join(directory, relative_path))
+            file_findings = self.scan_workflow_data(data)
+        except (OSError, ValueError, RecursionError, RuntimeError):
+            return None
+        if file_findings is None:
+            return None
+        added_text = '\n'.join(line for _, line in numbered_lines)
+        return [finding for finding in file_findings if _appears_in(finding[3], added_text)]
     
     def is_text_file(self, file_path: str) -> bool:
         """檢查是否為文本文件"""
@@ -146,8 +419,8 @@ class SecurityChecker:
         _, ext = os.path.splitext(file_path)
         return ext.lower() in text_extensions or os.path.basename(file_path).startswith('.env')
     
-    def generate_report(self, findings: Dict[str, List[Tuple]]) -> None:
-        """生成安全檢查報告"""
+    def generate_report(self, findings: Dict[str, List[Tuple]], source: str = '文件') -> None:
+        """生成安全檢查報告 (source 為結果鍵的種類，例如 文件、工作流)"""
         if not findings:
             print("🎉 安全檢查通過！沒有發現硬編碼的敏感資訊。")
             return
@@ -156,14 +429,15 @@ class SecurityChecker:
         print("=" * 60)
         
         total_issues = sum(len(file_findings) for file_findings in findings.values())
-        print(f"總共發現 {total_issues} 個潛在的安全問題在 {len(findings)} 個文件中：\n")
+        print(f"總共發現 {total_issues} 個潛在的安全問題在 {len(findings)} 個{source}中：\n")
         
         for file_path, file_findings in findings.items():
-            print(f"📁 文件: {file_path}")
+            print(f"📁 {source}: {file_path}")
             print("-" * 40)
             
-            for category, pattern, line_num, content in file_findings:
-                print(f"  ⚠️  第 {line_num} 行 [{category}]")
+            for category, pattern, location, content in file_findings:
+                location = f"第 {location} 行" if isinstance(location, int) else location
+                print(f"  ⚠️  {location} [{category}]")
                 print(f"     模式: {pattern}")
                 print(f"     內容: {content[:50]}{'...' if len(content) > 50 else ''}")
                 print()
@@ -204,15 +478,245 @@ class SecurityChecker:
         else:
             print("❌ .gitignore 文件不存在")
 
+class ScanCache:
+    """
+    掃描結果快取: 文件路徑 -> 大小/修改時間/內容雜湊，內容雜湊 -> 掃描結果
+    
+    大小與修改時間相同時不重新讀取文件；內容相同的文件 (例如複製的工作流匯出) 共用結果
+    """
+    
+    def __init__(self, cache_file: str, signature: str):
+        self.cache_file = cache_file
+        self.signature = signature
+        self.files: Dict[str, Dict] = {}
+        self.findings: Dict[str, List] = {}
+        self.hits = 0
+        self._seen = set()
+    
+    def load(self) -> 'ScanCache':
+        """讀取快取文件；模式不同時的快取會被忽略"""
+        if not os.path.exists(self.cache_file):
+            return self
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                state = json_backend.load(f)
+        except (OSError, ValueError):
+            return self
+        if state.get('signature') == self.signature:
+            self.files = state.get('files', {})
+            self.findings = state.get('findings', {})
+        return self
+    
+    def save(self) -> None:
+        """寫入快取文件 (只保留本次掃描到的文件及其結果)"""
+        files = {path: entry for path, entry in sorted(self.files.items()) if path in self._seen}
+        digests = {entry['sha256'] for entry in files.values()}
+        state = {
+            'signature': self.signature,
+            'files': files,
+            'findings': {digest: findings for digest, findings in self.findings.items() if digest in digests},
+        }
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json_backend.dump(state, f, indent=False)
+        os.replace(tmp_file, self.cache_file)
+    
+    def lookup(self, relative_path: str, file_path: str) -> Tuple[Optional[List[Tuple]], Optional[str]]:
+        """返回 (快取的掃描結果, 內容雜湊)；未命中時結果為 None，無法讀取時雜湊也為 None"""
+        try:
+            stat = os.stat(file_path)
+            entry = self.files.get(relative_path)
+            if (entry and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns
+                    and entry.get('sha256') in self.findings):
+                digest = entry['sha256']
+            else:
+                digest = file_digest(file_path)
+        except OSError:
+            return None, None
+        
+        self.files[relative_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        self._seen.add(relative_path)
+        findings = self.findings.get(digest)
+        if findings is None:
+            return None, digest
+        self.hits += 1
+        return [tuple(finding) for finding in findings], digest
+    
+    def store(self, digest: str, findings: List[Tuple]) -> None:
+        """記錄掃描結果；比對內容遮蔽後才保存，快取文件不含明文憑證"""
+        self.findings[digest] = redact_findings(findings)
+
+
+def _unquote_path(path: str) -> str:
+    """還原 git 以 C 風格引號輸出的路徑"""
+    if not path.startswith('"'):
+        return path
+    return codecs.escape_decode(path[1:-1].encode('utf-8'))[0].decode('utf-8', 'replace')
+
+
+def git_show_staged(directory: str, relative_path: str) -> bytes:
+    """讀取暫存區中的文件內容"""
+    result = subprocess.run(['git', '-C', directory, 'show', f":./{relative_path}"], capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git show 失敗: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return result.stdout
+
+
+def _appears_in(content: str, text: str) -> bool:
+    """內容 (可能在 JSON 中被跳脫) 是否出現在文字中"""
+    return any(candidate in text for candidate in
+               (content, json.dumps(content)[1:-1], json.dumps(content, ensure_ascii=False)[1:-1]))
+
+
+def git_added_lines(directory: str = '.', staged: bool = False,
+                    since: Optional[str] = None) -> Dict[str, List[Tuple[int, str]]]:
+    """
+    以 git diff -U0 取得新增的行: {相對於 directory 的路徑: [(行號, 行內容), ...]}
+    
+    不讀取工作目錄中的文件，暫存區模式掃描的就是即將提交的內容
+    """
+    command = ['git', '-C', directory, '-c', 'core.quotePath=false', 'diff', '--no-color',
+               '--no-ext-diff', '--relative', '-U0', '--diff-filter=ACMR',
+               '--src-prefix=a/', '--dst-prefix=b/']
+    if staged:
+        command.append('--cached')
+    if since:
+        command.append(since)
+    command.append('--')
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git diff 失敗: {result.stderr.decode('utf-8', 'replace').strip()}")
+    
+    added: Dict[str, List[Tuple[int, str]]] = {}
+    path = None
+    line_num = 0
+    in_header = False
+    for line in result.stdout.decode('utf-8', 'ignore').split('\n'):
+        if line.startswith('diff --git '):
+            in_header = True
+            path = None
+        elif in_header and line.startswith('+++ '):
+            target = _unquote_path(line[4:].rstrip('\t'))
+            path = target[2:] if target.startswith('b/') else None
+        elif line.startswith('@@'):
+            in_header = False
+            match = _HUNK_HEADER.match(line)
+            line_num = int(match.group(1)) if match else 0
+        elif not in_header and path and line.startswith('+'):
+            added.setdefault(path, []).append((line_num, line[1:]))
+            line_num += 1
+    return added
+
+
+# 程序池中各工作程序共用的檢查器 (只在啟動時傳送一次)
+_worker_checker: Optional[SecurityChecker] = None
+
+
+def _init_worker(checker: SecurityChecker) -> None:
+    global _worker_checker
+    _worker_checker = checker
+
+
+def _scan_worker(file_path: str) -> List[Tuple[str, str, int, str]]:
+    return _worker_checker.scan_file(file_path)
+
+def scan_remote(checker: SecurityChecker, jobs: int = DEFAULT_FETCH_JOBS,
+                cache_file: Optional[str] = None) -> Dict[str, List[Tuple]]:
+    """以環境變數中的連線設定掃描實例上的所有工作流 (失敗時結束程式)"""
+    # 遠端掃描才需要 API 客戶端 (requests)，本地掃描不載入
+    from n8n_client import get_client
+    from fleet_secret_scan import FleetScanCache, scan_fleet
+    try:
+        from env_loader import load_env_file
+        load_env_file()
+    except ImportError:
+        pass
+    
+    host_url = (os.getenv('N8N_HOST_URL') or '').rstrip('/')
+    api_key = os.getenv('N8N_API_KEY')
+    if not host_url or not api_key:
+        print("❌ 請設定 N8N_HOST_URL 和 N8N_API_KEY 環境變數")
+        sys.exit(2)
+    
+    print(f"🔍 正在掃描 {host_url} 上的工作流 (最多 {jobs} 個同時請求)...")
+    client = get_client(host_url, api_key, pool_size=jobs)
+    cache = FleetScanCache(cache_file, host_url, checker.signature()).load() if cache_file else None
+    try:
+        findings, stats = scan_fleet(checker, client.request, jobs=jobs, cache=cache)
+    except Exception as e:
+        print(f"❌ 無法讀取工作流列表: {e}")
+        sys.exit(2)
+    
+    print(f"📋 共 {stats['workflows']} 個工作流: 掃描 {stats['scanned']} 個, "
+          f"versionId 未變更略過 {stats['cached']} 個, 個別獲取 {stats['fetched']} 個"
+          + (f", 失敗 {stats['errors']} 個" if stats['errors'] else ''))
+    print(f"📡 連線統計: {client.format_stats()}")
+    if cache is not None:
+        try:
+            cache.save()
+        except OSError as e:
+            print(f"⚠️  無法寫入掃描快取: {e}")
+    return findings
+
 def main():
+    parser = argparse.ArgumentParser(description='代碼庫安全檢查工具')
+    parser.add_argument('directory', nargs='?', default='.', help='要掃描的目錄')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='掃描程序數量 (預設為 CPU 核心數)；--remote 時為同時獲取工作流的請求上限')
+    parser.add_argument('--incremental', action='store_true',
+                        help='快取掃描結果，略過內容 (或遠端 versionId) 未變更的文件與工作流')
+    parser.add_argument('--cache', help=f'掃描結果快取文件路徑 (預設 <DIRECTORY>/{DEFAULT_CACHE_FILE}；'
+                                        f'--remote 時為 ./{DEFAULT_FLEET_CACHE_FILE})')
+    parser.add_argument('--staged', action='store_true',
+                        help='只掃描暫存區中新增的行 (git diff --cached)，適合 pre-commit hook')
+    parser.add_argument('--since', metavar='REV', help='只掃描相對於 REV 新增的行 (git diff REV)')
+    parser.add_argument('--plain-json', action='store_true',
+                        help='工作流 JSON 也逐行掃描 (預設以結構化方式只檢查參數、憑證與程式碼欄位)')
+    parser.add_argument('--remote', action='store_true',
+                        help='掃描 N8N_HOST_URL 實例上已部署的工作流 (需要 N8N_API_KEY)')
+    args = parser.parse_args()
+    
     print("🔐 代碼庫安全檢查工具")
     print("=" * 50)
     
     checker = SecurityChecker()
+    checker.structured_json = not args.plain_json
+    
+    if args.remote:
+        findings = scan_remote(checker, jobs=args.jobs or DEFAULT_FETCH_JOBS,
+                               cache_file=args.cache or (DEFAULT_FLEET_CACHE_FILE if args.incremental else None))
+        checker.generate_report(findings, source='工作流')
+        if findings:
+            sys.exit(1)
+        print("\n✅ 安全檢查完成，沒有發現問題！")
+        sys.exit(0)
     
-    # 掃描目錄
-    print("🔍 正在掃描代碼庫...")
-    findings = checker.scan_directory()
+    if args.staged or args.since:
+        # 只掃描 diff 中新增的行
+        scope = '暫存區' if args.staged else ''
+        if args.since:
+            scope += f"相對於 {args.since} "
+        print(f"🔍 正在掃描{scope}新增的內容...")
+        try:
+            findings = checker.scan_git_diff(args.directory, staged=args.staged, since=args.since)
+        except (OSError, RuntimeError) as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+    else:
+        # 掃描目錄
+        print("🔍 正在掃描代碼庫...")
+        cache = None
+        if args.incremental or args.cache:
+            cache_file = args.cache or os.path.join(args.directory, DEFAULT_CACHE_FILE)
+            cache = ScanCache(cache_file, checker.signature()).load()
+            checker.exclude_files.add(os.path.basename(cache_file))
+        findings = checker.scan_directory(args.directory, jobs=args.jobs, cache=cache)
+        if cache is not None:
+            print(f"♻️  快取命中 {cache.hits} 個文件")
+            try:
+                cache.save()
+            except OSError as e:
+                print(f"⚠️  無法寫入掃描快取: {e}")
     
     # 生成報告
     checker.generate_report(findings)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+工作流部署流程
+部署管道 (同步/執行緒/非同步) 與 claude_n8n_cli.py deploy 共用的決策邏輯：
+
+    依名稱查找索引 -> 內容與遠端相同時略過 -> 更新或創建 -> 需要時啟用 -> 更新索引
+
+流程本身不發送請求，而是 yield (method, endpoint, data, params) 由呼叫端的傳輸方式執行，
+同一份流程可由 run_deploy (同步請求函式) 或 run_deploy_async (AsyncN8nClient.request) 驅動
+
+Usage:
+    deployed = run_deploy(deploy_steps(workflow_data, index), pipeline._make_request)
+    deployed = await run_deploy_async(deploy_steps(workflow_data, index), client.request)
+"""
+
+from typing import Awaitable, Callable, Dict, Generator, Optional, Tuple
+
+from workflow_hash import deploy_hash
+
+# (method, endpoint, data, params)，與 _make_request 的參數相同
+Request = Tuple[str, str, Optional[Dict], Optional[Dict]]
+DeploySteps = Generator[Request, Dict, Dict]
+
+
+def _no_count(key: str, amount: int = 1) -> None:
+    pass
+
+
+def deploy_steps(workflow_data: Dict, workflow_index, activate: bool = False, force: bool = False,
+                 emit: Callable[[str], None] = print,
+                 count: Callable[..., None] = _no_count) -> DeploySteps:
+    """
+    部署單個已讀取的工作流
+
+    Args:
+        workflow_data: 要送出的工作流內容 (已驗證與瘦身)
+        workflow_index: WorkflowIndex，查找同名工作流並在部署後就地更新
+        activate: 部署後啟用
+        force: 不比對遠端內容，一律寫入
+        emit: 輸出訊息的函式
+        count: 更新統計的函式 (created/updated/skipped/activated)
+
+    Returns:
+        部署後的工作流 (至少包含 id)；請求失敗時由呼叫端的請求函式拋出例外 (啟用失敗只輸出警告)
+    """
+    workflow_name = workflow_data.get('name', '未命名工作流')
+    emit("🔍 檢查現有工作流...")
+    existing_workflow = workflow_index.find_by_name(workflow_name)
+
+    remote_workflow = None
+    if existing_workflow and not force:
+        remote_workflow = (yield ('GET', f"/workflows/{existing_workflow['id']}", None, None)).get('data', {})
+
+    if existing_workflow and remote_workflow and deploy_hash(workflow_data) == deploy_hash(remote_workflow):
+        emit(f"⏭️  內容與遠端相同，略過更新 (ID: {existing_workflow['id']})")
+        count('skipped')
+        result = {'data': remote_workflow}
+        action = None
+    elif existing_workflow:
+        emit(f"🔄 發現同名工作流，正在更新 (ID: {existing_workflow['id']})")
+        result = yield ('PUT', f"/workflows/{existing_workflow['id']}", workflow_data, None)
+        count('updated')
+        action = "更新"
+    else:
+        emit("🆕 創建新工作流")
+        result = yield ('POST', '/workflows', workflow_data, None)
+        count('created')
+        action = "創建"
+
+    deployed_workflow = result.get('data', {})
+    if existing_workflow and not deployed_workflow.get('id'):
+        deployed_workflow = {**existing_workflow, **deployed_workflow}
+    workflow_id = deployed_workflow.get('id')
+    workflow_index.upsert(deployed_workflow)
+    if action:
+        emit(f"✅ 工作流{action}成功! (ID: {workflow_id})")
+
+    if activate and not deployed_workflow.get('active', False):
+        emit("🔄 正在啟用工作流...")
+        try:
+            activated = yield ('PATCH', f'/workflows/{workflow_id}', {"active": True}, None)
+            emit("✅ 工作流已啟用")
+            deployed_workflow = {**deployed_workflow, **activated.get('data', {}), 'active': True}
+            workflow_index.upsert(deployed_workflow)
+            count('activated')
+        except Exception as e:
+            emit(f"⚠️  啟用工作流失敗: {e}")
+
+    emit(f"📊 當前狀態: {'啟用' if deployed_workflow.get('active', False) else '停用'}")
+    return deployed_workflow
+
+
+def run_deploy(steps: DeploySteps, request: Callable[..., Dict]) -> Dict:
+    """以同步請求函式執行部署流程；請求的例外拋回流程中，由流程決定是否處理"""
+    response: Optional[Dict] = None
+    error: Optional[Exception] = None
+    while True:
+        try:
+            op = steps.throw(error) if error is not None else steps.send(response)
+        except StopIteration as stop:
+            return stop.value
+        response, error = None, None
+        try:
+            response = request(*op)
+        except Exception as e:
+            error = e
+
+
+async def run_deploy_async(steps: DeploySteps, request: Callable[..., Awaitable[Dict]]) -> Dict:
+    """以非同步請求函式 (例如 AsyncN8nClient.request) 執行部署流程"""
+    response: Optional[Dict] = None
+    error: Optional[Exception] = None
+    while True:
+        try:
+            op = steps.throw(error) if error is not None else steps.send(response)
+        except StopIteration as stop:
+            return stop.value
+        response, error = None, None
+        try:
+            response = await request(*op)
+        except Exception as e:
+            error = e
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+工作流內容雜湊工具
+將工作流 JSON 正規化後計算雜湊，用於判斷兩個版本的內容是否相同
+"""
+
+import json
+import hashlib
+from typing import Any, Dict
+
+
+# 由 n8n 伺服器產生或由其他 API 管理的欄位，不影響部署內容
+VOLATILE_FIELDS = frozenset([
+    'id', 'versionId', 'meta', 'updatedAt', 'createdAt', 'active', 'tags',
+    'shared', 'homeProject', 'isArchived', 'triggerCount', 'usedCredentials',
+])
+
+
+def canonical_json(data: Any) -> str:
+    """產生正規化 JSON (鍵排序、無多餘空白)，相同內容必定得到相同字串"""
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def content_hash(data: Any) -> str:
+    """計算正規化 JSON 的 SHA-256"""
+    return hashlib.sha256(canonical_json(data).encode('utf-8')).hexdigest()
+
+
+def version_key(workflow: Dict) -> str:
+    """取得工作流的版本標記；沒有 versionId 的舊版 n8n 以 updatedAt 代替"""
+    return workflow.get('versionId') or workflow.get('updatedAt') or ''
+
+
+def deploy_payload(workflow: Dict) -> Dict:
+    """取出部署時會寫入遠端的內容 (去除易變欄位)"""
+    return {key: value for key, value in workflow.items() if key not in VOLATILE_FIELDS}
+
+
+def deploy_hash(workflow: Dict) -> str:
+    """計算部署內容的雜湊，本地文件與遠端工作流內容相同時得到相同結果"""
+    return content_hash(deploy_payload(workflow))
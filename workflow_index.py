@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+n8n 工作流索引
+每次執行只列出一次遠端工作流，建立名稱與 ID 的對照表，並在建立或更新後就地維護
+
+可選擇將索引快取到本地 JSON 文件 (附 TTL)，讓重複的 CI 執行略過初始列表請求
+"""
+
+import os
+import time
+import threading
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+import json_backend
+from n8n_client import DEFAULT_PAGE_SIZE, iter_pages
+
+# 索引只保留查找與比對所需的欄位，避免在記憶體中保存完整節點資料
+INDEX_FIELDS = ('id', 'name', 'active', 'versionId', 'updatedAt')
+
+
+class WorkflowIndex:
+    def __init__(self, request: Callable[..., Dict], host_url: str = '',
+                 cache_file: Optional[str] = None, ttl: float = 0,
+                 page_size: int = DEFAULT_PAGE_SIZE):
+        """
+        Args:
+            request: 與 _make_request 相同簽名的請求函式 (method, endpoint, data, params)
+            host_url: n8n 主機 URL，用於確認快取屬於同一個實例
+            cache_file: 本地快取文件路徑，None 表示不使用快取
+            ttl: 快取有效秒數，0 表示不讀取快取 (仍會寫入)
+            page_size: 每頁列出的工作流數量
+        """
+        self._request = request
+        self.host_url = host_url.rstrip('/')
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.page_size = page_size
+
+        self._lock = threading.RLock()
+        self._by_id: Dict[str, Dict] = {}
+        self._by_name: Dict[str, str] = {}
+        self.loaded = False
+        self.from_cache = False
+        self.pages_fetched = 0
+        # 索引內容從 API 列出的時間；從快取載入時沿用快取的時間，TTL 從實際列出時起算
+        self.created_at = 0.0
+
+    def _fetch_all(self) -> Iterable[Dict]:
+        """依 nextCursor 分頁列出所有工作流 (逐頁產生，只保留索引欄位)"""
+        for page in iter_pages(self._request, '/workflows', page_size=self.page_size):
+            self.pages_fetched += 1
+            yield from page
+
+    def _load_cache(self) -> Optional[Dict]:
+        """讀取未過期的本地快取 (完整的快取內容，包含 created_at 與 workflows)"""
+        if not self.cache_file or self.ttl <= 0 or not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cache = json_backend.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if cache.get('host_url') != self.host_url:
+            return None
+        if time.time() - cache.get('created_at', 0) > self.ttl:
+            return None
+        return cache
+
+    def save_cache(self) -> None:
+        """將目前索引寫入本地快取"""
+        if not self.cache_file:
+            return
+        with self._lock:
+            cache = {
+                'host_url': self.host_url,
+                'created_at': self.created_at,
+                'workflows': list(self._by_id.values()),
+            }
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json_backend.dump(cache, f, indent=False)
+        os.replace(tmp_file, self.cache_file)
+
+    def load(self, force: bool = False) -> 'WorkflowIndex':
+        """建立索引；已載入時直接返回，force=True 時重新列出"""
+        with self._lock:
+            if self.loaded and not force:
+                return self
+
+            cache = None if force else self._load_cache()
+            if cache is not None:
+                self.populate(cache.get('workflows', []), from_cache=True, created_at=cache.get('created_at', 0))
+            else:
+                self.populate(self._fetch_all())
+        return self
+
+    async def load_async(self, list_workflows: Callable[[], Awaitable[List[Dict]]]) -> 'WorkflowIndex':
+        """以非同步列表函式建立索引 (快取有效時不呼叫)"""
+        if self.loaded:
+            return self
+        cache = self._load_cache()
+        if cache is not None:
+            self.populate(cache.get('workflows', []), from_cache=True, created_at=cache.get('created_at', 0))
+        else:
+            self.populate(await list_workflows())
+        return self
+
+    def populate(self, workflows: Iterable[Dict], from_cache: bool = False,
+                 created_at: Optional[float] = None) -> None:
+        """
+        以已取得的工作流列表重建索引
+
+        Args:
+            from_cache: 列表來自本地快取 (不重新寫入快取)
+            created_at: 快取的建立時間；None 表示剛從 API 列出
+        """
+        if created_at is None:
+            created_at = time.time()
+        with self._lock:
+            self._by_id.clear()
+            self._by_name.clear()
+            for workflow in workflows:
+                self._add(workflow)
+            self.loaded = True
+            self.from_cache = from_cache
+            self.created_at = created_at
+
+        if not from_cache:
+            self.save_cache()
+
+    def _add(self, workflow: Dict) -> None:
+        entry = {field: workflow.get(field) for field in INDEX_FIELDS}
+        workflow_id = entry['id']
+        if not workflow_id:
+            return
+
+        previous = self._by_id.get(workflow_id)
+        if previous and previous.get('name') != entry['name'] \
+                and self._by_name.get(previous.get('name')) == workflow_id:
+            del self._by_name[previous['name']]
+
+        self._by_id[workflow_id] = entry
+        # 同名工作流以最先出現者為準，與原本線性搜尋的行為一致
+        self._by_name.setdefault(entry['name'], workflow_id)
+
+    def upsert(self, workflow: Dict) -> None:
+        """建立或更新工作流後就地更新索引"""
+        with self._lock:
+            self._add(workflow)
+
+    def remove(self, workflow_id: str) -> None:
+        """從索引中移除工作流"""
+        with self._lock:
+            entry = self._by_id.pop(workflow_id, None)
+            if entry and self._by_name.get(entry.get('name')) == workflow_id:
+                del self._by_name[entry['name']]
+
+    def find_by_name(self, name: str) -> Optional[Dict]:
+        """依名稱查找工作流"""
+        self.load()
+        with self._lock:
+            workflow_id = self._by_name.get(name)
+            return dict(self._by_id[workflow_id]) if workflow_id else None
+
+    def get(self, workflow_id: str) -> Optional[Dict]:
+        """依 ID 查找工作流"""
+        self.load()
+        with self._lock:
+            entry = self._by_id.get(workflow_id)
+            return dict(entry) if entry else None
+
+    def __iter__(self) -> Iterable[Dict]:
+        self.load()
+        with self._lock:
+            entries = [dict(entry) for entry in self._by_id.values()]
+        return iter(entries)
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self._by_id)
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+工作流效能靜態分析
+只讀取 nodes 與 connections (不需連線 n8n)，找出常見的效能問題：
+
+- sequential-io: 互不依賴的 HTTP/Sheets 節點串接執行，可改為並行分支後以 Merge 合併
+- wait-in-loop: splitInBatches 迴圈內的 Wait 節點，每批都會增加固定延遲
+- duplicate-sheet-read: 同一次執行中多次讀取同一份試算表
+- ai-before-response: 在 Webhook 回應前的關鍵路徑上呼叫 AI 節點
+
+Usage:
+    python3 n8n_deploy_pipeline.py lint <FILE_OR_DIRECTORY>... [--json]
+"""
+
+import os
+import re
+import glob
+import json
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+import json_backend
+from execution_profile import sub_node_parents
+
+RULES = {
+    'sequential-io': '互不依賴的 I/O 節點串接執行',
+    'wait-in-loop': 'splitInBatches 迴圈內的 Wait 節點',
+    'duplicate-sheet-read': '同一次執行中重複讀取同一份試算表',
+    'ai-before-response': 'Webhook 回應前的關鍵路徑上有 AI 節點',
+}
+
+# 會發出網路請求的節點類型 (串接時各自的延遲會累加)
+IO_NODE_TYPES = frozenset([
+    'n8n-nodes-base.httpRequest',
+    'n8n-nodes-base.googleSheets',
+    'n8n-nodes-base.airtable',
+    'n8n-nodes-base.notion',
+    'n8n-nodes-base.postgres',
+    'n8n-nodes-base.mySql',
+])
+
+SHEETS_TYPE = 'n8n-nodes-base.googleSheets'
+# Google Sheets 的讀取操作 (未指定 operation 時預設為讀取)
+SHEET_READ_OPERATIONS = frozenset([None, 'read', 'lookup', 'get', 'getAll'])
+
+LANGCHAIN_PREFIX = '@n8n/n8n-nodes-langchain.'
+
+# 分析與驗證只需要的頂層欄位 (大文件以串流方式只讀取這些欄位)
+STRUCTURE_FIELDS = ('name', 'nodes', 'connections')
+
+# 不會改變外部狀態的操作 (HTTP 方法或節點 operation)
+READ_OPERATIONS = frozenset(['GET', 'HEAD', 'read', 'lookup', 'get', 'getAll', 'search', 'select'])
+
+# 引用其他節點輸出的運算式：$('名稱')、$node["名稱"]、$items("名稱")
+NODE_REFERENCE = re.compile(r"""\$(?:\(|node\[|items\()\s*(["'])(.+?)\1""")
+# 引用上一個節點 (輸入項目) 的運算式
+INPUT_REFERENCE = re.compile(r'\$json\b|\$input\b|\$binary\b')
+
+
+def _strings(value) -> Iterator[str]:
+    """遞迴取出參數中的所有字串"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+def _resource_value(value) -> Optional[str]:
+    """documentId 等資源定位參數可能是字串或 {'__rl': true, 'value': ...}"""
+    if isinstance(value, dict):
+        value = value.get('value')
+    return str(value) if value not in (None, '') else None
+
+
+class WorkflowGraph:
+    """以 main 連線建立的節點圖"""
+
+    def __init__(self, workflow: Dict):
+        self.nodes: Dict[str, Dict] = {}
+        for node in workflow.get('nodes') or []:
+            if isinstance(node, dict) and node.get('name'):
+                self.nodes[node['name']] = node
+        self.successors: Dict[str, List[str]] = {name: [] for name in self.nodes}
+        self.predecessors: Dict[str, List[str]] = {name: [] for name in self.nodes}
+        for source, outputs in (workflow.get('connections') or {}).items():
+            for branch in (outputs or {}).get('main') or []:
+                for target in branch or []:
+                    name = (target or {}).get('node')
+                    if source in self.nodes and name in self.nodes and name not in self.successors[source]:
+                        self.successors[source].append(name)
+                        self.predecessors[name].append(source)
+        self.sub_nodes = set(sub_node_parents(workflow))
+
+    def type_of(self, name: str) -> str:
+        return self.nodes[name].get('type', '')
+
+    def reachable(self, start: str, backward: bool = False) -> Set[str]:
+        """從 start 出發 (不含 start 本身，除非位於環上) 可到達的節點"""
+        edges = self.predecessors if backward else self.successors
+        seen: Set[str] = set()
+        queue = deque(edges[start])
+        while queue:
+            name = queue.popleft()
+            if name in seen:
+                continue
+            seen.add(name)
+            queue.extend(edges[name])
+        return seen
+
+    def references(self, name: str) -> Set[str]:
+        """節點參數中以名稱引用的其他節點"""
+        parameters = self.nodes[name].get('parameters') or {}
+        return {match.group(2) for text in _strings(parameters) for match in NODE_REFERENCE.finditer(text)}
+
+    def is_read_only(self, name: str) -> bool:
+        """節點是否只讀取資料 (寫入成功常是下游節點的隱含前提，不能並行)"""
+        node = self.nodes[name]
+        parameters = node.get('parameters') or {}
+        if node.get('type') == 'n8n-nodes-base.httpRequest':
+            return parameters.get('method', 'GET') in READ_OPERATIONS
+        if node.get('type') == SHEETS_TYPE:
+            return parameters.get('operation') in SHEET_READ_OPERATIONS
+        return parameters.get('operation') in READ_OPERATIONS
+
+    def uses_input(self, name: str) -> bool:
+        """節點是否使用上一個節點的輸出 ($json、$input 或自動對應輸入欄位)"""
+        node = self.nodes[name]
+        if node.get('type') == 'n8n-nodes-base.code':
+            return True
+        parameters = node.get('parameters') or {}
+        if (parameters.get('columns') or {}).get('mappingMode') == 'autoMapInputData':
+            return True
+        if parameters.get('operation') in ('append', 'appendOrUpdate', 'update') and 'columns' not in parameters:
+            return True
+        return any(INPUT_REFERENCE.search(text) for text in _strings(parameters))
+
+
+def _finding(rule: str, severity: str, nodes: List[str], message: str) -> Dict:
+    return {'rule': rule, 'severity': severity, 'nodes': nodes, 'message': message}
+
+
+def _check_sequential_io(graph: WorkflowGraph) -> List[Dict]:
+    """
+    A -> B 皆為 I/O 節點、A 只讀取資料、B 只有 A 一個上游、且 B 不使用 A 的輸出時，兩者可並行
+    """
+    independent: Dict[str, str] = {}
+    for name, successors in graph.successors.items():
+        if (graph.type_of(name) not in IO_NODE_TYPES or len(successors) != 1
+                or not graph.is_read_only(name)):
+            continue
+        target = successors[0]
+        if (graph.type_of(target) in IO_NODE_TYPES and graph.predecessors[target] == [name]
+                and not graph.uses_input(target) and name not in graph.references(target)):
+            independent[name] = target
+
+    # 將相鄰的可並行邊合併為一條鏈，每條鏈回報一次
+    findings = []
+    chained = set(independent.values())
+    for start in independent:
+        if start in chained:
+            continue
+        chain = [start]
+        while chain[-1] in independent and independent[chain[-1]] not in chain:
+            chain.append(independent[chain[-1]])
+        findings.append(_finding(
+            'sequential-io', 'warning', chain,
+            f"{' -> '.join(chain)} 互不使用對方的輸出卻串接執行，延遲會累加；"
+            f"可從共同上游分出並行分支後以 Merge 合併"))
+    return findings
+
+
+def _check_wait_in_loop(graph: WorkflowGraph) -> List[Dict]:
+    findings = []
+    for name in graph.nodes:
+        if graph.type_of(name) != 'n8n-nodes-base.splitInBatches':
+            continue
+        # 迴圈本體: 從迴圈節點出發且能回到迴圈節點的節點
+        body = graph.reachable(name) & graph.reachable(name, backward=True)
+        for wait in sorted(body):
+            if graph.type_of(wait) != 'n8n-nodes-base.wait':
+                continue
+            parameters = graph.nodes[wait].get('parameters') or {}
+            amount = parameters.get('amount')
+            delay = f" ({amount} {parameters.get('unit', 'seconds')})" if amount is not None else ''
+            findings.append(_finding(
+                'wait-in-loop', 'warning', [name, wait],
+                f"{wait}{delay} 位於 {name} 迴圈內，每一批都會增加等待時間；"
+                f"若是為了限流，考慮改用節點的 batching/retry 設定或加大批次"))
+    return findings
+
+
+def _check_duplicate_sheet_reads(graph: WorkflowGraph) -> List[Dict]:
+    """同一份文件的讀取節點若位於同一條路徑上 (一個可到達另一個)，同一次執行會讀取多次"""
+    by_document: Dict[str, List[str]] = {}
+    for name, node in graph.nodes.items():
+        if node.get('type') != SHEETS_TYPE or node.get('disabled'):
+            continue
+        parameters = node.get('parameters') or {}
+        if parameters.get('operation') not in SHEET_READ_OPERATIONS:
+            continue
+        document = _resource_value(parameters.get('documentId'))
+        if document:
+            by_document.setdefault(document, []).append(name)
+
+    findings = []
+    for document, readers in by_document.items():
+        if len(readers) < 2:
+            continue
+        on_same_path = set()
+        for name in readers:
+            downstream = graph.reachable(name)
+            for other in readers:
+                if other != name and other in downstream:
+                    on_same_path.update((name, other))
+        if len(on_same_path) < 2:
+            continue
+        nodes = [name for name in readers if name in on_same_path]
+        findings.append(_finding(
+            'duplicate-sheet-read', 'warning', nodes,
+            f"{', '.join(nodes)} 在同一次執行中讀取同一份試算表 ({document})；"
+            f"可合併為一次讀取後在 Code/Filter 節點中篩選"))
+    return findings
+
+
+def _check_ai_before_response(graph: WorkflowGraph) -> List[Dict]:
+    """Webhook 設定為最後節點或 Respond to Webhook 回應時，回應前的 AI 節點會拖慢回應"""
+    ai_nodes = {name for name in graph.nodes
+                if graph.type_of(name).startswith(LANGCHAIN_PREFIX) and name not in graph.sub_nodes}
+    findings = []
+    for name, node in graph.nodes.items():
+        if node.get('type') != 'n8n-nodes-base.webhook':
+            continue
+        mode = (node.get('parameters') or {}).get('responseMode', 'onReceived')
+        downstream = graph.reachable(name)
+        if mode == 'lastNode':
+            critical = downstream
+        elif mode == 'responseNode':
+            critical = set()
+            for responder in downstream:
+                if graph.type_of(responder) == 'n8n-nodes-base.respondToWebhook':
+                    critical |= downstream & graph.reachable(responder, backward=True)
+        else:
+            continue
+        slow = sorted(critical & ai_nodes)
+        if slow:
+            findings.append(_finding(
+                'ai-before-response', 'warning', [name] + slow,
+                f"{name} 在 {', '.join(slow)} 完成後才回應 (responseMode={mode})；"
+                f"可先以 Respond to Webhook 回應，再於背景呼叫 AI"))
+    return findings
+
+
+CHECKS = (
+    _check_sequential_io,
+    _check_wait_in_loop,
+    _check_duplicate_sheet_reads,
+    _check_ai_before_response,
+)
+
+
+def lint_workflow(workflow: Dict, source: Optional[str] = None) -> List[Dict]:
+    """
+    分析單一工作流
+
+    Returns:
+        [{'rule', 'severity', 'nodes', 'message', 'workflow', 'file'}, ...]
+    """
+    graph = WorkflowGraph(workflow)
+    findings = []
+    for check in CHECKS:
+        for finding in check(graph):
+            finding['workflow'] = workflow.get('name')
+            finding['file'] = source
+            findings.append(finding)
+    return findings
+
+
+def workflow_files(paths: Iterable[str]) -> List[str]:
+    """展開文件與目錄 (目錄中的 *.json) 為文件列表"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '*.json'))))
+        else:
+            files.append(path)
+    return files
+
+
+def lint_files(paths: Iterable[str]) -> List[Dict]:
+    """分析多個文件或目錄；無法讀取的文件以 rule='unreadable' 回報"""
+    findings = []
+    for path in workflow_files(paths):
+        try:
+            workflow = json_backend.load_file(path, fields=STRUCTURE_FIELDS)
+        except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+            findings.append({'rule': 'unreadable', 'severity': 'error', 'nodes': [],
+                             'message': str(e), 'workflow': None, 'file': path})
+            continue
+        if isinstance(workflow, dict) and 'nodes' in workflow:
+            findings.extend(lint_workflow(workflow, source=path))
+    return findings
+
+
+def print_findings(findings: List[Dict]) -> None:
+    """以文件分組輸出分析結果，最後列出各規則的數量"""
+    current = object()
+    for finding in findings:
+        if finding['file'] != current:
+            current = finding['file']
+            print(f"\n📄 {current or finding['workflow']}")
+        icon = '❌' if finding['severity'] == 'error' else '⚠️ '
+        print(f"   {icon} [{finding['rule']}] {finding['message']}")
+
+    counts: Dict[str, int] = {}
+    for finding in findings:
+        counts[finding['rule']] = counts.get(finding['rule'], 0) + 1
+    if counts:
+        print("\n📊 規則統計:")
+        for rule, count in sorted(counts.items(), key=lambda item: -item[1]):
+            print(f"   {rule:<22} {count:>5}  {RULES.get(rule, '')}")
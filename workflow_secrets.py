@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+n8n 工作流匯出的結構化敏感資訊掃描
+走訪工作流樹一次，只在相關欄位套用對應的規則 (節點 ID、webhookId、documentId 等不檢查)：
+
+- credentials: 只應包含憑證的 id/name 參照，其他欄位視為內嵌憑證
+- 名稱為 Authorization、X-API-Key、password 等的標頭/查詢/本文參數與參數鍵: 非表達式的字面值
+- jsCode 等程式碼欄位: Token/API Key 模式與密碼、金鑰的字串賦值，回報程式碼中的行號
+- 其他參數字串: 只比對高精確度的 Token/API Key/帶帳密 URL 模式
+
+回報的位置為 JSON 路徑，例如 nodes[name=HTTP Request].parameters.headerParameters.parameters[0].value
+
+Usage:
+    python3 security_check.py [DIRECTORY]            # 工作流 JSON 自動以結構化方式掃描
+    python3 security_check.py [DIRECTORY] --plain-json
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# 所有參數字串都比對的模式分類 (寬鬆的 LINE Bot 模式會誤判節點 ID，只由敏感欄位規則處理)
+TOKEN_CATEGORIES = ('API Keys', 'Tokens', 'URLs with credentials')
+# 程式碼欄位另外比對賦值形式的密碼/金鑰
+CODE_CATEGORIES = TOKEN_CATEGORIES + ('Common secrets',)
+
+CODE_FIELDS = frozenset(['jsCode', 'pythonCode', 'functionCode', 'functionItemCode', 'code'])
+
+# credentials 中允許的參照欄位
+CREDENTIAL_REFERENCE_KEYS = frozenset(['id', 'name'])
+
+# 名稱 (去除 - 與 _、轉小寫後) 以這些字尾結束或完全相同時視為敏感欄位
+SENSITIVE_NAME_SUFFIXES = ('password', 'passwd', 'secret', 'token', 'apikey', 'accesskey',
+                           'privatekey', 'signature')
+SENSITIVE_NAMES = frozenset(['authorization', 'proxyauthorization', 'auth', 'cookie'])
+
+# 標頭值中可略過的驗證方式前綴
+AUTH_SCHEMES = frozenset(['bearer', 'basic', 'token', 'bot'])
+
+# 字面值短於此長度時不視為憑證 (例如 "none"、"true")
+MIN_SECRET_LENGTH = 8
+
+INLINE_CREDENTIALS_CATEGORY = 'Inline credentials'
+HARDCODED_CATEGORY = 'Hardcoded credentials'
+
+Finding = Tuple[str, str, str, str]
+
+
+def is_sensitive_name(name: str) -> bool:
+    normalized = name.lower().replace('-', '').replace('_', '')
+    return normalized in SENSITIVE_NAMES or normalized.endswith(SENSITIVE_NAME_SUFFIXES)
+
+
+def is_expression(value: str) -> bool:
+    """n8n 表達式 (以 = 開頭或含 {{ }}) 在執行時才取值，通常引用憑證或環境變數"""
+    return value.startswith('=') or '{{' in value
+
+
+def literal_secret(value: str) -> Optional[str]:
+    """敏感欄位中像憑證的字面值 (略過 Bearer 等前綴)；表達式、空值或過短時返回 None"""
+    text = value.strip()
+    if not text or is_expression(text):
+        return None
+    scheme, _, rest = text.partition(' ')
+    if rest and scheme.lower() in AUTH_SCHEMES:
+        text = rest.strip()
+    if len(text) < MIN_SECRET_LENGTH or ' ' in text:
+        return None
+    return text
+
+
+def redact_secret(content: str) -> str:
+    """遮蔽比對到的內容，只保留開頭幾個字元與長度 (寫入快取文件時使用，避免以明文保存憑證)"""
+    content = str(content)
+    return f"{content[:min(4, len(content) // 4)]}…({len(content)} 字元, 已遮蔽)"
+
+
+def redact_findings(findings: List[Tuple]) -> List[List]:
+    """將結果中的比對內容 (最後一個欄位) 遮蔽，保留分類、規則與位置"""
+    return [list(finding[:-1]) + [redact_secret(finding[-1])] for finding in findings]
+
+
+def is_workflow(data: Any) -> bool:
+    return isinstance(data, dict) and isinstance(data.get('nodes'), list) and 'connections' in data
+
+
+class WorkflowSecretScanner:
+    """
+    以 SecurityChecker 的模式掃描工作流 (只需要 subset、scan_lines、is_excluded_content)
+
+    所有字串先收集成兩批 (一般參數與程式碼)，各自只經過一次區塊掃描
+    """
+
+    def __init__(self, checker):
+        self.checker = checker
+        self.token_checker = checker.subset(TOKEN_CATEGORIES)
+        self.code_checker = checker.subset(CODE_CATEGORIES)
+
+    def scan_document(self, data: Any) -> Optional[List[Finding]]:
+        """掃描單一工作流或工作流陣列 (n8n export:workflow --all)；不是工作流匯出時返回 None"""
+        if is_workflow(data):
+            return self.scan_workflow(data)
+        if isinstance(data, list) and data and all(is_workflow(item) for item in data):
+            findings = []
+            for index, workflow in enumerate(data):
+                findings.extend(self.scan_workflow(workflow, prefix=f"[{index}]."))
+            return findings
+        return None
+
+    def scan_workflow(self, workflow: Dict, prefix: str = '') -> List[Finding]:
+        """返回 [(category, rule, json_path, matched_content), ...]"""
+        findings: List[Finding] = []
+        strings: List[Tuple[str, str]] = []
+        code: List[Tuple[str, str]] = []
+
+        for index, node in enumerate(workflow.get('nodes') or []):
+            if not isinstance(node, dict):
+                continue
+            name = node.get('name')
+            node_path = f"{prefix}nodes[name={name}]" if isinstance(name, str) and name else f"{prefix}nodes[{index}]"
+
+            credentials = node.get('credentials')
+            if isinstance(credentials, dict):
+                for credential_type, reference in credentials.items():
+                    if not isinstance(reference, dict):
+                        continue
+                    for key, value in reference.items():
+                        if key not in CREDENTIAL_REFERENCE_KEYS and value not in (None, ''):
+                            findings.append((INLINE_CREDENTIALS_CATEGORY, 'credentials 只應包含 id/name',
+                                             f"{node_path}.credentials.{credential_type}.{key}", str(value)))
+
+            parameters = node.get('parameters')
+            if isinstance(parameters, dict):
+                self._walk(parameters, f"{node_path}.parameters", None, findings, strings, code)
+
+        findings.extend(self._scan_strings(self.token_checker, strings))
+        findings.extend(self._scan_strings(self.code_checker, code))
+        return findings
+
+    def _walk(self, value: Any, path: str, key: Optional[str], findings: List[Finding],
+              strings: List[Tuple[str, str]], code: List[Tuple[str, str]]) -> None:
+        if isinstance(value, dict):
+            # {name, value} 形式的標頭/查詢/本文參數
+            pair_name = value.get('name')
+            checked = None
+            if isinstance(pair_name, str) and isinstance(value.get('value'), str) and is_sensitive_name(pair_name):
+                checked = 'value'
+                self._check_sensitive(pair_name, value['value'], f"{path}.value", findings, strings)
+            for child_key, child in value.items():
+                if child_key != checked:
+                    self._walk(child, f"{path}.{child_key}", child_key, findings, strings, code)
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                self._walk(item, f"{path}[{index}]", key, findings, strings, code)
+        elif isinstance(value, str) and value:
+            if key in CODE_FIELDS:
+                code.append((path, value))
+            elif key is not None and is_sensitive_name(key):
+                self._check_sensitive(key, value, path, findings, strings)
+            else:
+                strings.append((path, value))
+
+    def _check_sensitive(self, name: str, value: str, path: str, findings: List[Finding],
+                         strings: List[Tuple[str, str]]) -> None:
+        secret = literal_secret(value)
+        if secret is not None and not self.checker.is_excluded_content(secret):
+            findings.append((HARDCODED_CATEGORY, f"敏感欄位 {name} 的字面值", path, secret))
+        elif secret is None:
+            # 表達式中仍可能直接寫入 Token
+            strings.append((path, value))
+
+    @staticmethod
+    def _scan_strings(checker, entries: List[Tuple[str, str]]) -> List[Finding]:
+        """將所有字串拆成行後一次掃描；多行字串的位置附上行號 (path:line)"""
+        if not entries:
+            return []
+        locations = []
+        numbered_lines = []
+        for path, text in entries:
+            lines = text.split('\n')
+            for line_num, line in enumerate(lines, 1):
+                locations.append(f"{path}:{line_num}" if len(lines) > 1 else path)
+                numbered_lines.append((len(numbered_lines), line))
+        return [(category, pattern, locations[index], matched_content)
+                for category, pattern, index, matched_content in checker.scan_lines(numbered_lines)]
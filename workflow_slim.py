@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+工作流內容瘦身
+部署與備份前移除不影響執行的內容，減少每次 PUT 與每份備份的大小：
+
+- pin-data: 移除 pinData (可先另存到 --pin-data-dir)
+- sticky-notes: 移除便利貼節點
+- cached-metadata: 移除資源定位參數中的 cachedResultName/cachedResultUrl (編輯器會重新解析)
+- positions: 節點位置對齊網格並平移到原點附近，避免無意義的座標差異
+
+Usage:
+    python3 n8n_deploy_pipeline.py batch-deploy ./workflows --slim
+    python3 n8n_deploy_pipeline.py backup --slim pin-data,sticky-notes,cached-metadata --pin-data-dir ./pindata
+"""
+
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+import json_backend
+from backup_store import safe_filename
+
+SLIM_PASSES = {
+    'pin-data': '移除 pinData',
+    'sticky-notes': '移除便利貼節點',
+    'cached-metadata': '移除 cachedResultName/cachedResultUrl',
+    'positions': '節點位置對齊網格並平移到原點',
+}
+
+# --slim 不指定項目時使用的預設瘦身項目 (不改變編輯器中的外觀)
+DEFAULT_SLIM_PASSES = ('pin-data', 'cached-metadata')
+
+CACHED_METADATA_KEYS = ('cachedResultName', 'cachedResultUrl')
+STICKY_NOTE_TYPE = 'n8n-nodes-base.stickyNote'
+
+# n8n 編輯器的網格大小
+GRID_SIZE = 20
+
+
+def parse_slim_passes(value: Optional[str]) -> Tuple[str, ...]:
+    """
+    解析 --slim 參數
+
+    None 表示不瘦身；'default' 為預設項目；'all' 為全部項目；其餘以逗號分隔
+    """
+    if not value:
+        return ()
+    if value == 'default':
+        return DEFAULT_SLIM_PASSES
+    if value == 'all':
+        return tuple(SLIM_PASSES)
+    passes = tuple(item.strip() for item in value.split(',') if item.strip())
+    unknown = [item for item in passes if item not in SLIM_PASSES]
+    if unknown:
+        raise ValueError(f"未知的瘦身項目: {', '.join(unknown)} (可用: {', '.join(SLIM_PASSES)})")
+    return passes
+
+
+def _strip_cached_metadata(value) -> int:
+    """遞迴移除資源定位參數 ({'__rl': true, ...}) 中的快取欄位，返回移除的欄位數"""
+    removed = 0
+    if isinstance(value, dict):
+        if value.get('__rl'):
+            for key in CACHED_METADATA_KEYS:
+                if key in value:
+                    del value[key]
+                    removed += 1
+        for item in value.values():
+            removed += _strip_cached_metadata(item)
+    elif isinstance(value, list):
+        for item in value:
+            removed += _strip_cached_metadata(item)
+    return removed
+
+
+def _normalize_positions(nodes) -> int:
+    """位置對齊網格並整體平移使最小座標為 0，返回變更的節點數"""
+    positioned = [node for node in nodes
+                  if isinstance(node.get('position'), list) and len(node['position']) == 2]
+    if not positioned:
+        return 0
+    min_x = min(node['position'][0] for node in positioned)
+    min_y = min(node['position'][1] for node in positioned)
+    changed = 0
+    for node in positioned:
+        x, y = node['position']
+        position = [int(round((x - min_x) / GRID_SIZE)) * GRID_SIZE,
+                    int(round((y - min_y) / GRID_SIZE)) * GRID_SIZE]
+        if position != [x, y]:
+            node['position'] = position
+            changed += 1
+    return changed
+
+
+def externalize_pin_data(workflow: Dict, pin_data_dir: str) -> Optional[str]:
+    """將 pinData 另存為 <pin_data_dir>/<工作流名稱>.pindata.json，返回文件路徑"""
+    pin_data = workflow.get('pinData')
+    if not pin_data:
+        return None
+    os.makedirs(pin_data_dir, exist_ok=True)
+    path = os.path.join(pin_data_dir, f"{safe_filename(workflow.get('name') or 'unnamed_workflow')}.pindata.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json_backend.dump(pin_data, f)
+    return path
+
+
+def slim_workflow(workflow: Dict, passes: Iterable[str],
+                  pin_data_dir: Optional[str] = None) -> Tuple[Dict, Dict]:
+    """
+    依指定項目瘦身工作流 (不修改傳入的字典)
+
+    Returns:
+        (瘦身後的工作流, 報告)；報告含 before/after (緊湊 JSON 位元組數) 與各項目移除的數量
+    """
+    passes = set(passes)
+    before = len(json_backend.dumps_bytes(workflow))
+    report = {'before': before, 'after': before, 'pinData': 0, 'stickyNotes': 0,
+              'cachedFields': 0, 'positions': 0, 'pinDataFile': None}
+    if not passes:
+        return workflow, report
+
+    # 只有會被修改的部分需要複製
+    slimmed = dict(workflow)
+    nodes = [dict(node) if isinstance(node, dict) else node for node in workflow.get('nodes') or []]
+
+    if 'pin-data' in passes and slimmed.get('pinData'):
+        if pin_data_dir:
+            report['pinDataFile'] = externalize_pin_data(workflow, pin_data_dir)
+        report['pinData'] = len(slimmed['pinData'])
+        slimmed['pinData'] = {}
+
+    if 'sticky-notes' in passes:
+        kept = [node for node in nodes if not (isinstance(node, dict) and node.get('type') == STICKY_NOTE_TYPE)]
+        report['stickyNotes'] = len(nodes) - len(kept)
+        nodes = kept
+
+    if 'cached-metadata' in passes:
+        for node in nodes:
+            if isinstance(node, dict) and isinstance(node.get('parameters'), dict):
+                # 參數以 JSON 往返複製，避免修改原始工作流中的巢狀物件
+                parameters = json_backend.loads(json_backend.dumps_bytes(node['parameters']))
+                removed = _strip_cached_metadata(parameters)
+                if removed:
+                    node['parameters'] = parameters
+                    report['cachedFields'] += removed
+
+    if 'positions' in passes:
+        report['positions'] = _normalize_positions([node for node in nodes if isinstance(node, dict)])
+
+    if 'nodes' in workflow:
+        slimmed['nodes'] = nodes
+    report['after'] = len(json_backend.dumps_bytes(slimmed))
+    return slimmed, report
+
+
+def format_slim_report(report: Dict) -> str:
+    """單行的瘦身結果說明"""
+    saved = report['before'] - report['after']
+    share = saved / report['before'] * 100 if report['before'] else 0.0
+    details = []
+    if report['pinData']:
+        details.append(f"pinData {report['pinData']} 個節點"
+                       + (f" -> {report['pinDataFile']}" if report['pinDataFile'] else ''))
+    if report['stickyNotes']:
+        details.append(f"便利貼 {report['stickyNotes']} 個")
+    if report['cachedFields']:
+        details.append(f"快取欄位 {report['cachedFields']} 個")
+    if report['positions']:
+        details.append(f"位置 {report['positions']} 個")
+    summary = f"{report['before'] / 1024:.1f} KB -> {report['after'] / 1024:.1f} KB (-{share:.1f}%)"
+    return f"{summary}: {', '.join(details)}" if details else summary
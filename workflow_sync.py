@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+本地目錄、備份基準與 n8n 實例之間的三方同步
+以 versionId 與部署內容雜湊比對三方狀態，只有真正不同的工作流才需要獲取完整內容
+
+同步計畫中的動作:
+    create    本地新增的工作流，遠端不存在
+    update    本地自基準後有修改，遠端未變更 -> 推送到遠端
+    pull      遠端自基準後有修改 (或遠端新增)，本地未變更 -> 寫回本地
+    conflict  本地與遠端都有修改且內容不同，需手動處理
+    noop      三方一致
+"""
+
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+import json_backend
+from backup_store import BackupStore, INDEX_FILE, safe_filename
+from workflow_hash import content_hash, deploy_hash, version_key
+
+SYNC_ACTIONS = ('create', 'update', 'pull', 'conflict', 'noop')
+
+
+class SyncBase:
+    """同步基準：備份倉庫 (index.jsonl) 或含 manifest.json 的備份目錄"""
+
+    def __init__(self, backup_dir: str, manifest_file: str = 'manifest.json', create: bool = False):
+        """
+        Args:
+            create: 基準目錄不存在時建立新的倉庫 (第一次寫入時才建立目錄)；False 時拋出 FileNotFoundError
+        """
+        self.backup_dir = backup_dir
+        self.manifest_path = os.path.join(backup_dir, manifest_file)
+        self.store = None
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._create_store = False
+
+        if os.path.exists(self.manifest_path) and not os.path.exists(os.path.join(backup_dir, INDEX_FILE)):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.entries = json_backend.load(f).get('workflows', {})
+        elif os.path.isdir(backup_dir):
+            self.store = BackupStore(backup_dir)
+            self.entries = self.store.latest()
+        elif create:
+            # 新的基準；只讀取 (例如 --dry-run) 時不建立任何目錄
+            self._create_store = True
+        else:
+            raise FileNotFoundError(f"基準目錄不存在: {backup_dir}")
+
+        self._by_name = {}
+        for workflow_id, entry in self.entries.items():
+            self._by_name.setdefault(entry.get('name'), workflow_id)
+
+    def get(self, workflow_id: Optional[str]) -> Optional[Dict]:
+        return self.entries.get(workflow_id) if workflow_id else None
+
+    def find_by_name(self, name: str) -> Optional[Dict]:
+        workflow_id = self._by_name.get(name)
+        return dict(self.entries[workflow_id], id=workflow_id) if workflow_id else None
+
+    def load_body(self, workflow_id: str) -> Optional[Dict]:
+        """讀取基準版本的完整內容 (只讀本地備份)"""
+        entry = self.entries.get(workflow_id)
+        if not entry:
+            return None
+        if self.store is not None:
+            return self.store.get_blob(entry['hash'])
+        with open(os.path.join(self.backup_dir, entry['file']), 'r', encoding='utf-8') as f:
+            return json_backend.load(f)
+
+    def record(self, workflow_data: Dict, timestamp: str) -> None:
+        """將同步後的工作流記錄為新的基準版本"""
+        workflow_id = workflow_data.get('id')
+        if not workflow_id:
+            return
+        with self._lock:
+            if self.store is None and self._create_store:
+                self.store = BackupStore(self.backup_dir)
+        if self.store is not None:
+            entry, _ = self.store.put(workflow_data, timestamp)
+        else:
+            filename = f"{safe_filename(workflow_data.get('name', 'unnamed_workflow'))}_{workflow_id}_{timestamp}.json"
+            with open(os.path.join(self.backup_dir, filename), 'w', encoding='utf-8') as f:
+                json_backend.dump(workflow_data, f)
+            entry = {
+                'name': workflow_data.get('name'),
+                'versionId': version_key(workflow_data),
+                'hash': content_hash(workflow_data),
+                'deployHash': deploy_hash(workflow_data),
+                'file': filename,
+                'backedUpAt': timestamp,
+            }
+        with self._lock:
+            self.entries[workflow_id] = entry
+
+    def save(self, host_url: str) -> None:
+        """寫回 manifest.json (倉庫格式的索引在 record 時已寫入)"""
+        if self.store is not None or self._create_store:
+            return
+        with self._lock:
+            manifest = {'host_url': host_url, 'workflows': self.entries}
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json_backend.dump(manifest, f, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def deploy_hash(self, workflow_id: str) -> Optional[str]:
+        """基準版本的部署內容雜湊；舊版清單沒有記錄時由本地備份計算"""
+        entry = self.entries.get(workflow_id)
+        if not entry:
+            return None
+        if not entry.get('deployHash'):
+            body = self.load_body(workflow_id)
+            entry['deployHash'] = deploy_hash(body) if body is not None else None
+        return entry['deployHash']
+
+
+def build_sync_plan(local_files: Iterable[str], remote_index: Iterable[Dict], workflow_index,
+                    base: SyncBase, fetch_remote: Callable[[str], Dict],
+                    include_remote_only: bool = False) -> List[Dict]:
+    """
+    計算三方同步計畫
+
+    Args:
+        local_files: 本地工作流 JSON 文件
+        remote_index: 遠端工作流索引項目 (id/name/versionId)
+        workflow_index: 提供 find_by_name 的遠端索引
+        base: 同步基準
+        fetch_remote: 獲取遠端完整工作流的函式，只在需要比對內容時呼叫
+        include_remote_only: 是否將本地沒有的遠端新工作流列入 pull
+
+    Returns:
+        動作列表，每項包含 action、name、file、id、reason
+    """
+    plan = []
+    seen_remote_ids = set()
+
+    for json_file in local_files:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            local_data = json_backend.load(f)
+        name = local_data.get('name', '未命名工作流')
+        local_hash = deploy_hash(local_data)
+        remote = workflow_index.find_by_name(name)
+        item = {'file': json_file, 'name': name, 'id': remote['id'] if remote else None}
+
+        if remote is None:
+            plan.append(dict(item, action='create', reason='遠端不存在'))
+            continue
+        seen_remote_ids.add(remote['id'])
+
+        base_entry = base.get(remote['id'])
+        if base_entry is None:
+            # 沒有基準時只能直接比對內容
+            remote_data = fetch_remote(remote['id'])
+            if deploy_hash(remote_data) == local_hash:
+                plan.append(dict(item, action='noop', reason='內容相同'))
+            else:
+                plan.append(dict(item, action='conflict', reason='沒有共同基準且內容不同'))
+            continue
+
+        remote_changed = version_key(remote) != base_entry.get('versionId')
+        local_changed = local_hash != base.deploy_hash(remote['id'])
+
+        if not remote_changed and not local_changed:
+            plan.append(dict(item, action='noop', reason='三方一致'))
+        elif local_changed and not remote_changed:
+            plan.append(dict(item, action='update', reason='本地已修改'))
+        elif remote_changed and not local_changed:
+            plan.append(dict(item, action='pull', reason='遠端已修改'))
+        else:
+            remote_data = fetch_remote(remote['id'])
+            if deploy_hash(remote_data) == local_hash:
+                plan.append(dict(item, action='noop', reason='雙方修改結果相同'))
+            else:
+                plan.append(dict(item, action='conflict', reason='本地與遠端都已修改'))
+
+    if include_remote_only:
+        for remote in remote_index:
+            if remote['id'] in seen_remote_ids or base.get(remote['id']) is not None:
+                continue
+            plan.append({'file': None, 'name': remote.get('name'), 'id': remote['id'],
+                         'action': 'pull', 'reason': '遠端新增'})
+
+    return plan
+
+
+def assign_pull_files(plan: List[Dict], local_dir: str) -> None:
+    """
+    為遠端新增的 pull 項目決定本地文件名稱 (就地修改計畫)
+
+    預設為 <名稱>.json；與現有文件或本次其他項目重複時 (n8n 允許同名工作流) 改用 <名稱>_<ID>.json，
+    仍然重複時改為 conflict，不覆寫本地文件
+    """
+    claimed = {os.path.abspath(item['file']) for item in plan if item['file']}
+    for item in plan:
+        if item['action'] != 'pull' or item['file']:
+            continue
+        name = safe_filename(item['name'] or 'unnamed_workflow')
+        for candidate in (f"{name}.json", f"{name}_{safe_filename(item['id'])}.json"):
+            path = os.path.join(local_dir, candidate)
+            if os.path.abspath(path) not in claimed and not os.path.exists(path):
+                item['file'] = path
+                claimed.add(os.path.abspath(path))
+                break
+        else:
+            item['action'] = 'conflict'
+            item['reason'] = '本地已有同名文件'
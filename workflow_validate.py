@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+工作流結構驗證
+除了必要欄位外，以節點名稱索引在 O(N+E) 內檢查連接結構：
+
+- 錯誤: 連接到不存在的節點、節點名稱或 ID 重複、switch/if 輸出 index 超出範圍
+- 警告: 無法從觸發節點到達的節點、不經過 splitInBatches 的循環
+
+驗證整個目錄時以程序池並行處理文件 (不需連線設定)
+
+Usage:
+    python3 n8n_deploy_pipeline.py validate <JSON_FILE_OR_DIRECTORY> [--jobs N] [--json]
+"""
+
+import os
+import json
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import json_backend
+from workflow_lint import STRUCTURE_FIELDS, workflow_files
+
+NODE_REQUIRED_FIELDS = ('type', 'typeVersion', 'position', 'id', 'name')
+
+STICKY_NOTE_TYPE = 'n8n-nodes-base.stickyNote'
+LOOP_NODE_TYPE = 'n8n-nodes-base.splitInBatches'
+
+# 類型名稱不以 Trigger 結尾的觸發節點
+TRIGGER_TYPES = frozenset([
+    'n8n-nodes-base.webhook',
+    'n8n-nodes-base.start',
+    'n8n-nodes-base.cron',
+    'n8n-nodes-base.interval',
+    'n8n-nodes-base.emailReadImap',
+])
+
+# 文件數量少於此值時不啟動程序池 (啟動成本高於驗證本身)
+PARALLEL_MIN_FILES = 16
+
+
+def is_trigger(node: Dict) -> bool:
+    node_type = node.get('type', '')
+    return node_type in TRIGGER_TYPES or node_type.lower().endswith('trigger')
+
+
+def output_count(node: Dict) -> Optional[int]:
+    """if/switch 節點的輸出數量；其他節點或無法靜態判斷時返回 None"""
+    node_type = node.get('type')
+    parameters = node.get('parameters') or {}
+    if node_type == 'n8n-nodes-base.if':
+        return 2
+    if node_type != 'n8n-nodes-base.switch':
+        return None
+    if (node.get('typeVersion') or 1) < 3:
+        return 4
+    if parameters.get('mode') == 'expression':
+        count = parameters.get('numberOutputs', 4)
+        return count if isinstance(count, int) else None
+    rules = ((parameters.get('rules') or {}).get('values')) or []
+    fallback = (parameters.get('options') or {}).get('fallbackOutput')
+    return len(rules) + (1 if fallback == 'extra' else 0)
+
+
+def _strongly_connected(successors: Dict[str, List[str]]) -> List[List[str]]:
+    """Tarjan 演算法 (非遞迴)，返回含循環的強連通分量"""
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack = set()
+    components = []
+    counter = 0
+
+    for root in successors:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors[root]))]
+        while work:
+            node, children = work[-1]
+            descended = False
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors[child])))
+                    descended = True
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            if descended:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in successors[node]:
+                    components.append(component[::-1])
+    return components
+
+
+def _check_graph(nodes: List, connections: Dict, errors: List[str], warnings: List[str]) -> None:
+    by_name: Dict[str, Dict] = {}
+    names_by_id: Dict[str, str] = {}
+    for node in nodes:
+        if not isinstance(node, dict) or 'name' not in node:
+            continue
+        name = node['name']
+        if name in by_name:
+            errors.append(f"節點名稱重複: {name}")
+        else:
+            by_name[name] = node
+        node_id = node.get('id')
+        if node_id is not None:
+            if node_id in names_by_id:
+                errors.append(f"節點 ID 重複: {node_id} ({names_by_id[node_id]}, {name})")
+            else:
+                names_by_id[node_id] = name
+
+    successors: Dict[str, List[str]] = {name: [] for name in by_name}
+    # 子節點 (AI 模型、工具等以非 main 連線接入) -> 根節點
+    sub_node_parents: Dict[str, List[str]] = {}
+    for source, outputs in connections.items():
+        if source not in by_name:
+            errors.append(f"連接來源節點不存在: {source}")
+            continue
+        if not isinstance(outputs, dict):
+            errors.append(f"{source} 的連接必須是物件")
+            continue
+        for connection_type, branches in outputs.items():
+            if not isinstance(branches, list):
+                errors.append(f"{source} 的 {connection_type} 連接必須是陣列")
+                continue
+            if connection_type == 'main':
+                limit = output_count(by_name[source])
+                if limit is not None:
+                    for output_index in range(limit, len(branches)):
+                        if branches[output_index]:
+                            errors.append(f"{source} 的輸出 index {output_index} 超出範圍 (共 {limit} 個輸出)")
+            for branch in branches:
+                for target in branch or []:
+                    target_name = target.get('node') if isinstance(target, dict) else None
+                    if target_name not in by_name:
+                        errors.append(f"{source} 連接到不存在的節點: {target_name}")
+                    elif connection_type == 'main':
+                        successors[source].append(target_name)
+                    else:
+                        sub_node_parents.setdefault(source, []).append(target_name)
+
+    # 從觸發節點出發的可達性；子節點在其根節點可達時視為可達
+    triggers = [name for name, node in by_name.items() if is_trigger(node)]
+    if triggers:
+        reached = set(triggers)
+        queue = deque(triggers)
+        while queue:
+            for child in successors[queue.popleft()]:
+                if child not in reached:
+                    reached.add(child)
+                    queue.append(child)
+        children_of: Dict[str, List[str]] = {}
+        for child, parents in sub_node_parents.items():
+            for parent in parents:
+                children_of.setdefault(parent, []).append(child)
+        queue = deque(reached)
+        while queue:
+            for child in children_of.get(queue.popleft(), []):
+                if child not in reached:
+                    reached.add(child)
+                    queue.append(child)
+        unreachable = [name for name, node in by_name.items()
+                       if name not in reached and node.get('type') != STICKY_NOTE_TYPE]
+        if unreachable:
+            warnings.append(f"無法從觸發節點到達的節點: {', '.join(unreachable)}")
+
+    # splitInBatches 迴圈是刻意的循環，其餘循環視為可疑
+    for component in _strongly_connected(successors):
+        if not any(by_name[name].get('type') == LOOP_NODE_TYPE for name in component):
+            warnings.append(f"連接形成循環 (不經過 splitInBatches): {' -> '.join(component)}")
+
+
+def validate_workflow(workflow_data: Dict) -> Tuple[List[str], List[str]]:
+    """
+    驗證工作流 JSON 結構
+
+    Returns:
+        (errors, warnings)
+    """
+    errors: List[str] = []
+    warnings: List[str] = []
+    if not isinstance(workflow_data, dict):
+        return ["工作流必須是物件"], warnings
+
+    # 檢查必要欄位
+    for field in ('name', 'nodes', 'connections'):
+        if field not in workflow_data:
+            errors.append(f"缺少必要欄位: {field}")
+
+    # 檢查節點結構
+    nodes = workflow_data.get('nodes')
+    if 'nodes' in workflow_data:
+        if not isinstance(nodes, list):
+            errors.append("nodes 必須是陣列")
+        else:
+            for i, node in enumerate(nodes):
+                if not isinstance(node, dict):
+                    errors.append(f"節點 {i} 必須是物件")
+                    continue
+                for field in NODE_REQUIRED_FIELDS:
+                    if field not in node:
+                        errors.append(f"節點 {i} 缺少必要欄位: {field}")
+
+    # 檢查連接結構
+    connections = workflow_data.get('connections')
+    if 'connections' in workflow_data and not isinstance(connections, dict):
+        errors.append("connections 必須是物件")
+
+    # 檢查工作流名稱
+    if 'name' in workflow_data:
+        name = workflow_data['name']
+        if not isinstance(name, str) or len(name.strip()) == 0:
+            errors.append("工作流名稱不能為空")
+
+    if isinstance(nodes, list) and isinstance(connections, dict):
+        _check_graph(nodes, connections, errors, warnings)
+
+    return errors, warnings
+
+
+def validate_file(path: str, keep_workflow: bool = False) -> Dict:
+    """
+    驗證單一文件 (程序池的工作函式)；大文件只串流讀取 name、nodes、connections
+
+    keep_workflow 為 True 時結果中附上讀取到的內容 ('workflow')，供後續分析重用
+    """
+    result = {'file': path, 'name': None, 'errors': [], 'warnings': []}
+    try:
+        workflow_data = json_backend.load_file(path, fields=STRUCTURE_FIELDS)
+    except (OSError, UnicodeDecodeError) as e:
+        result['errors'].append(f"無法讀取文件: {e}")
+        return result
+    except json.JSONDecodeError as e:
+        result['errors'].append(f"JSON 格式錯誤: {e}")
+        return result
+    if isinstance(workflow_data, dict):
+        result['name'] = workflow_data.get('name')
+    result['errors'], result['warnings'] = validate_workflow(workflow_data)
+    if keep_workflow:
+        result['workflow'] = workflow_data
+    return result
+
+
+def validate_files(paths: List[str], jobs: Optional[int] = None) -> List[Dict]:
+    """驗證多個文件或目錄 (目錄中的 *.json)，結果依文件順序返回"""
+    files = workflow_files(paths)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(files) < PARALLEL_MIN_FILES:
+        return [validate_file(path) for path in files]
+    # 程序池 (multiprocessing) 只在需要時載入，驗證單一文件不付出匯入成本
+    from concurrent.futures import ProcessPoolExecutor
+    chunksize = max(len(files) // (jobs * 4), 1)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(validate_file, files, chunksize=chunksize))